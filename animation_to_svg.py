@@ -0,0 +1,186 @@
+import argparse
+import contextlib
+import sys
+from pathlib import Path
+
+from svgtrace import svgwriter
+from svgtrace.encode import PathEncoder
+from svgtrace.fit import CurveFitter
+from svgtrace.frames import TILE, FrameTracer, frame_paths, iter_frames
+from svgtrace.instrument import profiling, staged
+from svgtrace.pipeline import fit_to_viewbox
+from svgtrace.svgwriter import is_stdout
+
+# Path data of frames without contours; SMIL can't animate to an empty path
+EMPTY_PATH = "M0,0"
+
+def output_path_for(source):
+    """
+    Default SVG path for an animation: next to the file, or next to the directory of frames.
+    """
+    source = Path(source)
+    if frame_paths(source) is not None and not source.is_dir():
+        # A glob pattern; name the SVG after the directory the frames are in
+        source = source.parent
+    return source.with_suffix('.svg')
+
+@staged('convert_animation')
+def convert_animation(source, output_path=None, frames_dir=None, threshold_value=127, min_contour_length=50, smoothing=True, use_bezier=True, bezier_smoothing=0.25, simplify=True, width=600, height=420, color="navy", stroke_width=3, fit_error=None, fit_viewbox=False, frame_rate=10, once=False, compact=False, precision=2, reuse=True, tile=TILE):
+    """
+    Convert an animated image, a video or a sequence of stills to SVG.
+    
+    Frames are decoded and traced one at a time. Each frame reuses the
+    previous frame's contours and path data away from the pixels that
+    changed, unless reuse is turned off.
+    
+    Args:
+        source: Animated GIF/WebP/APNG or video path, directory of frame images, or glob pattern
+        output_path: Path to save one SVG animating the path through the frames, or '-' for stdout (None to not write it)
+        frames_dir: Directory to save one SVG per frame in, as frame-0001.svg, ... (None to not write them)
+        threshold_value: Value for binary thresholding (0-255)
+        min_contour_length: Minimum length of contours to include
+        smoothing: Whether to apply smoothing to the contours
+        use_bezier: Whether to use bezier curves for smoother paths
+        bezier_smoothing: Smoothing factor for bezier curves (0-1)
+        simplify: Whether to simplify contours
+        width: Width of the SVG viewBox
+        height: Height of the SVG viewBox
+        color: Stroke color
+        stroke_width: Width of the stroke
+        fit_error: Fit the raw contours with least-squares cubic curves within this many pixels
+            (None for one curve per simplified vertex)
+        fit_viewbox: Resize the frames to fit the viewBox before tracing
+        frame_rate: Frames per second when the source doesn't say (sequences of stills)
+        once: Play the animation once and stop on the last frame instead of looping
+        compact: Whether to re-encode the path data compactly
+        precision: Decimal places kept by the compact encoding
+        reuse: Whether to reuse unchanged contours between frames
+        tile: Side of the square tiles frames are compared in
+    
+    Returns:
+        FrameTracer that traced the frames, with its reuse statistics
+    """
+    fitter = CurveFitter(fit_error) if fit_error else None
+    tracer = FrameTracer(threshold_value, smoothing, min_contour_length, reuse, tile,
+                         simplify=simplify, use_bezier=use_bezier, bezier_smoothing=bezier_smoothing, fitter=fitter)
+    encoder = PathEncoder(precision) if compact else None
+    attributes = svgwriter.stroke_attributes(color, stroke_width)
+    
+    if frames_dir:
+        Path(frames_dir).mkdir(parents=True, exist_ok=True)
+    
+    def frames():
+        for index, (frame, duration) in enumerate(iter_frames(source), 1):
+            if fit_viewbox:
+                frame = fit_to_viewbox(frame, width, height)
+            _, paths = tracer.trace(frame)
+        
+            # Frames are encoded on their own, since a relative path can't start from the previous frame
+            if encoder:
+                encoder.restart()
+                paths = encoder.iter_encode(paths)
+            path_data = "".join(paths)
+        
+            if frames_dir:
+                svgwriter.write_svg(Path(frames_dir) / f'frame-{index:04d}.svg', path_data, width, height, attributes)
+            yield path_data or EMPTY_PATH, duration or 1 / frame_rate
+    
+    if output_path is None:
+        # Only the per-frame files are written
+        for _ in frames():
+            pass
+    else:
+        count, seconds = svgwriter.write_animated_svg(output_path, frames(), width, height, attributes, loop=not once)
+        if not is_stdout(output_path):
+            print(f"SVG saved to {output_path} ({count} frames, {seconds:.2f}s)")
+    
+    if frames_dir and not is_stdout(output_path):
+        print(f"{tracer.frames} frame SVGs saved to {frames_dir}")
+    
+    if fitter and fitter.points and not is_stdout(output_path):
+        print(fitter.summary())
+    
+    if encoder and not is_stdout(output_path):
+        print(encoder.savings())
+    
+    return tracer
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert an animated image, a video or a sequence of frames to an animated SVG path')
+    parser.add_argument('source', type=str, help='Animated GIF/WebP/APNG or video file, directory of frame images, or quoted glob pattern')
+    parser.add_argument('--output', type=str, help="Path to save the animated SVG ('-' for stdout)", default=None)
+    parser.add_argument('--frames-dir', type=str, default=None, help='Also save one SVG per frame in this directory (frame-0001.svg, ...)')
+    parser.add_argument('--frames-only', action='store_true', help='Only save the per-frame SVGs (needs --frames-dir)')
+    parser.add_argument('--threshold', type=int, default=127, help='Threshold value for binary conversion (0-255)')
+    parser.add_argument('--min-length', type=int, default=50, help='Minimum length of contours to include')
+    parser.add_argument('--width', type=int, default=600, help='Width of the SVG viewBox')
+    parser.add_argument('--height', type=int, default=420, help='Height of the SVG viewBox')
+    parser.add_argument('--no-smooth', action='store_true', help='Disable image smoothing')
+    parser.add_argument('--no-bezier', action='store_true', help='Disable bezier curves')
+    parser.add_argument('--bezier-smoothing', type=float, default=0.25, help='Bezier curve smoothing factor (0-1)')
+    parser.add_argument('--no-simplify', action='store_true', help='Disable contour simplification')
+    parser.add_argument('--fit-error', type=float, default=None, help='Fit the raw contours with as few cubic curves as keep within this many pixels (e.g. 2), instead of one curve per simplified vertex')
+    parser.add_argument('--fit-viewbox', action='store_true', help='Resize the frames to fit the viewBox before tracing, so path coordinates are in viewBox units')
+    parser.add_argument('--fps', type=float, default=10, help='Frame rate of sequences of still images (animations and videos keep their own)')
+    parser.add_argument('--once', action='store_true', help='Play the animation once and stop instead of looping')
+    parser.add_argument('--full', action='store_true', help='Trace every frame in full instead of reusing unchanged contours')
+    parser.add_argument('--tile', type=int, default=TILE, help='Side in pixels of the tiles frames are compared in')
+    parser.add_argument('--compact', action='store_true', help='Write compact path data: rounded coordinates, relative commands, no redundant characters')
+    parser.add_argument('--precision', type=int, default=2, help='Decimal places kept with --compact')
+    parser.add_argument('--profile', action='store_true', help='Print a one-line summary of the time, memory and contours of each stage')
+    parser.add_argument('--profile-output', type=str, default=None, help='Save a Chrome trace of the stages as JSON (implies --profile)')
+    parser.add_argument('--color', type=str, default='navy', help='Stroke color for the SVG path')
+    parser.add_argument('--stroke-width', type=int, default=3, help='Stroke width for the SVG path')
+    
+    args = parser.parse_args()
+    
+    if args.frames_only and not args.frames_dir:
+        parser.error("--frames-only needs --frames-dir")
+    if args.fps <= 0:
+        parser.error("--fps must be positive")
+    
+    # Determine output path
+    if args.frames_only:
+        output_path = None
+    elif args.output is None:
+        output_path = output_path_for(args.source)
+    else:
+        output_path = Path(args.output) if not is_stdout(args.output) else args.output
+    
+    profiler_context = profiling() if args.profile or args.profile_output else contextlib.nullcontext()
+    
+    # Trace the frames and save the SVGs
+    with profiler_context as profiler:
+        tracer = convert_animation(
+            args.source,
+            output_path,
+            frames_dir=args.frames_dir,
+            threshold_value=args.threshold,
+            min_contour_length=args.min_length,
+            smoothing=not args.no_smooth,
+            use_bezier=not args.no_bezier,
+            bezier_smoothing=args.bezier_smoothing,
+            simplify=not args.no_simplify,
+            width=args.width,
+            height=args.height,
+            color=args.color,
+            stroke_width=args.stroke_width,
+            fit_error=args.fit_error,
+            fit_viewbox=args.fit_viewbox,
+            frame_rate=args.fps,
+            once=args.once,
+            compact=args.compact,
+            precision=args.precision,
+            reuse=not args.full,
+            tile=args.tile
+        )
+    
+    if not is_stdout(output_path):
+        print(tracer.summary())
+    
+    # Keep stdout clean when the SVG is written there
+    if profiler:
+        profiler.report(args.profile_output, file=sys.stderr if is_stdout(output_path) else None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,573 @@
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp'}
+
+def collect_inputs(sources, manifest=None, recursive=False):
+    """
+    Expand directories, glob patterns, plain paths and a manifest into image paths.
+
+    Args:
+        sources: Directories, glob patterns or image paths
+        manifest: Path to a text file with one image path per line (# starts a comment)
+        recursive: Whether to descend into subdirectories
+
+    Returns:
+        List of image paths in a stable order, without duplicates
+    """
+    candidates = []
+
+    if manifest:
+        base = Path(manifest).parent
+        with open(manifest) as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    path = Path(line)
+                    candidates.append(path if path.is_absolute() else base / path)
+
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            pattern = '**/*' if recursive else '*'
+            candidates.extend(sorted(p for p in path.glob(pattern) if p.suffix.lower() in IMAGE_EXTENSIONS))
+        elif glob.has_magic(source):
+            candidates.extend(sorted(Path(p) for p in glob.glob(source, recursive=recursive)))
+        else:
+            candidates.append(path)
+
+    # Remove duplicates while keeping the first occurrence
+    seen = set()
+    inputs = []
+    for path in candidates:
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            inputs.append(path)
+
+    return inputs
+
+# Result cache of this worker process, shared by the files it converts
+_cache = None
+
+def _init_worker(cv_threads, cache_dir=None, cache_size=None):
+    """
+    Limit OpenCV's own thread pool so worker processes don't oversubscribe the cores,
+    and open the result cache if one is used.
+    """
+    global _cache
+    import cv2
+    cv2.setNumThreads(cv_threads)
+
+    if cache_dir:
+        from svgtrace.cache import ResultCache
+        _cache = ResultCache(cache_dir, cache_size)
+
+def run_converter(mode, image_path, output_path, options, cache=None):
+    """
+    Run one of the converters with batch options.
+
+    Args:
+        mode: Converter to use ('basic', 'advanced' or 'color')
+        image_path: Path to the input image
+        output_path: Path to save the output SVG
+        options: Converter options, as built by `options_from_args`
+        cache: ResultCache to reuse earlier results from (None to always convert)
+
+    Returns:
+        Length of the path data (0 if no contours were found)
+    """
+    if mode == 'basic':
+        import image_to_svg
+        path_length, _ = image_to_svg.convert_image(
+            image_path,
+            output_path,
+            threshold_value=options['threshold'],
+            min_contour_length=options['min_length'],
+            smoothing=options['smooth'],
+            width=options['width'],
+            height=options['height'],
+            min_area=options['min_area'],
+            min_extent=options['min_extent'],
+            pyramid_levels=options['pyramid'],
+            fit_viewbox=options['fit_viewbox'],
+            fast_decode=options['fast_decode'],
+            join_tolerance=options['join_paths'],
+            compact=options['compact'],
+            precision=options['precision'],
+            lengths=options['lengths'],
+            split_paths=options['split_paths'],
+            cache=cache
+        )
+    elif mode == 'advanced':
+        import image_to_svg_advanced
+        path_length, _ = image_to_svg_advanced.convert_image(
+            image_path,
+            output_path,
+            edge_detection=options['edge_detection'],
+            threshold_value=options['threshold'],
+            min_contour_length=options['min_length'],
+            smoothing=options['smooth'],
+            use_bezier=options['bezier'],
+            bezier_smoothing=options['bezier_smoothing'],
+            simplify=options['simplify'],
+            fit_error=options['fit_error'],
+            min_area=options['min_area'],
+            min_extent=options['min_extent'],
+            pyramid_levels=options['pyramid'],
+            fit_viewbox=options['fit_viewbox'],
+            fast_decode=options['fast_decode'],
+            centerline=options['centerline'],
+            estimate_width=options['estimate_width'],
+            width=options['width'],
+            height=options['height'],
+            color=options['stroke_color'] or 'navy',
+            stroke_width=options['stroke_width'],
+            join_tolerance=options['join_paths'],
+            compact=options['compact'],
+            precision=options['precision'],
+            lengths=options['lengths'],
+            split_paths=options['split_paths'],
+            cache=cache
+        )
+    else:
+        import extract_colored_path
+        path_length, _ = extract_colored_path.convert_image(
+            image_path,
+            options['color'],
+            output_path,
+            min_contour_length=options['min_length'],
+            simplify=options['simplify'],
+            use_bezier=options['bezier'],
+            bezier_smoothing=options['bezier_smoothing'],
+            fit_error=options['fit_error'],
+            min_area=options['min_area'],
+            min_extent=options['min_extent'],
+            centerline=options['centerline'],
+            estimate_width=options['estimate_width'],
+            join_tolerance=options['join_paths'],
+            width=options['width'],
+            height=options['height'],
+            stroke_color=options['stroke_color'],
+            stroke_width=options['stroke_width'],
+            compact=options['compact'],
+            precision=options['precision'],
+            lengths=options['lengths'],
+            split_paths=options['split_paths'],
+            cache=cache
+        )
+
+    return path_length
+
+def convert_file(mode, image_path, output_path, options):
+    """
+    Convert a single image in a worker process.
+
+    Args:
+        mode: Converter to use ('basic', 'advanced' or 'color')
+        image_path: Path to the input image
+        output_path: Path to save the output SVG
+        options: Converter options from the command line
+
+    Returns:
+        Tuple of (seconds, output size in bytes, whether the result came from the cache)
+    """
+    start = time.perf_counter()
+    hits = _cache.hits if _cache else 0
+
+    # Keep the converters' progress messages out of the batch summary
+    with contextlib.redirect_stdout(io.StringIO()):
+        path_length = run_converter(mode, image_path, output_path, options, _cache)
+
+    elapsed = time.perf_counter() - start
+    size = Path(output_path).stat().st_size if path_length else 0
+    return elapsed, size, bool(_cache and _cache.hits > hits)
+
+def output_path_for(image_path, output_dir, root=None):
+    """
+    Place the SVG next to the image, or in `output_dir` when given.
+
+    Args:
+        image_path: Path to the image
+        output_dir: Directory for the SVG files (None to write next to the image)
+        root: Directory the image was found in; its subdirectories are kept under
+            output_dir (None to write every SVG straight into output_dir)
+    """
+    image_path = Path(image_path)
+    if output_dir is None:
+        return image_path.with_suffix('.svg')
+    relative = Path(image_path.name)
+    if root is not None:
+        relative = Path(os.path.relpath(image_path.resolve(), Path(root).resolve()))
+    return Path(output_dir) / relative.with_suffix('.svg')
+
+def input_roots(sources, manifest=None):
+    """
+    Directories the inputs of collect_inputs() are found in, most specific first.
+
+    Directories are roots themselves, a glob pattern's root is the part before
+    its first wildcard and a manifest's is the directory it lies in.
+    """
+    roots = []
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            roots.append(path)
+        elif glob.has_magic(source):
+            fixed = []
+            for part in path.parts:
+                if glob.has_magic(part):
+                    break
+                fixed.append(part)
+            roots.append(Path(*fixed) if fixed else Path('.'))
+    if manifest:
+        roots.append(Path(manifest).parent)
+    return sorted({root.resolve() for root in roots}, key=lambda root: -len(root.parts))
+
+def plan_outputs(inputs, output_dir=None, roots=()):
+    """
+    Output path of every input, telling apart images that would share one.
+
+    Images found under one of `roots` keep their subdirectories under
+    output_dir. Images that would still be written to the same SVG (x.jpg
+    and x.png next to each other, or x.jpg from two unrelated directories)
+    keep their extension instead, as x.jpg.svg and x.png.svg, and a warning
+    is printed to stderr.
+
+    Args:
+        inputs: Image paths
+        output_dir: Directory for the SVG files (None to write next to the images)
+        roots: Directories the images were found in, see input_roots()
+
+    Returns:
+        Dict of image path to SVG path
+
+    Raises:
+        ValueError: If two images would still be written to the same SVG
+    """
+    outputs = {}
+    for path in inputs:
+        resolved = Path(path).resolve()
+        root = next((root for root in roots if resolved.is_relative_to(root)), None)
+        outputs[path] = output_path_for(path, output_dir, root)
+
+    # Group the inputs by the SVG they would be written to
+    targets = {}
+    for path, output in outputs.items():
+        targets.setdefault(output.resolve(), []).append(path)
+
+    for output, paths in targets.items():
+        if len(paths) < 2:
+            continue
+        for path in paths:
+            outputs[path] = outputs[path].with_name(Path(path).name + '.svg')
+        names = ', '.join(str(path) for path in paths)
+        print(f"Warning: {names} share the output {output}; keeping their extensions in the SVG names", file=sys.stderr)
+
+    seen = {}
+    for path, output in outputs.items():
+        other = seen.setdefault(output.resolve(), path)
+        if other is not path:
+            raise ValueError(f"{other} and {path} would both be written to {output}")
+    return outputs
+
+def run_batch(mode, inputs, options, output_dir=None, workers=None, cv_threads=1, cache_dir=None, cache_size=None, outputs=None):
+    """
+    Convert many images over a process pool.
+
+    Args:
+        mode: Converter to use ('basic', 'advanced' or 'color')
+        inputs: Image paths to convert
+        options: Converter options
+        output_dir: Directory for the SVG files (None to write next to the images)
+        workers: Number of worker processes (defaults to the number of cores)
+        cv_threads: OpenCV threads per worker
+        cache_dir: Result cache directory shared by the workers (None to not cache)
+        cache_size: Maximum result cache size on disk in bytes
+        outputs: Dict of image path to SVG path (None to plan them with plan_outputs())
+
+    Returns:
+        Tuple of (results, wall time) where results holds one
+        (image_path, seconds, bytes, cached, error) tuple per input, in input order
+    """
+    workers = workers or os.cpu_count() or 1
+    if outputs is None:
+        outputs = plan_outputs(inputs, output_dir)
+    for directory in {output.parent for output in outputs.values()}:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cv_threads, cache_dir, cache_size)) as executor:
+        futures = {
+            executor.submit(convert_file, mode, str(path), str(outputs[path]), options): path
+            for path in inputs
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                elapsed, size, cached = future.result()
+                results[path] = (path, elapsed, size, cached, None)
+            except Exception as e:
+                results[path] = (path, 0.0, 0, False, str(e))
+    wall_time = time.perf_counter() - start
+
+    return [results[path] for path in inputs], wall_time
+
+def run_pipelined(mode, inputs, options, output_dir=None, decode_threads=1, compute_threads=None, write_threads=1, queue_depth=4, cv_threads=1, cache_dir=None, cache_size=None, outputs=None):
+    """
+    Convert many images in this process, decoding, tracing and writing on separate threads.
+
+    OpenCV and file I/O release the GIL, so the stages overlap without the
+    memory of a process pool: one image is decoded while another is traced
+    and a third written. Bounded queues between the stages keep at most
+    `queue_depth` decoded images or finished SVGs waiting. With a cache, the
+    decode stage looks each image up first and passes hits straight on
+    without decoding them.
+
+    Args:
+        mode: Converter to use ('basic', 'advanced' or 'color')
+        inputs: Image paths to convert
+        options: Converter options
+        output_dir: Directory for the SVG files (None to write next to the images)
+        decode_threads: Threads decoding images
+        compute_threads: Threads tracing images (defaults to the number of cores)
+        write_threads: Threads writing SVG files
+        queue_depth: Maximum number of items waiting in front of each stage
+        cv_threads: OpenCV threads of the process
+        cache_dir: Result cache directory (None to not cache)
+        cache_size: Maximum result cache size on disk in bytes
+        outputs: Dict of image path to SVG path (None to plan them with plan_outputs())
+
+    Returns:
+        Tuple of (results, wall time, executor) where results holds one
+        (image_path, seconds, bytes, cached, error) tuple per input, in input order,
+        and the executor reports how busy each stage was
+    """
+    import cv2
+    from svgtrace.cache import CacheMiss, ResultCache
+    from svgtrace.decode import decode_mode
+    from svgtrace.executor import PipelinedExecutor, Stage
+    from svgtrace.pipeline import preloaded, read_image
+
+    cv2.setNumThreads(cv_threads)
+    if outputs is None:
+        outputs = plan_outputs(inputs, output_dir)
+    for directory in {output.parent for output in outputs.values()}:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    # One result cache per thread, as in the conversion service
+    caches = threading.local()
+
+    def thread_cache():
+        if cache_dir and not hasattr(caches, 'cache'):
+            caches.cache = ResultCache(cache_dir, cache_size)
+        return getattr(caches, 'cache', None)
+
+    def convert(path, cache):
+        svg = io.StringIO()
+        path_length = run_converter(mode, str(path), svg, options, cache)
+        return svg.getvalue() if path_length else None
+
+    def decode(path):
+        # A cached result is served here and passed straight through, without decoding
+        cache = thread_cache()
+        if cache:
+            cache.probing = True
+            try:
+                return path, True, convert(path, cache)
+            except CacheMiss:
+                pass
+            finally:
+                cache.probing = False
+
+        # Memory-mapped arrays are opened by the converters themselves
+        if path.suffix.lower() == '.npy':
+            return path, False, (None, None)
+
+        # Decode the way the converter would, so it finds the image preloaded
+        image_mode = 'color'
+        if options['fast_decode'] and mode != 'color':
+            image_mode = decode_mode(path, fit_size=(options['width'], options['height']) if options['fit_viewbox'] else None)
+        return path, False, (read_image(path, image_mode), image_mode)
+
+    def compute(job):
+        path, cached, result = job
+        if cached:
+            return path, result, True
+
+        img, image_mode = result
+        cache = thread_cache()
+        hits = cache.hits if cache else 0
+        with preloaded(str(path), img, image_mode):
+            svg = convert(path, cache)
+        return path, svg, bool(cache and cache.hits > hits)
+
+    def write(job):
+        path, svg, cached = job
+        # Count bytes written, as convert_file does, not characters
+        size = outputs[path].write_bytes(svg.encode()) if svg is not None else 0
+        return size, cached
+
+    executor = PipelinedExecutor([
+        Stage('decode', decode, decode_threads),
+        Stage('trace', compute, compute_threads or os.cpu_count() or 1),
+        Stage('write', write, write_threads),
+    ], queue_depth)
+
+    results = {}
+    for path, result, seconds, error in executor.map((path, path) for path in inputs):
+        if error is None:
+            size, cached = result
+            results[path] = (path, sum(seconds), size, cached, None)
+        else:
+            results[path] = (path, sum(seconds), 0, False, str(error))
+
+    return [results[path] for path in inputs], executor.wall_seconds, executor
+
+def print_summary(results, wall_time, workers, pool='workers'):
+    """
+    Print per-file timings followed by the total throughput.
+    """
+    name_width = max([len(str(path)) for path, _, _, _, _ in results] + [5])
+    print(f"{'image':<{name_width}} {'seconds':>8} {'svg bytes':>10}  status")
+    for path, elapsed, size, cached, error in results:
+        status = f"FAILED: {error}" if error else ("ok" if size else "no contours")
+        if cached and not error:
+            status += " (cached)"
+        print(f"{str(path):<{name_width}} {elapsed:>8.3f} {size:>10}  {status}")
+
+    busy_time = sum(elapsed for _, elapsed, _, _, _ in results)
+    failed = sum(1 for _, _, _, _, error in results if error)
+    hits = sum(1 for _, _, _, cached, _ in results if cached)
+    print(f"\n{len(results)} files ({failed} failed, {hits} from cache) in {wall_time:.2f}s with {workers} {pool}: "
+          f"{len(results) / wall_time:.2f} files/s, "
+          f"{busy_time / wall_time:.2f}x parallel speedup over {busy_time:.2f}s of conversion time")
+
+def add_converter_arguments(parser):
+    """
+    Add the converter choice and the options shared by all converters to a parser.
+    """
+    from svgtrace.order import DEFAULT_TOLERANCE
+
+    parser.add_argument('--mode', choices=['basic', 'advanced', 'color'], default='advanced', help='Converter to use')
+    parser.add_argument('--threshold', type=int, default=127, help='Threshold value for binary conversion (0-255)')
+    parser.add_argument('--min-length', type=int, default=None, help='Minimum length of contours to include (100 for basic, 50 otherwise)')
+    parser.add_argument('--width', type=int, default=600, help='Width of the SVG viewBox')
+    parser.add_argument('--height', type=int, default=420, help='Height of the SVG viewBox')
+    parser.add_argument('--no-smooth', action='store_true', help='Disable image smoothing')
+    parser.add_argument('--no-bezier', action='store_true', help='Disable bezier curves')
+    parser.add_argument('--bezier-smoothing', type=float, default=0.25, help='Bezier curve smoothing factor (0-1)')
+    parser.add_argument('--no-simplify', action='store_true', help='Disable contour simplification')
+    parser.add_argument('--fit-error', type=float, default=None, help='Fit the raw contours with least-squares cubic curves within this many pixels (advanced and color modes)')
+    parser.add_argument('--min-area', type=int, default=0, help='Drop connected components of fewer pixels before tracing')
+    parser.add_argument('--min-extent', type=int, default=0, help='Drop connected components whose bounding box is shorter than this many pixels on both sides before tracing')
+    parser.add_argument('--pyramid', type=int, nargs='?', const=2, default=None, metavar='LEVELS', help='Trace coarse to fine, halving the image LEVELS times (default 2) for the coarse pass (basic and advanced modes)')
+    parser.add_argument('--fit-viewbox', action='store_true', help='Resize images to fit the viewBox before tracing (basic and advanced modes)')
+    parser.add_argument('--fast-decode', action='store_true', help='Decode JPEGs straight to grayscale, and shrunk while decoding with --fit-viewbox (basic and advanced modes)')
+    parser.add_argument('--edge-detection', action='store_true', help='Use edge detection preprocessing (advanced mode)')
+    parser.add_argument('--centerline', action='store_true', help='Trace the centerline of every stroke as an open path instead of its outline (advanced and color modes)')
+    parser.add_argument('--estimate-width', action='store_true', help='With --centerline, draw each SVG with the median measured stroke width (advanced and color modes)')
+    parser.add_argument('--color', type=str, default='blue', help='Color to extract (color mode)')
+    parser.add_argument('--stroke-color', type=str, default=None, help='Stroke color for the SVG path')
+    parser.add_argument('--stroke-width', type=int, default=3, help='Stroke width for the SVG path')
+    parser.add_argument('--join-paths', type=float, nargs='?', const=DEFAULT_TOLERANCE, default=None, metavar='PX', help=f'Order the contours by pen travel and join those starting within PX pixels (default {DEFAULT_TOLERANCE:g}) of where the previous one ended')
+    parser.add_argument('--compact', action='store_true', help='Write compact path data')
+    parser.add_argument('--precision', type=int, default=2, help='Decimal places kept with --compact')
+    parser.add_argument('--lengths', action='store_true', help='Write path lengths into the SVGs (pathLength and data-length)')
+    parser.add_argument('--split-paths', action='store_true', help='Write one <path> per contour with its length and offset along the drawing')
+
+def options_from_args(args):
+    """
+    Build the converter options dict from parsed converter arguments.
+    """
+    return {
+        'threshold': args.threshold,
+        'min_length': args.min_length if args.min_length is not None else (100 if args.mode == 'basic' else 50),
+        'width': args.width,
+        'height': args.height,
+        'smooth': not args.no_smooth,
+        'bezier': not args.no_bezier,
+        'bezier_smoothing': args.bezier_smoothing,
+        'simplify': not args.no_simplify,
+        'fit_error': args.fit_error,
+        'min_area': args.min_area,
+        'min_extent': args.min_extent,
+        'pyramid': args.pyramid,
+        'fit_viewbox': args.fit_viewbox,
+        'fast_decode': args.fast_decode,
+        'edge_detection': args.edge_detection,
+        'centerline': args.centerline,
+        'estimate_width': args.estimate_width,
+        'color': args.color,
+        'stroke_color': args.stroke_color,
+        'stroke_width': args.stroke_width,
+        'join_paths': args.join_paths,
+        'compact': args.compact,
+        'precision': args.precision,
+        'lengths': args.lengths,
+        'split_paths': args.split_paths,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert many images to SVG paths in parallel')
+    parser.add_argument('inputs', nargs='*', help='Image files, directories or glob patterns')
+    parser.add_argument('--manifest', type=str, default=None, help='Text file listing one image path per line')
+    parser.add_argument('--recursive', action='store_true', help='Descend into subdirectories and expand ** in globs')
+    parser.add_argument('--output-dir', type=str, default=None, help='Directory for the SVG files (defaults to next to each image)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes, or tracing threads with --pipeline (defaults to the number of cores)')
+    parser.add_argument('--cv-threads', type=int, default=1, help='OpenCV threads per worker process')
+    parser.add_argument('--pipeline', action='store_true', help='Convert in this process, decoding, tracing and writing on separate threads instead of worker processes')
+    parser.add_argument('--decode-threads', type=int, default=1, help='Threads decoding images with --pipeline')
+    parser.add_argument('--write-threads', type=int, default=1, help='Threads writing SVG files with --pipeline')
+    parser.add_argument('--queue-depth', type=int, default=4, help='Images waiting in front of each --pipeline stage at most')
+    add_converter_arguments(parser)
+    parser.add_argument('--cache', action='store_true', help='Reuse results of earlier identical conversions (stored in $SVGTRACE_CACHE_DIR or ~/.cache/svgtrace)')
+    parser.add_argument('--cache-dir', type=str, default=None, help='Cache directory (implies --cache)')
+    parser.add_argument('--cache-size', type=int, default=256, help='Maximum cache size on disk in MB')
+
+    args = parser.parse_args()
+
+    inputs = collect_inputs(args.inputs, args.manifest, args.recursive)
+    if not inputs:
+        parser.error("no input images found")
+
+    options = options_from_args(args)
+
+    # Tell apart images that would be written to the same SVG before converting any
+    try:
+        outputs = plan_outputs(inputs, args.output_dir, input_roots(args.inputs, args.manifest))
+    except ValueError as e:
+        parser.error(str(e))
+
+    workers = args.workers or os.cpu_count() or 1
+    # Workers need a concrete directory, so resolve the default here
+    cache_dir = None
+    if args.cache or args.cache_dir:
+        from svgtrace.cache import ResultCache
+        cache_dir = ResultCache(args.cache_dir).directory
+
+    if args.pipeline:
+        # The converters report progress on stdout, from every tracing thread at once
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            results, wall_time, executor = run_pipelined(args.mode, inputs, options, args.output_dir, args.decode_threads, workers, args.write_threads,
+                                                         args.queue_depth, args.cv_threads, cache_dir, args.cache_size * 1024 * 1024, outputs)
+        print_summary(results, wall_time, workers, 'tracing threads')
+        print(executor.summary())
+    else:
+        results, wall_time = run_batch(args.mode, inputs, options, args.output_dir, workers, args.cv_threads, cache_dir, args.cache_size * 1024 * 1024, outputs)
+        print_summary(results, wall_time, workers)
+
+    if any(error for _, _, _, _, error in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compare batch throughput of a sequential loop, worker processes and the threaded pipeline.
+
+A set of synthetic images is written to a temporary directory as PNG
+files and converted three times: one image after another in this
+process, with batch_convert's process pool and with its pipelined
+executor, where decoding, tracing and writing run on their own threads.
+Throughput is reported against the sequential loop, and all three must
+write the same SVG files.
+
+Usage:
+    python benchmarks/bench_batch.py [--kinds wavy scan] [--size 2k] [--count 8] [--workers 2] [--decode-threads 1] [--queue-depth 4]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import batch_convert
+from synthetic import make_image
+
+def write_images(directory, kinds, size, count):
+    """
+    Write `count` PNG images of every kind, each drawn with its own seed.
+    """
+    paths = []
+    for kind in kinds:
+        for seed in range(count):
+            path = Path(directory) / f'{kind}-{seed}.png'
+            cv2.imwrite(str(path), make_image(kind, size, seed))
+            paths.append(path)
+    return paths
+
+def run_sequential(mode, inputs, options, output_dir):
+    """
+    Convert the images one after another in this process.
+    """
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for path in inputs:
+            batch_convert.run_converter(mode, str(path), str(batch_convert.output_path_for(path, output_dir)), options)
+    return time.perf_counter() - start
+
+def read_outputs(output_dir):
+    """
+    Contents of the SVG files in a directory, by name.
+    """
+    return {p.name: p.read_bytes() for p in sorted(Path(output_dir).glob('*.svg'))}
+
+def batch_convert_args(mode):
+    """
+    Default batch_convert converter arguments for a mode.
+    """
+    parser = argparse.ArgumentParser()
+    batch_convert.add_converter_arguments(parser)
+    return parser.parse_args(['--mode', mode])
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sequential, process pool and pipelined batch conversion')
+    parser.add_argument('--kinds', nargs='+', default=['wavy', 'scan'], help='Synthetic image kinds (wavy, noise, color, scan, page)')
+    parser.add_argument('--size', default='2k', help='Image size (1k, 2k, 4k, 8k, 16k)')
+    parser.add_argument('--count', type=int, default=8, help='Images of every kind')
+    parser.add_argument('--mode', choices=['basic', 'advanced', 'color'], default='advanced', help='Converter to use')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes and tracing threads (defaults to the number of cores)')
+    parser.add_argument('--decode-threads', type=int, default=1, help='Threads decoding images in the pipeline')
+    parser.add_argument('--write-threads', type=int, default=1, help='Threads writing SVG files in the pipeline')
+    parser.add_argument('--queue-depth', type=int, default=4, help='Images waiting in front of each pipeline stage at most')
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+    cv2.setNumThreads(1)
+    options = batch_convert.options_from_args(batch_convert_args(args.mode))
+
+    with tempfile.TemporaryDirectory(prefix='svgtrace-bench-') as workdir:
+        inputs = write_images(workdir, args.kinds, args.size, args.count)
+
+        sequential_time = run_sequential(args.mode, inputs, options, Path(workdir) / 'sequential')
+        _, pool_time = batch_convert.run_batch(args.mode, inputs, options, Path(workdir) / 'pool', workers)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, pipeline_time, executor = batch_convert.run_pipelined(args.mode, inputs, options, Path(workdir) / 'pipeline', args.decode_threads, workers,
+                                                                     args.write_threads, args.queue_depth)
+
+        expected = read_outputs(Path(workdir) / 'sequential')
+        for name in ('pool', 'pipeline'):
+            if read_outputs(Path(workdir) / name) != expected:
+                raise SystemExit(f"The {name} run wrote different SVG files than the sequential run")
+
+    print(f"{len(inputs)} {args.size} images ({', '.join(args.kinds)}), {args.mode} mode, {os.cpu_count()} cores")
+    print(f"{'run':<34} {'seconds':>8} {'files/s':>8} {'speedup':>8}")
+    for name, seconds in (('sequential', sequential_time),
+                          (f'process pool ({workers} workers)', pool_time),
+                          (f'pipeline ({args.decode_threads}+{workers}+{args.write_threads} threads)', pipeline_time)):
+        print(f"{name:<34} {seconds:>8.2f} {len(inputs) / seconds:>8.2f} {sequential_time / seconds:>7.2f}x")
+    print(executor.summary())
+
+if __name__ == "__main__":
+    main()
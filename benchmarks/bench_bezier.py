@@ -0,0 +1,78 @@
+"""
+Benchmark batched bezier control points against the original per-vertex loop.
+
+Every timed path string is compared against the reference
+implementation; tests/test_bezier.py checks the control points too.
+
+Usage:
+    python benchmarks/bench_bezier.py [--points 1000 10000 100000]
+"""
+import argparse
+import math
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from svgtrace.bezier import bezier_path, bezier_paths
+from bench_serialize import best_of, make_contours
+
+def reference_control_points(points, smoothing=0.25):
+    """
+    Control points as computed by the original `points_to_bezier` loop.
+    """
+    c1, c2, end = [], [], []
+    for i in range(1, len(points) - 1):
+        p0, p1, p2 = points[i - 1], points[i], points[i + 1]
+        d1 = math.sqrt((p1[0] - p0[0]) ** 2 + (p1[1] - p0[1]) ** 2)
+        d2 = math.sqrt((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2)
+        d1_smooth = d1 * smoothing
+        d2_smooth = d2 * smoothing
+        v1x, v1y = ((p1[0] - p0[0]) / d1, (p1[1] - p0[1]) / d1) if d1 > 0 else (0, 0)
+        v2x, v2y = ((p2[0] - p1[0]) / d2, (p2[1] - p1[1]) / d2) if d2 > 0 else (0, 0)
+        c1.append((p1[0] - v1x * d1_smooth, p1[1] - v1y * d1_smooth))
+        c2.append((p1[0] + v2x * d2_smooth, p1[1] + v2y * d2_smooth))
+        end.append((p2[0], p2[1]))
+    return c1, c2, end
+
+def reference_path(contours, smoothing=0.25):
+    """
+    Path data as built by the original `points_to_bezier` loop.
+    """
+    svg_path_data = ""
+    for contour in contours:
+        points = [point[0] for point in contour]
+        c1, c2, end = reference_control_points(points, smoothing)
+        path = f"M{points[0][0]},{points[0][1]}"
+        for i in range(len(end)):
+            if i == 0:
+                path += f" C{c1[i][0]},{c1[i][1]} {c2[i][0]},{c2[i][1]} {end[i][0]},{end[i][1]}"
+            else:
+                path += f" S{c2[i][0]},{c2[i][1]} {end[i][0]},{end[i][1]}"
+        svg_path_data += path
+    return svg_path_data
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bezier control point computation')
+    parser.add_argument('--points', type=int, nargs='+', default=[1000, 10000, 100000], help='Total point counts to benchmark')
+    parser.add_argument('--smoothing', type=float, default=0.25, help='Bezier curve smoothing factor (0-1)')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    per_contour = lambda contours: "".join(bezier_path(c, args.smoothing) for c in contours)
+    batched = lambda contours: bezier_paths(contours, args.smoothing)
+
+    print(f"{'points':>10} {'reference (s)':>14} {'per-contour (s)':>16} {'batched (s)':>12} {'speedup':>8}")
+    for total in args.points:
+        contours = make_contours(total)
+        ref_time, ref_out = best_of(lambda c: reference_path(c, args.smoothing), contours, args.repeat)
+        one_time, one_out = best_of(per_contour, contours, args.repeat)
+        batch_time, batch_out = best_of(batched, contours, args.repeat)
+
+        if not ref_out == one_out == batch_out:
+            raise SystemExit(f"Output mismatch at {total} points")
+
+        print(f"{total:>10} {ref_time:>14.4f} {one_time:>16.4f} {batch_time:>12.4f} {ref_time / batch_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Measure centerline tracing against outline tracing.
+
+Every synthetic image is thresholded once; its mask is then traced into
+outlines (findContours) and into centerlines (CenterlineTracer). The
+table gives each mode's tracing time, its number of paths, its vertices
+and path data size after the default simplification, and its cubic
+segments and path data size when fitted within --fit-error pixels. The
+fitted sizes compare the two at the same absolute tolerance; the default
+simplification's epsilon is relative to each path's length (at least a
+pixel for centerlines), and the outline of a whole network of crossing
+strokes is much longer than any one of its branches.
+
+Centerline steps must all be between 8-connected pixels.
+
+Usage:
+    python benchmarks/bench_centerline.py [--kinds wavy scan color broken] [--sizes 2k 4k] [--fit-error 1]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_serialize import best_of
+from svgtrace.fit import CurveFitter
+from svgtrace.pipeline import find_contours, iter_path_data, simplify_contour, threshold_image, to_gray
+from svgtrace.skeleton import CenterlineTracer
+from synthetic import make_image
+
+def connected(polylines):
+    """
+    Whether every step of every polyline moves to one of the 8 neighbouring pixels.
+    """
+    steps = np.abs(np.diff(polylines.points[:, 0], axis=0)).max(axis=1)
+    inside = np.ones(len(steps), dtype=bool)
+    inside[polylines.offsets[1:-1] - 1] = False
+    return bool(np.all(steps[inside] == 1))
+
+def measure(contours, closed, fit_error):
+    """
+    Vertices and path bytes after simplification, and segments and path bytes when fitted.
+    """
+    lengths = contours.perimeters if closed else contours.lengths
+    vertices = sum(len(simplify_contour(c, perimeter=p, closed=closed)) for c, p in zip(contours, lengths.tolist()))
+    path_bytes = sum(len(d) for d in iter_path_data(contours, closed=closed))
+    fitter = CurveFitter(fit_error)
+    fitted_bytes = sum(len(d) for d in iter_path_data(contours, fitter=fitter, closed=closed))
+    return vertices, path_bytes, fitter.segments, fitted_bytes
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark centerline tracing against outline tracing')
+    parser.add_argument('--kinds', nargs='+', default=['wavy', 'scan', 'color', 'broken'], help='Synthetic image kinds (wavy, noise, color, scan, broken, page)')
+    parser.add_argument('--sizes', nargs='+', default=['2k', '4k'], help='Image sizes (1k, 2k, 4k, 8k, 16k)')
+    parser.add_argument('--min-length', type=int, default=50, help='Minimum length of contours to include')
+    parser.add_argument('--fit-error', type=float, default=1.0, help='Curve fitting tolerance in pixels')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'scenario':<12} {'mode':<11} {'time':>9} {'paths':>7} {'vertices':>9} {'path':>9} {'segments':>9} {'fitted':>9}")
+    for size in args.sizes:
+        for kind in args.kinds:
+            binary = threshold_image(to_gray(make_image(kind, size)))
+            outline_seconds, outlines = best_of(lambda b: find_contours(b, args.min_length), binary, args.repeat)
+            centerline_seconds, centerlines = best_of(lambda b: CenterlineTracer().trace(b, args.min_length), binary, args.repeat)
+            if centerlines and not connected(centerlines):
+                raise SystemExit(f"Centerlines of {kind}-{size} step over pixels")
+
+            scenario = f"{kind}-{size}"
+            for mode, seconds, contours, closed in (('outline', outline_seconds, outlines, True),
+                                                    ('centerline', centerline_seconds, centerlines, False)):
+                vertices, path_bytes, segments, fitted_bytes = measure(contours, closed, args.fit_error)
+                print(f"{scenario:<12} {mode:<11} {seconds * 1000:>7.1f}ms {len(contours):>7} {vertices:>9} {path_bytes:>9} {segments:>9} {fitted_bytes:>9}")
+    print(f"(vertices and path: default simplification and bezier curves; segments and fitted: --fit-error {args.fit_error:g})")
+
+if __name__ == "__main__":
+    main()
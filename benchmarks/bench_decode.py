@@ -0,0 +1,81 @@
+"""
+Compare the decode modes of svgtrace.decode on JPEG images.
+
+Every image is decoded the way the converters do by default (BGR, then
+cvtColor), straight to grayscale, and shrunk while decoding to the
+largest reduction that still covers a viewBox. The best time of each
+mode is reported with the bytes it allocates (traced with tracemalloc)
+and, for the full-size grayscale decode, the share of pixels whose
+threshold mask differs from the default decode's.
+
+Usage:
+    python benchmarks/bench_decode.py [--images imgs/us.jpeg] [--sizes 4k 8k] [--viewbox 600 420]
+"""
+import argparse
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_serialize import best_of
+from svgtrace.decode import decode, decode_flags, decode_mode
+from svgtrace.pipeline import threshold_image, to_gray
+from synthetic import make_image
+
+def decode_gray(path, mode):
+    """
+    Decode an image with a mode and convert what comes out to grayscale.
+    """
+    return to_gray(decode(path, decode_flags(mode)))
+
+def allocated_bytes(path, mode):
+    """
+    Peak bytes allocated while decoding and converting to grayscale.
+    """
+    tracemalloc.start()
+    try:
+        decode_gray(path, mode)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark full, grayscale and reduced JPEG decoding')
+    parser.add_argument('--images', nargs='*', default=[str(Path(__file__).resolve().parent.parent / 'imgs' / 'us.jpeg')], help='JPEG images to decode')
+    parser.add_argument('--sizes', nargs='*', default=['4k', '8k'], help='Sizes of synthetic scans saved as JPEG (1k, 2k, 4k, 8k, 16k)')
+    parser.add_argument('--viewbox', type=int, nargs=2, default=[600, 420], metavar=('WIDTH', 'HEIGHT'), help='viewBox the reduced decode must cover')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='svgtrace-bench-') as workdir:
+        images = [Path(p) for p in args.images]
+        for size in args.sizes:
+            path = Path(workdir) / f'scan-{size}.jpg'
+            cv2.imwrite(str(path), make_image('scan', size), [cv2.IMWRITE_JPEG_QUALITY, 90])
+            images.append(path)
+
+        print(f"{'image':<16} {'mode':<8} {'size':>11} {'time':>9} {'allocated':>10} {'speedup':>8} {'mask diff':>10}")
+        for path in images:
+            reference = None
+            base_time = None
+            for mode in ('color', 'gray', decode_mode(path, fit_size=args.viewbox)):
+                seconds, gray = best_of(lambda p: decode_gray(p, mode), path, args.repeat)
+                allocated = allocated_bytes(path, mode)
+                if reference is None:
+                    reference, base_time = gray, seconds
+
+                # Only full-size results can be compared pixel by pixel
+                diff = ""
+                if gray.shape == reference.shape:
+                    diff = f"{np.count_nonzero(threshold_image(gray) != threshold_image(reference)) / gray.size:.3%}"
+                size = f"{gray.shape[1]}x{gray.shape[0]}"
+                print(f"{path.name:<16} {mode:<8} {size:>11} {seconds * 1000:>7.1f}ms {allocated / 1024 / 1024:>8.1f}MB {base_time / seconds:>7.1f}x {diff:>10}")
+    print(f"(the reduced mode is the largest JPEG reduction that still covers a {args.viewbox[0]}x{args.viewbox[1]} viewBox)")
+
+if __name__ == "__main__":
+    main()
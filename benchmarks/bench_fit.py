@@ -0,0 +1,139 @@
+"""
+Compare least-squares curve fitting with one bezier segment per simplified vertex.
+
+For every image, the contours are converted both ways and each result is
+scored by its segment count, path data size and maximum deviation: the
+largest distance from a traced contour point to the drawn curve, measured
+on a 4x supersampled distance transform of the rendered path. The vertex
+approach is also run with finer simplification until it is as accurate
+as the fit, to compare segment counts at the same fidelity.
+
+Usage:
+    python benchmarks/bench_fit.py [--images drawing.png ...] [--errors 1 2 3]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from svgtrace.bezier import bezier_control_points, bezier_path
+from svgtrace.fit import fit_contour, curves_to_path
+from svgtrace.pipeline import find_contours, threshold_image, to_gray
+from synthetic import make_image
+
+# Supersampling of the deviation measurement
+SCALE = 4
+
+# Simplification factors tried, coarsest first, to match the fit's accuracy
+EPSILON_FACTORS = [0.0025, 0.0015, 0.001, 0.0005, 0.00025, 0.0001, 0.0]
+
+def sample_curves(segments, samples=32):
+    """
+    Points along a chain of cubic segments, shape (K * samples, 2).
+    """
+    t = np.linspace(0, 1, samples)[:, None]
+    s = 1 - t
+    return np.concatenate([s ** 3 * p0 + 3 * s * s * t * p1 + 3 * s * t * t * p2 + t ** 3 * p3 for p0, p1, p2, p3 in segments])
+
+def max_deviation(contours, curves, shape):
+    """
+    Largest distance from any contour point to the drawn curves.
+
+    Args:
+        contours: Traced contours
+        curves: Sampled points of each contour's curve, one array per contour
+        shape: Image shape
+    """
+    canvas = np.full((shape[0] * SCALE + 2 * SCALE, shape[1] * SCALE + 2 * SCALE), 255, dtype=np.uint8)
+    pad = SCALE
+    for points in curves:
+        if len(points):
+            cv2.polylines(canvas, [np.round(points * SCALE + pad).astype(np.int32)], False, 0, 1)
+    distance = cv2.distanceTransform(canvas, cv2.DIST_L2, 5)
+
+    raw = np.concatenate([c.reshape(-1, 2) for c in contours])
+    raw = np.round(raw * SCALE + pad).astype(np.intp)
+    return float(distance[raw[:, 1], raw[:, 0]].max()) / SCALE
+
+def vertex_beziers(contours, epsilon_factor, smoothing=0.25):
+    """
+    The converters' default curves: one segment per vertex after Douglas-Peucker.
+
+    Returns:
+        Tuple of (segment count, path data, sampled points per contour)
+    """
+    count = 0
+    path_data = []
+    curves = []
+    for contour in contours:
+        points = contour
+        if epsilon_factor:
+            points = cv2.approxPolyDP(contour, epsilon_factor * cv2.arcLength(contour, True), True)
+        points = points.reshape(-1, 2).astype(np.float64)
+        path_data.append(bezier_path(points, smoothing))
+        if len(points) > 2:
+            c1, c2, end = bezier_control_points(points, smoothing)
+            starts = np.concatenate((points[:1], end[:-1]))
+            segments = np.stack((starts, c1, c2, end), axis=1)
+            curves.append(sample_curves(segments))
+            count += len(segments)
+        else:
+            curves.append(points)
+            count += len(points) - 1
+    return count, "".join(path_data), curves
+
+def fitted_curves(contours, max_error):
+    """
+    Least-squares fitted curves.
+
+    Returns:
+        Tuple of (segment count, path data, sampled points per contour, seconds)
+    """
+    start = time.perf_counter()
+    fits = [fit_contour(contour, max_error)[0] for contour in contours]
+    seconds = time.perf_counter() - start
+    path_data = "".join(curves_to_path(segments) for segments in fits)
+    curves = [sample_curves(segments) if len(segments) else contour.reshape(-1, 2) for segments, contour in zip(fits, contours)]
+    return sum(len(segments) for segments in fits), path_data, curves, seconds
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark least-squares curve fitting')
+    parser.add_argument('--images', nargs='+', default=None, help='Images to trace (defaults to a synthetic drawing)')
+    parser.add_argument('--size', type=str, default='1k', help='Size of the synthetic drawing (1k, 2k, 4k, ...)')
+    parser.add_argument('--errors', type=float, nargs='+', default=[1.0, 2.0, 3.0], help='Fit errors in pixels')
+    parser.add_argument('--threshold', type=int, default=127, help='Threshold value for binary conversion (0-255)')
+    parser.add_argument('--min-length', type=int, default=50, help='Minimum length of contours to include')
+    args = parser.parse_args()
+
+    images = {path: cv2.imread(path) for path in args.images} if args.images else {f'wavy-{args.size}': make_image('wavy', args.size)}
+
+    for name, img in images.items():
+        contours = find_contours(threshold_image(to_gray(img), args.threshold), args.min_length)
+        points = sum(len(c) for c in contours)
+        print(f"{name}: {len(contours)} contours, {points} points")
+
+        segments, path_data, curves = vertex_beziers(contours, EPSILON_FACTORS[0])
+        default_deviation = max_deviation(contours, curves, img.shape)
+        print(f"  per-vertex (default):   {segments:>6} segments {len(path_data):>8} bytes  max deviation {default_deviation:.2f}px")
+
+        for max_error in args.errors:
+            segments, path_data, curves, seconds = fitted_curves(contours, max_error)
+            deviation = max_deviation(contours, curves, img.shape)
+            print(f"  fit {max_error:g}px:             {segments:>6} segments {len(path_data):>8} bytes  max deviation {deviation:.2f}px  ({seconds * 1000:.0f}ms)")
+
+            # The per-vertex curves at the same accuracy
+            for epsilon_factor in EPSILON_FACTORS:
+                vertex_segments, vertex_data, vertex_curves = vertex_beziers(contours, epsilon_factor)
+                vertex_deviation = max_deviation(contours, vertex_curves, img.shape)
+                if vertex_deviation <= deviation:
+                    break
+            print(f"    per-vertex, eps {epsilon_factor:g}: {vertex_segments:>6} segments {len(vertex_data):>8} bytes  max deviation {vertex_deviation:.2f}px  "
+                  f"-> fit uses {vertex_segments / max(segments, 1):.1f}x fewer segments")
+
+if __name__ == "__main__":
+    main()
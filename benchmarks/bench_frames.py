@@ -0,0 +1,66 @@
+"""
+Compare tracing every frame of an animation in full with FrameTracer's contour reuse.
+
+Each scenario is a list of frames: the frames of an animated file such
+as imgs/confetti.gif, or synthetic frames of a ball rolling across a
+still image. Both tracers run over all frames, converting the contours
+to path data, and the best times are compared along with the share of
+the pixels traced and the contours reused. Every frame's path data must
+be identical to tracing that frame on its own.
+
+Usage:
+    python benchmarks/bench_frames.py [--kinds page scan] [--size 2k] [--count 24] [--files imgs/confetti.gif]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_serialize import best_of
+from svgtrace.frames import TILE, FrameTracer, iter_frames
+from svgtrace.pipeline import contours_to_path_data, find_contours, threshold_image, to_gray
+from synthetic import animation_frames
+
+def trace_all(frames, reuse, tile):
+    """
+    Trace all frames with a new FrameTracer.
+
+    Returns:
+        Tuple of (FrameTracer, path data of every frame)
+    """
+    tracer = FrameTracer(reuse=reuse, tile=tile)
+    return tracer, ["".join(tracer.trace(frame)[1]) for frame in frames]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark contour reuse between animation frames')
+    parser.add_argument('--kinds', nargs='+', default=['page', 'scan'], help='Synthetic still image kinds the ball rolls across (wavy, noise, color, scan, page)')
+    parser.add_argument('--size', default='2k', help='Synthetic frame size (1k, 2k, 4k, 8k, 16k)')
+    parser.add_argument('--count', type=int, default=24, help='Synthetic frames per scenario')
+    parser.add_argument('--files', nargs='*', default=[str(Path(__file__).resolve().parent.parent / 'imgs' / 'confetti.gif')],
+                        help='Animated images, videos or frame directories to trace as well')
+    parser.add_argument('--tile', type=int, default=TILE, help='Side in pixels of the tiles frames are compared in')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    scenarios = [(f'{kind}-{args.size}', animation_frames(kind, args.size, args.count)) for kind in args.kinds]
+    scenarios += [(Path(f).name, [frame for frame, _ in iter_frames(f)]) for f in args.files]
+
+    print(f"{'scenario':<16} {'frames':>6} {'traced':>7} {'reused':>7} {'full':>9} {'reuse':>9} {'speedup':>8}")
+    for name, frames in scenarios:
+        full_time, (_, expected) = best_of(lambda f: trace_all(f, False, args.tile), frames, args.repeat)
+        reuse_time, (tracer, paths) = best_of(lambda f: trace_all(f, True, args.tile), frames, args.repeat)
+
+        # Both must match tracing each frame on its own
+        for k, frame in enumerate(frames):
+            own = contours_to_path_data(find_contours(threshold_image(to_gray(frame))))
+            if paths[k] != own or expected[k] != own:
+                raise SystemExit(f"Frame {k} of {name} differs from tracing it on its own")
+
+        traced = tracer.traced_pixels / (len(frames) * frames[0].shape[0] * frames[0].shape[1])
+        reused = tracer.reused / max(tracer.reused + tracer.converted, 1)
+        print(f"{name:<16} {len(frames):>6} {traced:>6.0%} {reused:>6.0%} {full_time * 1000:>7.0f}ms {reuse_time * 1000:>7.0f}ms {full_time / reuse_time:>7.1f}x")
+    print("('traced' is the share of the pixels traced again, 'reused' the share of contours carried over with their path data)")
+
+if __name__ == "__main__":
+    main()
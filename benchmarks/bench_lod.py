@@ -0,0 +1,92 @@
+"""
+Compare simplifying every level of detail with approxPolyDP to cutting a SimplificationIndex.
+
+For every synthetic image the contours are simplified at each level,
+once by calling approxPolyDP per contour and level and once by building
+an index for the finest level and cutting it at every level. The best
+times of both are compared along with each level's vertex counts; no
+traced point may be farther than its level's epsilon from the line of
+its simplified segment.
+
+Usage:
+    python benchmarks/bench_lod.py [--kinds wavy noise color] [--sizes 1k 4k] [--levels 0.01 0.005 0.0025]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_serialize import best_of
+from svgtrace.pipeline import find_contours, threshold_image, to_gray
+from svgtrace.simplify import SimplificationIndex
+from synthetic import make_image
+
+def per_level(contours, levels):
+    """
+    Simplify the contours from scratch at every level, as the converters do for one level.
+    """
+    perimeters = contours.perimeters.tolist()
+    return [[cv2.approxPolyDP(c, factor * p, True) for c, p in zip(contours, perimeters)] for factor in levels]
+
+def indexed(contours, levels):
+    """
+    Build one index for the finest level and cut it at every level.
+    """
+    index = SimplificationIndex(contours, min(levels))
+    return index, [index.simplify(factor) for factor in levels]
+
+def max_deviation(index, epsilon_factor):
+    """
+    Largest distance of a traced point from the line of its simplified segment, in epsilons.
+    """
+    vertices, keep = index.vertices, index.kept(epsilon_factor)
+    worst = 0.0
+    for k, perimeter in enumerate(index.perimeters.tolist()):
+        lo, hi = vertices.offsets[k], vertices.offsets[k + 1]
+        points = vertices.points[lo:hi, 0].astype(np.float64)
+        kept = np.flatnonzero(keep[lo:hi])
+
+        # Each point lies on the segment from the last kept vertex before it, cyclically
+        segment = np.searchsorted(kept, np.arange(len(points)), 'right') - 1
+        start, end = points[kept[segment]], points[kept[(segment + 1) % len(kept)]]
+        direction = end - start
+        norm = np.hypot(direction[:, 0], direction[:, 1])
+        offset = points - start
+        distance = np.hypot(offset[:, 0], offset[:, 1])
+        lined = norm > 0
+        distance[lined] = np.abs(offset[lined, 1] * direction[lined, 0] - offset[lined, 0] * direction[lined, 1]) / norm[lined]
+        worst = max(worst, distance.max() / (epsilon_factor * perimeter))
+    return worst
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark levels of detail from a simplification index')
+    parser.add_argument('--kinds', nargs='+', default=['wavy', 'noise', 'color'], help='Synthetic image kinds (wavy, noise, color)')
+    parser.add_argument('--sizes', nargs='+', default=['1k', '4k'], help='Image sizes (1k, 2k, 4k, 8k, 16k)')
+    parser.add_argument('--levels', type=float, nargs='+', default=[0.01, 0.005, 0.0025], help='Simplification factors of the levels')
+    parser.add_argument('--min-length', type=int, default=50, help='Minimum length of contours to include')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'scenario':<10} {'contours':>8} {'vertices per level (approxPolyDP -> index)':<44} {'approxPolyDP':>12} {'index':>9} {'speedup':>8}")
+    for kind in args.kinds:
+        for size in args.sizes:
+            contours = find_contours(threshold_image(to_gray(make_image(kind, size))), args.min_length)
+            contours.perimeters
+
+            ref_time, ref_levels = best_of(lambda c: per_level(c, args.levels), contours, args.repeat)
+            new_time, (index, new_levels) = best_of(lambda c: indexed(c, args.levels), contours, args.repeat)
+
+            for factor in args.levels:
+                if max_deviation(index, factor) > 1:
+                    raise SystemExit(f"Level {factor:g} of {kind}-{size} is farther than epsilon from the traced points")
+
+            counts = " ".join(f"{sum(map(len, a))}->{len(b.points)}" for a, b in zip(ref_levels, new_levels))
+            print(f"{kind + '-' + size:<10} {len(contours):>8} {counts:<44} {ref_time * 1000:>10.1f}ms {new_time * 1000:>7.1f}ms {ref_time / new_time:>7.1f}x")
+    print(f"(levels {', '.join(f'{factor:g}' for factor in args.levels)}; the index is built for the finest and cut at the others)")
+
+if __name__ == "__main__":
+    main()
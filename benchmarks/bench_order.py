@@ -0,0 +1,80 @@
+"""
+Measure ordering subpaths by pen travel and joining those that meet.
+
+Every synthetic image is traced once; its contours are then written in
+their traced (area) order and in the order PathPlanner gives them, with
+joining. The table compares the number of moves (M commands), the pen's
+travel between subpaths and the size of the path data, plain and with
+the compact encoding, and gives the planner's time. Planned contours
+must be the traced contours, some reversed.
+
+A second table times plan_order alone on random short fragments, to show
+how it grows with their number.
+
+Usage:
+    python benchmarks/bench_order.py [--kinds broken scan noise] [--size 2k] [--tolerance 6] [--fragments 10000 40000]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_serialize import best_of
+from svgtrace.encode import compact_path
+from svgtrace.order import PathPlanner, plan_order
+from svgtrace.pipeline import find_contours, iter_path_data, threshold_image, to_gray
+from synthetic import make_image
+
+def same_contours(traced, planned):
+    """
+    Whether planned holds the traced contours, each forwards or backwards.
+    """
+    def keys(contours):
+        return sorted(min(c.tobytes(), c[::-1].tobytes()) for c in contours)
+    return keys(traced) == keys(planned)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ordering subpaths by pen travel and joining them')
+    parser.add_argument('--kinds', nargs='+', default=['broken', 'scan', 'noise'], help='Synthetic image kinds (wavy, noise, color, scan, broken, page)')
+    parser.add_argument('--size', default='2k', help='Image size (1k, 2k, 4k, 8k, 16k)')
+    parser.add_argument('--min-length', type=int, default=10, help='Minimum length of contours to include')
+    parser.add_argument('--tolerance', type=float, default=6, help='Join tolerance in pixels')
+    parser.add_argument('--fragments', type=int, nargs='*', default=[10000, 40000, 160000], help='Numbers of random fragments to order')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'scenario':<12} {'order':<8} {'moves':>7} {'travel':>10} {'path':>10} {'compact':>10} {'time':>9}")
+    for kind in args.kinds:
+        contours = find_contours(threshold_image(to_gray(make_image(kind, args.size))), args.min_length)
+        planner = PathPlanner(args.tolerance)
+        seconds, planned = best_of(planner.plan, contours, args.repeat)
+        if not same_contours(contours, planned):
+            raise SystemExit(f"Planned contours differ from the traced ones for {kind}-{args.size}")
+
+        traced_data = "".join(iter_path_data(contours))
+        joined = PathPlanner(args.tolerance)
+        planned_data = "".join(joined.iter_join(iter_path_data(planned)))
+
+        scenario = f"{kind}-{args.size}"
+        travel_before = planner.travel_before / args.repeat
+        travel_after = planner.travel_after / args.repeat
+        print(f"{scenario:<12} {'area':<8} {len(contours):>7} {travel_before:>8.0f}px {len(traced_data):>10} {len(compact_path(traced_data)):>10} {'':>9}")
+        print(f"{scenario:<12} {'travel':<8} {len(contours) - joined.joined:>7} {travel_after:>8.0f}px {len(planned_data):>10} {len(compact_path(planned_data)):>10} {seconds * 1000:>7.1f}ms")
+    print(f"(subpaths starting within {args.tolerance:g}px of the previous one's end are joined; travel is the pen's distance between subpaths)")
+
+    print(f"\n{'fragments':>10} {'time':>10} {'per fragment':>13}")
+    rng = np.random.default_rng(0)
+    for count in args.fragments:
+        # Fragments a few pixels long, spread over an 8K page
+        starts = rng.uniform((0, 0), (7680, 4320), (count, 2))
+        ends = starts + rng.uniform(-4, 4, (count, 2))
+        seconds, (order, _) = best_of(lambda s: plan_order(s, ends), starts, args.repeat)
+        if len(np.unique(order)) != count:
+            raise SystemExit(f"plan_order lost fragments with {count} fragments")
+        print(f"{count:>10} {seconds * 1000:>8.0f}ms {seconds / count * 1e6:>11.1f}us")
+
+if __name__ == "__main__":
+    main()
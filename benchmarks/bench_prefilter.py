@@ -0,0 +1,62 @@
+"""
+Measure what the connected-component prefilter saves.
+
+For every synthetic image the mask is traced and converted to path data
+twice, once as is and once with small components dropped first, and the
+best times of both are compared along with the components dropped, the
+contours kept and the prefilter's own estimate of the time it saved.
+
+Usage:
+    python benchmarks/bench_prefilter.py [--kinds wavy noise color] [--sizes 1k 4k] [--min-area 50] [--min-extent 10]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_serialize import best_of
+from svgtrace.components import ComponentFilter
+from svgtrace.pipeline import contours_to_path_data, find_contours, threshold_image, to_gray
+from synthetic import make_image
+
+def convert(mask, min_length, prefilter=None):
+    """
+    Trace a mask and build its path data, as the advanced converter does.
+    """
+    contours = find_contours(mask, min_length, prefilter)
+    return len(contours), contours_to_path_data(contours)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the connected-component prefilter')
+    parser.add_argument('--kinds', nargs='+', default=['wavy', 'noise', 'color'], help='Synthetic image kinds (wavy, noise, color)')
+    parser.add_argument('--sizes', nargs='+', default=['1k', '4k'], help='Image sizes (1k, 2k, 4k, 8k, 16k)')
+    parser.add_argument('--min-area', type=int, default=50, help='Drop components of fewer pixels')
+    parser.add_argument('--min-extent', type=int, default=10, help='Drop components whose bounding box is shorter than this on both sides')
+    parser.add_argument('--min-length', type=int, default=50, help='Minimum length of contours to include')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'scenario':<10} {'components':>10} {'dropped':>8} {'contours':>15} {'bytes':>19} {'plain':>9} {'prefilter':>10} {'saved':>9} {'estimated':>10}")
+    for kind in args.kinds:
+        for size in args.sizes:
+            mask = threshold_image(to_gray(make_image(kind, size)), 127)
+
+            plain_time, (plain_count, plain_path) = best_of(lambda m: convert(m, args.min_length), mask, args.repeat)
+
+            # A fresh filter per run, so its totals describe one conversion
+            filters = []
+            def prefiltered(m):
+                filters.append(ComponentFilter(args.min_area, args.min_extent))
+                return convert(m, args.min_length, filters[-1])
+            filtered_time, (filtered_count, filtered_path) = best_of(prefiltered, mask, args.repeat)
+            prefilter = min(filters, key=lambda f: f.seconds + f.trace_seconds)
+
+            print(f"{kind + '-' + size:<10} {prefilter.components:>10} {prefilter.dropped:>8} {plain_count:>7} -> {filtered_count:<5} "
+                  f"{len(plain_path):>8} -> {len(filtered_path):<8} {plain_time * 1000:>7.1f}ms {filtered_time * 1000:>8.1f}ms "
+                  f"{(plain_time - filtered_time) * 1000:>7.1f}ms {prefilter.saved_seconds() * 1000:>8.1f}ms")
+    print(f"(dropping components with area < {args.min_area}px or extent < {args.min_extent}px; "
+          "'estimated' is the tracing time saved as the prefilter reports it)")
+
+if __name__ == "__main__":
+    main()
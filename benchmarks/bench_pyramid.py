@@ -0,0 +1,60 @@
+"""
+Compare tracing at full resolution with coarse-to-fine pyramid tracing.
+
+For every synthetic image the grayscale image is blurred, thresholded
+and traced once at full resolution and once with find_contours_pyramid,
+and the best times of both are compared along with the fraction of the
+image the pyramid refined at full resolution. Both must find the same
+contours.
+
+Usage:
+    python benchmarks/bench_pyramid.py [--kinds wavy noise scan page] [--sizes 4k 8k] [--levels 2]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_serialize import best_of
+from svgtrace.instrument import profiling
+from svgtrace.pipeline import find_contours, threshold_image, to_gray
+from svgtrace.pyramid import find_contours_pyramid
+from synthetic import make_image
+
+def refined_fraction(gray, min_length, levels):
+    """
+    Fraction of the image the pyramid thresholds and traces at full resolution.
+    """
+    with profiling() as profiler:
+        find_contours_pyramid(gray, min_contour_length=min_length, levels=levels)
+    return next(e['info']['traced'] for e in profiler.events if e['name'] == 'refine')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark coarse-to-fine pyramid tracing')
+    parser.add_argument('--kinds', nargs='+', default=['wavy', 'noise', 'scan', 'page'], help='Synthetic image kinds (wavy, noise, color, scan, page)')
+    parser.add_argument('--sizes', nargs='+', default=['4k', '8k'], help='Image sizes (1k, 2k, 4k, 8k, 16k)')
+    parser.add_argument('--levels', type=int, default=2, help='Number of times the image is halved for the coarse pass')
+    parser.add_argument('--min-length', type=int, default=50, help='Minimum length of contours to include')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'scenario':<10} {'contours':>8} {'refined':>8} {'full':>9} {'pyramid':>9} {'speedup':>8}")
+    for kind in args.kinds:
+        for size in args.sizes:
+            gray = to_gray(make_image(kind, size))
+
+            full_time, full = best_of(lambda g: find_contours(threshold_image(g), args.min_length), gray, args.repeat)
+            pyramid_time, pyramid = best_of(lambda g: find_contours_pyramid(g, min_contour_length=args.min_length, levels=args.levels), gray, args.repeat)
+
+            if len(full) != len(pyramid) or not np.array_equal(full.points, pyramid.points):
+                raise SystemExit(f"Pyramid contours differ from full resolution for {kind}-{size}")
+
+            refined = refined_fraction(gray, args.min_length, args.levels)
+            print(f"{kind + '-' + size:<10} {len(full):>8} {refined:>7.0%} {full_time * 1000:>7.1f}ms {pyramid_time * 1000:>7.1f}ms {full_time / pyramid_time:>7.1f}x")
+    print(f"(coarse pass at 1/{2 ** args.levels} scale; 'refined' is the share of the image thresholded and traced again at full resolution)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark the SVG path serializer against the original per-point f-string loop.
+
+Usage:
+    python benchmarks/bench_serialize.py [--points 1000 10000 100000 500000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from svgtrace.serialize import polylines_to_path
+
+def reference_path(contours):
+    """
+    The serializer the scripts used before `svgtrace.serialize` existed.
+    """
+    svg_path_data = ""
+    for contour in contours:
+        svg_path_data += f"M{contour[0][0][0]},{contour[0][0][1]}"
+        for point in contour[1:]:
+            x, y = point[0]
+            svg_path_data += f" L{x},{y}"
+    return svg_path_data
+
+def make_contours(total_points, points_per_contour=500, seed=0):
+    """
+    Build int32 OpenCV-style contours with `total_points` points in total.
+    """
+    rng = np.random.default_rng(seed)
+    contours = []
+    remaining = total_points
+    while remaining > 0:
+        n = min(points_per_contour, remaining)
+        contours.append(rng.integers(0, 20000, size=(n, 1, 2), dtype=np.int32))
+        remaining -= n
+    return contours
+
+def best_of(func, arg, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SVG path serialization')
+    parser.add_argument('--points', type=int, nargs='+', default=[1000, 10000, 100000, 500000], help='Total point counts to benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'points':>10} {'reference (s)':>14} {'serializer (s)':>15} {'speedup':>8}")
+    for total in args.points:
+        contours = make_contours(total)
+        ref_time, ref_out = best_of(reference_path, contours, args.repeat)
+        new_time, new_out = best_of(polylines_to_path, contours, args.repeat)
+
+        if ref_out != new_out:
+            raise SystemExit(f"Output mismatch at {total} points")
+
+        print(f"{total:>10} {ref_time:>14.4f} {new_time:>15.4f} {ref_time / new_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Time every stage of the conversion pipeline on synthetic images.
+
+Each scenario draws a deterministic image (see `synthetic.py`), writes it
+as a PNG and runs the pipeline stage by stage, timing each stage on the
+output of the previous one: decode, blur, mask (threshold, or HSV ranges
+for the multi-color drawing), findContours, filter/sort, simplify, bezier,
+serialize and write. The best of several repetitions is kept.
+
+Results are written as JSON. Passing an earlier result file as --baseline
+compares every stage against it and exits with status 1 when a stage got
+slower than --max-slowdown allows, so the script can gate CI.
+
+Usage:
+    python benchmarks/bench_stages.py [--kinds wavy noise color] [--sizes 1k 4k]
+        [--output results.json] [--baseline previous.json --max-slowdown 1.5]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_serialize import best_of
+from extract_colored_path import clean_mask, hsv_ranges
+from svgtrace.bezier import bezier_path
+from svgtrace.color import range_masks
+from svgtrace.contours import ContourSet
+from svgtrace.pipeline import read_image, simplify_contour, to_gray
+from svgtrace.serialize import polyline_to_path
+from svgtrace.svgwriter import write_svg
+from synthetic import STROKE_COLORS, make_image
+
+# Bump when stages are added or change what they measure
+RESULTS_VERSION = 1
+
+STAGES = ['decode', 'blur', 'mask', 'find_contours', 'filter_sort', 'simplify', 'bezier', 'serialize', 'write']
+
+def run_scenario(kind, size, repeat, workdir, threshold_value=127, min_contour_length=50):
+    """
+    Run the pipeline on one synthetic image, timing each stage.
+
+    Returns:
+        Dict with the image size, contour and vertex counts and per-stage seconds
+    """
+    img = make_image(kind, size)
+    image_path = Path(workdir) / f'{kind}-{size}.png'
+    cv2.imwrite(str(image_path), img)
+    del img
+
+    times = {}
+    times['decode'], img = best_of(read_image, image_path, repeat)
+
+    if kind == 'color':
+        # Blur the color image, then classify it into every color's HSV ranges
+        ranges = [r for color_name in STROKE_COLORS for r in hsv_ranges(color_name)]
+        times['blur'], blurred = best_of(lambda a: cv2.GaussianBlur(a, (5, 5), 0), img, repeat)
+        times['mask'], masks = best_of(
+            lambda a: [clean_mask(m) for m in range_masks(cv2.cvtColor(a, cv2.COLOR_BGR2HSV), ranges)],
+            blurred,
+            repeat
+        )
+    else:
+        times['blur'], blurred = best_of(lambda a: cv2.GaussianBlur(to_gray(a), (5, 5), 0), img, repeat)
+        times['mask'], mask = best_of(
+            lambda a: cv2.threshold(a, threshold_value, 255, cv2.THRESH_BINARY_INV)[1],
+            blurred,
+            repeat
+        )
+        masks = [mask]
+
+    times['find_contours'], contours = best_of(
+        lambda ms: [c for m in ms for c in cv2.findContours(m, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]],
+        masks,
+        repeat
+    )
+    times['filter_sort'], kept = best_of(lambda cs: ContourSet.from_contours(cs).filter_sort(min_contour_length), contours, repeat)
+    times['simplify'], simplified = best_of(
+        lambda cs: [simplify_contour(c, perimeter=p) for c, p in zip(cs, cs.perimeters.tolist())],
+        kept,
+        repeat
+    )
+    times['bezier'], path_data = best_of(
+        lambda cs: "".join(bezier_path(c, 0.25) if len(c) > 2 else polyline_to_path(c) for c in cs),
+        simplified,
+        repeat
+    )
+    times['serialize'], _ = best_of(lambda cs: "".join(polyline_to_path(c) for c in cs), simplified, repeat)
+
+    svg_path = Path(workdir) / f'{kind}-{size}.svg'
+    times['write'], _ = best_of(lambda p: write_svg(svg_path, p, img.shape[1], img.shape[0]), path_data, repeat)
+
+    return {
+        'width': img.shape[1],
+        'height': img.shape[0],
+        'contours': len(contours),
+        'kept_contours': len(kept),
+        'vertices': sum(len(c) for c in kept),
+        'simplified_vertices': sum(len(c) for c in simplified),
+        'path_bytes': len(path_data),
+        'stages': times,
+        'total': sum(times.values()),
+    }
+
+def environment():
+    """
+    Versions and machine details stored with the results.
+    """
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'opencv_threads': cv2.getNumThreads(),
+    }
+
+def compare(results, baseline, max_slowdown=1.5, min_seconds=0.005):
+    """
+    Find stages that got slower than allowed compared to a baseline run.
+
+    Stages faster than `min_seconds` in both runs are ignored, since their
+    timings are mostly noise.
+
+    Returns:
+        List of (scenario, stage, baseline seconds, seconds) regressions
+    """
+    regressions = []
+    for name, scenario in results['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            continue
+
+        if (old['kept_contours'], old['simplified_vertices']) != (scenario['kept_contours'], scenario['simplified_vertices']):
+            print(f"warning: {name} produced different contours than the baseline run")
+
+        for stage, seconds in scenario['stages'].items():
+            before = old['stages'].get(stage)
+            if before is None or max(before, seconds) < min_seconds:
+                continue
+            if seconds > before * max_slowdown:
+                regressions.append((name, stage, before, seconds))
+    return regressions
+
+def print_table(results, baseline=None):
+    """
+    Print per-stage milliseconds per scenario, with the change against a baseline.
+    """
+    print(f"{'scenario':<12} {'contours':>9} " + " ".join(f"{stage[:11]:>11}" for stage in STAGES) + f" {'total':>9}")
+    for name, scenario in results['scenarios'].items():
+        old = baseline['scenarios'].get(name) if baseline else None
+        cells = []
+        for stage in STAGES:
+            cell = f"{scenario['stages'][stage] * 1000:.1f}"
+            if old and old['stages'].get(stage):
+                cell += f"{scenario['stages'][stage] / old['stages'][stage] - 1:+.0%}"
+            cells.append(f"{cell:>11}")
+        print(f"{name:<12} {scenario['kept_contours']:>9} " + " ".join(cells) + f" {scenario['total'] * 1000:>9.1f}")
+    print("(milliseconds per stage" + (", change against the baseline)" if baseline else ")"))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark each stage of the conversion pipeline')
+    parser.add_argument('--kinds', nargs='+', default=['wavy', 'noise', 'color'], help='Synthetic image kinds (wavy, noise, color)')
+    parser.add_argument('--sizes', nargs='+', default=['1k', '4k'], help='Image sizes (1k, 2k, 4k, 8k, 16k)')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timing repetitions (best is reported)')
+    parser.add_argument('--output', type=str, default=None, help='Write the results to this JSON file')
+    parser.add_argument('--baseline', type=str, default=None, help='Earlier results JSON to compare against')
+    parser.add_argument('--max-slowdown', type=float, default=1.5, help='Fail when a stage takes more than this many times its baseline time')
+    parser.add_argument('--min-seconds', type=float, default=0.005, help='Ignore stages faster than this in both runs')
+    args = parser.parse_args()
+
+    results = {'version': RESULTS_VERSION, 'environment': environment(), 'repeat': args.repeat, 'scenarios': {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for kind in args.kinds:
+            for size in args.sizes:
+                results['scenarios'][f'{kind}-{size}'] = run_scenario(kind, size, args.repeat, workdir)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('version') != RESULTS_VERSION:
+            raise SystemExit(f"{args.baseline} was written by a different version of this benchmark")
+
+    print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.max_slowdown, args.min_seconds)
+        for name, stage, before, seconds in regressions:
+            print(f"REGRESSION {name} {stage}: {before * 1000:.1f} ms -> {seconds * 1000:.1f} ms ({seconds / before:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No stage slower than {args.max_slowdown:g}x its baseline time")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Track the start-up time of every entry point.
+
+For each script in the repository root three cold starts are timed in
+fresh interpreters: importing the module (from `python -X importtime`),
+running it with --help, and for the converters a conversion answered
+from the result cache. Each is also checked for whether it imported
+OpenCV or NumPy, which none of these needs. The best of several
+repetitions is kept.
+
+Like bench_stages.py, results can be saved as JSON and later runs
+compared against them; the script exits with status 1 when a start-up
+got slower than --max-slowdown allows.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--output startup.json] [--baseline startup.json --max-slowdown 1.5]
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Bump when entry points or measurements change
+RESULTS_VERSION = 2
+
+ENTRY_POINTS = ['image_to_svg', 'image_to_svg_advanced', 'extract_colored_path', 'batch_convert', 'parameter_sweep', 'conversion_server', 'animation_to_svg']
+
+# Conversion arguments of the converters, with the cache directory as {cache}
+CACHED_RUNS = {
+    'image_to_svg': ['--cache_dir', '{cache}'],
+    'image_to_svg_advanced': ['--cache-dir', '{cache}'],
+    'extract_colored_path': ['--color', 'blue', '--cache-dir', '{cache}'],
+}
+
+HEAVY_MODULES = ('cv2', 'numpy')
+
+def run_timed(args):
+    """
+    Run a Python command in a fresh interpreter with -X importtime.
+
+    Returns:
+        Tuple of (wall seconds, dict of module name to cumulative import seconds)
+    """
+    start = time.perf_counter()
+    done = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if done.returncode:
+        raise SystemExit(f"{' '.join(args)} failed:\n{done.stderr[-2000:]}")
+
+    imports = {}
+    for line in done.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if cumulative.strip().isdigit():
+                imports[name.strip()] = int(cumulative) / 1e6
+    return elapsed, imports
+
+def measure(args, module, repeat):
+    """
+    Best wall time and import time of `module` over several runs, and the heavy modules imported.
+    """
+    runs = [run_timed(args) for _ in range(repeat)]
+    return {
+        'wall': min(elapsed for elapsed, _ in runs),
+        'import': min(imports.get(module, 0.0) for _, imports in runs),
+        'heavy': [name for name in HEAVY_MODULES if any(m == name or m.startswith(name + '.') for m in runs[0][1])],
+    }
+
+def run_entry_point(module, repeat, image_path, workdir):
+    """
+    Time importing a script, its --help and, for converters, a cached conversion.
+    """
+    results = {
+        'import': measure(['-c', f'import {module}'], module, repeat),
+        'help': measure([f'{module}.py', '--help'], '__main__', repeat),
+    }
+    if module in CACHED_RUNS:
+        cache_dir = Path(workdir) / f'cache-{module}'
+        args = [f'{module}.py', str(image_path), '--output', str(Path(workdir) / f'{module}.svg')]
+        args += [arg.format(cache=cache_dir) for arg in CACHED_RUNS[module]]
+        # The first run fills the cache
+        run_timed(args)
+        results['cached'] = measure(args, '__main__', repeat)
+    return results
+
+def environment():
+    """
+    Versions and machine details stored with the results.
+    """
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+    }
+
+def compare(results, baseline, max_slowdown=1.5, min_seconds=0.02):
+    """
+    Find start-ups that got slower than allowed compared to a baseline run.
+
+    Returns:
+        List of (entry point, measurement, baseline seconds, seconds) regressions
+    """
+    regressions = []
+    for module, runs in results['entry_points'].items():
+        old = baseline['entry_points'].get(module, {})
+        for name, run in runs.items():
+            before = old.get(name, {}).get('wall')
+            if before is None or max(before, run['wall']) < min_seconds:
+                continue
+            if run['wall'] > before * max_slowdown:
+                regressions.append((module, name, before, run['wall']))
+    return regressions
+
+def print_table(results, baseline=None):
+    """
+    Print milliseconds per entry point and measurement, with the change against a baseline.
+    """
+    columns = ['import', 'help', 'cached']
+    print(f"{'entry point':<22} " + " ".join(f"{name:>16}" for name in columns) + "  heavy imports")
+    for module, runs in results['entry_points'].items():
+        old = baseline['entry_points'].get(module, {}) if baseline else {}
+        cells = []
+        for name in columns:
+            run = runs.get(name)
+            if run is None:
+                cells.append(f"{'-':>16}")
+                continue
+            seconds = run['import'] if name == 'import' else run['wall']
+            cell = f"{seconds * 1000:.0f}"
+            before = old.get(name)
+            if before:
+                cell += f" ({seconds / (before['import'] if name == 'import' else before['wall']) - 1:+.0%})"
+            cells.append(f"{cell:>16}")
+        heavy = sorted({m for run in runs.values() for m in run['heavy']})
+        print(f"{module:<22} " + " ".join(cells) + f"  {', '.join(heavy) or 'none'}")
+    print("(milliseconds: import time of the module, and wall time of --help and of a conversion served from the cache, "
+          "interpreter start-up included" + ("; change against the baseline)" if baseline else ")"))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the start-up time of every entry point')
+    parser.add_argument('--entry-points', nargs='+', default=ENTRY_POINTS, help='Scripts to time (module names)')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timing repetitions (best is reported)')
+    parser.add_argument('--output', type=str, default=None, help='Write the results to this JSON file')
+    parser.add_argument('--baseline', type=str, default=None, help='Earlier results JSON to compare against')
+    parser.add_argument('--max-slowdown', type=float, default=1.5, help='Fail when a start-up takes more than this many times its baseline time')
+    args = parser.parse_args()
+
+    results = {'version': RESULTS_VERSION, 'environment': environment(), 'repeat': args.repeat, 'entry_points': {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        # A small drawing, so the cached runs time start-up rather than hashing the image
+        import cv2
+        from synthetic import make_image
+        image_path = Path(workdir) / 'drawing.png'
+        cv2.imwrite(str(image_path), make_image('color', (320, 240)))
+
+        for module in args.entry_points:
+            results['entry_points'][module] = run_entry_point(module, args.repeat, image_path, workdir)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('version') != RESULTS_VERSION:
+            raise SystemExit(f"{args.baseline} was written by a different version of this benchmark")
+
+    print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.max_slowdown)
+        for module, name, before, seconds in regressions:
+            print(f"REGRESSION {module} {name}: {before * 1000:.0f} ms -> {seconds * 1000:.0f} ms ({seconds / before:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No start-up slower than {args.max_slowdown:g}x its baseline time")
+
+if __name__ == "__main__":
+    main()
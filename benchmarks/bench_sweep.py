@@ -0,0 +1,71 @@
+"""
+Benchmark a parameter sweep against converting once per parameter combination.
+
+Every variant is compared with `image_to_svg_advanced.image_to_svg_path`
+for the same settings before any timing is reported.
+
+Usage:
+    python benchmarks/bench_sweep.py [--image drawing.png] [--thresholds 100 127 150]
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from image_to_svg_advanced import image_to_svg_path
+from svgtrace.sweep import sweep
+from synthetic import make_image
+
+def separate_runs(image_path, thresholds, min_lengths, bezier_smoothings):
+    """
+    Convert the image once per combination, as repeated CLI runs would.
+    """
+    results = []
+    for threshold, min_length, bezier_smoothing in itertools.product(thresholds, min_lengths, bezier_smoothings):
+        with contextlib.redirect_stdout(io.StringIO()):
+            results.append(image_to_svg_path(
+                image_path,
+                threshold_value=threshold,
+                min_contour_length=min_length,
+                bezier_smoothing=bezier_smoothing
+            ))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parameter sweeps')
+    parser.add_argument('--image', type=str, default=None, help='Image to sweep (defaults to a synthetic drawing)')
+    parser.add_argument('--thresholds', type=int, nargs='+', default=[90, 127, 160, 200])
+    parser.add_argument('--min-lengths', type=int, nargs='+', default=[25, 50, 100])
+    parser.add_argument('--bezier-smoothings', type=float, nargs='+', default=[0.1, 0.25, 0.4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = args.image
+        if image_path is None:
+            image_path = Path(tmp) / 'drawing.png'
+            cv2.imwrite(str(image_path), make_image('wavy', '2k'))
+
+        start = time.perf_counter()
+        expected = separate_runs(image_path, args.thresholds, args.min_lengths, args.bezier_smoothings)
+        separate_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        variants = sweep(image_path, args.thresholds, args.min_lengths, args.bezier_smoothings)
+        sweep_time = time.perf_counter() - start
+
+    if [path_data for _, path_data in variants] != expected:
+        raise SystemExit("Sweep output differs from separate conversions")
+
+    print(f"{len(variants)} variants: separate runs {separate_time:.3f}s, sweep {sweep_time:.3f}s, "
+          f"{separate_time / sweep_time:.1f}x faster")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Deterministic synthetic test images for the benchmarks.
+
+Every generator takes a size and a seed and always draws the same image,
+so timings from different runs (and different machines) measure the same
+work.
+"""
+import cv2
+import numpy as np
+
+# Named resolutions (width, height)
+SIZES = {
+    '1k': (1024, 768),
+    '2k': (2048, 1536),
+    '4k': (3840, 2160),
+    '8k': (7680, 4320),
+    '16k': (15360, 8640),
+}
+
+# BGR stroke colors that fall inside extract_colored_path's HSV ranges
+STROKE_COLORS = {
+    'blue': (200, 60, 20),
+    'red': (30, 30, 210),
+    'green': (40, 180, 40),
+    'yellow': (30, 220, 240),
+    'purple': (170, 40, 130),
+    'black': (20, 20, 20),
+}
+
+def _wave_points(rng, width, height, scale):
+    """
+    Points of one wavy stroke: a sine wave running in a random direction.
+    """
+    n = int(rng.integers(20, 80))
+    x0, y0 = rng.uniform((0, 0), (width, height))
+    angle = rng.uniform(0, 2 * np.pi)
+    t = np.linspace(0, rng.uniform(80, 300) * scale, n)
+    wave = rng.uniform(10, 40) * scale * np.sin(t / rng.uniform(20, 60) / scale)
+    x = x0 + t * np.cos(angle) - wave * np.sin(angle)
+    y = y0 + t * np.sin(angle) + wave * np.cos(angle)
+    return np.stack((x, y), axis=1).astype(np.int32)
+
+def wavy_strokes(width, height, seed=0, colors=None):
+    """
+    Line art: dark wavy strokes of varying width on a white background.
+
+    Args:
+        width: Image width
+        height: Image height
+        seed: Random seed
+        colors: BGR stroke colors to pick from (dark grays when None)
+
+    Returns:
+        BGR image array
+    """
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+
+    # Keep the stroke density of a 1024x768 drawing at every size
+    scale = max(width / 1024, height / 768) ** 0.5
+    strokes = int(60 * width * height / (1024 * 768) / scale)
+    for _ in range(strokes):
+        if colors:
+            color = colors[int(rng.integers(len(colors)))]
+        else:
+            shade = int(rng.integers(0, 120))
+            color = (shade, shade, shade)
+        thickness = max(1, int(rng.integers(2, 6) * scale))
+        cv2.polylines(img, [_wave_points(rng, width, height, scale)], False, color, thickness, cv2.LINE_AA)
+    return img
+
+def multicolor(width, height, seed=0):
+    """
+    Wavy strokes in several saturated colors.
+    """
+    return wavy_strokes(width, height, seed, colors=list(STROKE_COLORS.values()))
+
+def dense_noise(width, height, seed=0):
+    """
+    Blotchy noise that thresholds into a very large number of small contours.
+    """
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, size=(height, width), dtype=np.uint8)
+    noise = cv2.GaussianBlur(noise, (0, 0), 1.5)
+
+    # Darken about a third of the image, too little for the blobs to merge
+    # into one connected region
+    dark = noise < np.percentile(noise, 35)
+    img = np.where(dark, 40, 230).astype(np.uint8)
+    return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+def dusty_scan(width, height, seed=0):
+    """
+    Line art scanned with dust: wavy strokes among many scattered specks.
+    """
+    img = wavy_strokes(width, height, seed)
+    rng = np.random.default_rng(seed + 1)
+
+    # About one speck of 1-4 pixels across per 400 pixels
+    count = width * height // 400
+    x = rng.integers(0, width, count)
+    y = rng.integers(0, height, count)
+    radius = rng.integers(1, 3, count)
+    for cx, cy, r in zip(x.tolist(), y.tolist(), radius.tolist()):
+        cv2.circle(img, (cx, cy), r, (60, 60, 60), -1)
+    return img
+
+def broken_strokes(width, height, seed=0):
+    """
+    Line art scanned too light: wavy strokes broken into short dashes.
+    """
+    img = wavy_strokes(width, height, seed)
+    rng = np.random.default_rng(seed + 1)
+
+    # White out thin bands every 6-14 pixels, alternating in both directions
+    scale = max(width / 1024, height / 768) ** 0.5
+    for axis in (0, 1):
+        position = 0
+        while position < img.shape[axis]:
+            position += int(rng.integers(6, 15) * scale)
+            gap = max(1, int(rng.integers(1, 3) * scale))
+            if axis == 0:
+                img[position:position + gap] = 255
+            else:
+                img[:, position:position + gap] = 255
+    return img
+
+def sparse_page(width, height, seed=0):
+    """
+    A mostly empty page: wavy strokes in its top left sixteenth only.
+    """
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    img[:height // 4, :width // 4] = wavy_strokes(width // 4, height // 4, seed)
+    return img
+
+GENERATORS = {
+    'wavy': wavy_strokes,
+    'noise': dense_noise,
+    'color': multicolor,
+    'scan': dusty_scan,
+    'broken': broken_strokes,
+    'page': sparse_page,
+}
+
+def make_image(kind, size, seed=0):
+    """
+    Draw a named kind of image at a named size, e.g. make_image('wavy', '4k').
+    """
+    width, height = SIZES[size] if isinstance(size, str) else size
+    return GENERATORS[kind](width, height, seed)
+
+def animation_frames(kind, size, count=24, seed=0):
+    """
+    Frames of a ball rolling across a still image of a named kind, e.g. animation_frames('page', '2k').
+
+    Only the pixels around the ball change from one frame to the next.
+
+    Returns:
+        List of BGR image arrays
+    """
+    background = make_image(kind, size, seed)
+    height, width = background.shape[:2]
+    radius = max(width // 80, 4)
+    frames = []
+    for k in range(count):
+        frame = background.copy()
+        t = k / max(count - 1, 1)
+        center = (int(width * (0.1 + 0.8 * t)), int(height * (0.6 + 0.25 * np.sin(np.pi * t))))
+        cv2.circle(frame, center, radius, (30, 30, 30), -1, cv2.LINE_AA)
+        frames.append(frame)
+    return frames
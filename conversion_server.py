@@ -0,0 +1,412 @@
+import argparse
+import base64
+import bisect
+import collections
+import contextlib
+import json
+import os
+import signal
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlparse
+
+import batch_convert
+from svgtrace.lazy import preload
+
+# Modules loaded before the first job: the converters, and OpenCV and NumPy,
+# which the converters only import when a stage first uses them
+PRELOADED_MODULES = ('cv2', 'numpy', 'image_to_svg', 'image_to_svg_advanced', 'extract_colored_path')
+
+# Number of recent jobs kept for the latency percentiles
+LATENCY_WINDOW = 1000
+
+# Image suffix used for raw uploads, by Content-Type
+UPLOAD_SUFFIXES = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/bmp': '.bmp',
+    'image/tiff': '.tif',
+    'image/webp': '.webp',
+}
+
+class QueueFull(Exception):
+    """
+    Raised when a job arrives while every worker is busy and the queue is full.
+    """
+
+class BadRequest(Exception):
+    """
+    Raised for jobs with missing or invalid fields.
+    """
+
+def _converter_parser():
+    """
+    Parser of the converter options, used to validate and default job options.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    batch_convert.add_converter_arguments(parser)
+    return parser
+
+CONVERTER_PARSER = _converter_parser()
+CONVERTER_ACTIONS = {action.dest: action for action in CONVERTER_PARSER._actions}
+
+def job_options(params):
+    """
+    Turn job parameters into converter options.
+
+    Parameters use the names of the batch_convert.py options, with dashes
+    or underscores ('min-length' or 'min_length'); flags take true/false.
+
+    Args:
+        params: Dict of parameter names to values (strings from a query string, or JSON values)
+
+    Returns:
+        Tuple of (mode, options dict)
+    """
+    args = CONVERTER_PARSER.parse_args([])
+    for name, value in params.items():
+        dest = name.replace('-', '_')
+        action = CONVERTER_ACTIONS.get(dest)
+        if action is None:
+            raise BadRequest(f"Unknown option '{name}'")
+
+        try:
+            if action.nargs == 0:
+                # Flags such as no_bezier
+                value = value if isinstance(value, bool) else str(value).lower() in ('1', 'true', 'yes', 'on')
+            elif value is not None and action.type is not None:
+                value = action.type(value)
+        except ValueError:
+            raise BadRequest(f"Invalid value for '{name}': {value!r}")
+
+        if action.choices and value not in action.choices:
+            raise BadRequest(f"'{name}' must be one of {', '.join(action.choices)}")
+        setattr(args, dest, value)
+
+    return args.mode, batch_convert.options_from_args(args)
+
+# Result caches of the worker threads (thread pools) or of this process (process pools)
+_caches = threading.local()
+_cache_settings = (None, None)
+
+def _init_process_worker(cache_dir, cache_size):
+    """
+    Load the converters up front and send their progress messages nowhere.
+    """
+    global _cache_settings
+    sys.stdout = open(os.devnull, 'w')
+    _cache_settings = (cache_dir, cache_size)
+    preload(*PRELOADED_MODULES)
+
+def _worker_cache():
+    """
+    Result cache of the current worker, or None if caching is off.
+    """
+    cache_dir, cache_size = _cache_settings
+    if cache_dir is None:
+        return None
+    if not hasattr(_caches, 'cache'):
+        from svgtrace.cache import ResultCache
+        _caches.cache = ResultCache(cache_dir, cache_size)
+    return _caches.cache
+
+def run_job(mode, options, image_path=None, image_bytes=None, suffix='.png', output_path=None):
+    """
+    Convert one image in a worker.
+
+    Args:
+        mode: Converter to use ('basic', 'advanced' or 'color')
+        options: Converter options
+        image_path: Path to the input image on the server's file system
+        image_bytes: Encoded image data, used when image_path is None
+        suffix: File suffix matching the format of image_bytes
+        output_path: Path to save the SVG on the server (None to return it)
+
+    Returns:
+        Dict with the path data length, the seconds spent converting and
+        either the SVG document or the output path and its size
+    """
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='svgtrace-') as workdir:
+        if image_path is None:
+            image_path = Path(workdir) / f'upload{suffix}'
+            image_path.write_bytes(image_bytes)
+        svg_path = output_path or Path(workdir) / 'output.svg'
+
+        path_length = batch_convert.run_converter(mode, str(image_path), str(svg_path), options, _worker_cache())
+
+        result = {'path_length': path_length}
+        if output_path is None:
+            result['svg'] = Path(svg_path).read_text() if path_length else None
+        else:
+            result['output_path'] = str(output_path)
+            result['bytes'] = Path(output_path).stat().st_size if path_length else 0
+
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+class ConversionService:
+    """
+    Bounded worker pool with a request queue and throughput and latency metrics.
+
+    At most `workers` jobs run at once and at most `queue_size` more wait
+    for a worker; further jobs are rejected with QueueFull so clients can
+    back off instead of piling up requests.
+    """
+
+    def __init__(self, workers=None, queue_size=32, processes=False, cache_dir=None, cache_size=None):
+        global _cache_settings
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        if processes:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=_init_process_worker, initargs=(cache_dir, cache_size))
+        else:
+            _cache_settings = (cache_dir, cache_size)
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='convert')
+        self.slots = threading.BoundedSemaphore(self.workers + queue_size)
+
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.recent = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def convert(self, mode, options, **job):
+        """
+        Run a job on the pool and wait for its result.
+
+        Raises:
+            QueueFull: If every worker is busy and the queue is full
+        """
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise QueueFull(f"{self.workers} jobs running and {self.queue_size} queued")
+
+        submitted = time.perf_counter()
+        with self.lock:
+            self.pending += 1
+        try:
+            future = self.executor.submit(run_job, mode, options, **job)
+            future.add_done_callback(lambda _: self._finished())
+            result = future.result()
+        except Exception:
+            with self.lock:
+                self.failed += 1
+            raise
+        finally:
+            self.slots.release()
+
+        latency = time.perf_counter() - submitted
+        with self.lock:
+            self.completed += 1
+            self.recent.append((time.time(), latency, result['seconds']))
+        return result
+
+    def _finished(self):
+        with self.lock:
+            self.pending -= 1
+
+    def metrics(self):
+        """
+        Counters, throughput and latency percentiles of the service.
+        """
+        with self.lock:
+            now = time.time()
+            uptime = now - self.started
+            latencies = sorted(latency for _, latency, _ in self.recent)
+            run_times = sorted(seconds for _, _, seconds in self.recent)
+            last_minute = len(self.recent) - bisect.bisect_left([t for t, _, _ in self.recent], now - 60)
+
+            def percentile(values, q):
+                return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+            return {
+                'uptime_seconds': uptime,
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'in_flight': self.pending,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'throughput_per_second': self.completed / uptime if uptime else 0.0,
+                'throughput_last_minute_per_second': last_minute / min(60.0, uptime) if uptime else 0.0,
+                'latency_seconds': {q: percentile(latencies, p) for q, p in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))},
+                'conversion_seconds': {q: percentile(run_times, p) for q, p in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))},
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP API of the service.
+
+    GET  /health   -> {"status": "ok"}
+    GET  /metrics  -> service metrics as JSON
+    POST /convert  -> converts one image:
+        - a JSON body {"image_path": ..., or "image": base64 data, "output_path": optional,
+          plus converter options such as "mode", "threshold", "min-length", "no-bezier"}
+        - or the raw image bytes as the body, with options in the query string
+      Responds with the SVG document, or JSON when output_path is given.
+    """
+    server_version = 'svgtrace'
+    protocol_version = 'HTTP/1.1'
+
+    def address_string(self):
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        data = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload), headers=headers)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif path == '/metrics':
+            self._send_json(200, self.server.service.metrics())
+        else:
+            self._send_json(404, {'error': f"No such endpoint: {path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/convert':
+            self._send_json(404, {'error': f"No such endpoint: {url.path}"})
+            return
+
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+
+        try:
+            job = {}
+            if content_type == 'application/json':
+                params = json.loads(body or b'{}')
+                if 'image_path' in params:
+                    job['image_path'] = params.pop('image_path')
+                elif 'image' in params:
+                    job['image_bytes'] = base64.b64decode(params.pop('image'))
+                    job['suffix'] = params.pop('suffix', '.png')
+                else:
+                    raise BadRequest("Send 'image_path' or base64 'image' data")
+                job['output_path'] = params.pop('output_path', None)
+            else:
+                if not body:
+                    raise BadRequest("Empty request body")
+                params = dict(parse_qsl(url.query))
+                job['image_bytes'] = body
+                job['suffix'] = UPLOAD_SUFFIXES.get(content_type, '.png')
+
+            mode, options = job_options(params)
+            result = self.server.service.convert(mode, options, **job)
+        except (BadRequest, ValueError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        except QueueFull as e:
+            self._send_json(503, {'error': f"Busy: {e}"}, headers={'Retry-After': '1'})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+
+        if job.get('output_path') is None:
+            if result['svg'] is None:
+                self._send_json(422, {'error': "No significant contours found"})
+            else:
+                self._send(200, result['svg'], 'image/svg+xml', {'X-Conversion-Seconds': f"{result['seconds']:.4f}"})
+        else:
+            self._send_json(200, result)
+
+class UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    """
+    HTTP server on a Unix domain socket.
+    """
+    daemon_threads = True
+
+def make_server(service, host='127.0.0.1', port=8765, socket_path=None, quiet=False):
+    """
+    Create the HTTP server of a ConversionService on a TCP port or a Unix socket.
+    """
+    if socket_path:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, ConversionRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ConversionRequestHandler)
+        server.daemon_threads = True
+    server.service = service
+    server.quiet = quiet
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve image to SVG conversions from a warm process')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port to listen on')
+    parser.add_argument('--socket', type=str, default=None, help='Listen on this Unix socket instead of a TCP port')
+    parser.add_argument('--workers', type=int, default=None, help='Number of conversions run at once (defaults to the number of cores)')
+    parser.add_argument('--queue-size', type=int, default=32, help='Jobs allowed to wait for a worker before requests are rejected with 503')
+    parser.add_argument('--processes', action='store_true', help='Run conversions in worker processes instead of threads')
+    parser.add_argument('--cache', action='store_true', help='Reuse results of earlier identical conversions (stored in $SVGTRACE_CACHE_DIR or ~/.cache/svgtrace)')
+    parser.add_argument('--cache-dir', type=str, default=None, help='Cache directory (implies --cache)')
+    parser.add_argument('--cache-size', type=int, default=256, help='Maximum cache size on disk in MB')
+    parser.add_argument('--quiet', action='store_true', help='Do not log requests')
+
+    args = parser.parse_args()
+
+    cache_dir = None
+    if args.cache or args.cache_dir:
+        from svgtrace.cache import ResultCache
+        cache_dir = ResultCache(args.cache_dir).directory
+
+    # Import the converters and the libraries they defer now, so the first job doesn't pay for it
+    preload(*PRELOADED_MODULES)
+
+    service = ConversionService(args.workers, args.queue_size, args.processes, cache_dir, args.cache_size * 1024 * 1024)
+    server = make_server(service, args.host, args.port, args.socket, args.quiet)
+    address = args.socket or f"http://{args.host}:{args.port}"
+    print(f"Serving conversions on {address} with {service.workers} workers", file=sys.stderr)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    # Shut down cleanly when a service manager stops the server
+    signal.signal(signal.SIGTERM, stop)
+
+    # The converters report progress on stdout; keep it out of the service's output
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            service.shutdown()
+            if args.socket:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(args.socket)
+
+if __name__ == "__main__":
+    main()
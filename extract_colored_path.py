@@ -1,9 +1,77 @@
-import cv2
-import numpy as np
 import argparse
+import contextlib
+import sys
 from pathlib import Path
-import math
 
+from svgtrace import svgwriter
+# Defined in this script before svgtrace existed, and still importable from it
+from svgtrace.bezier import points_to_bezier
+from svgtrace.cache import ResultCache, cached, cached_path_chunks
+from svgtrace.color import range_masks
+from svgtrace.components import ComponentFilter
+from svgtrace.encode import PathEncoder
+from svgtrace.fit import CurveFitter
+from svgtrace.instrument import profiling, stage, staged
+from svgtrace.lazy import lazy_import
+from svgtrace.measure import iter_subpaths
+from svgtrace.options import notice, reconcile_options
+from svgtrace.order import DEFAULT_TOLERANCE, PathPlanner
+from svgtrace.pipeline import contours_to_path_data, find_contours, iter_path_data, read_image
+from svgtrace.skeleton import CenterlineTracer
+from svgtrace.svgwriter import format_preview, is_stdout, open_output, stroke_attributes, write_path_element
+from svgtrace.tiling import find_contours_tiled, open_image
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+__all__ = [
+    'ALL_COLORS', 'COLOR_RANGES', 'COLOR_TILE_CONTEXT',
+    'blur_to_hsv', 'build_color_mask', 'cache_params', 'clean_mask', 'color_name_to_hsv_range',
+    'contours_to_path', 'contours_to_svg_path', 'convert_image', 'extract_color', 'extract_colored_path',
+    'extract_colored_paths', 'extract_colors', 'find_color_contours', 'hsv_ranges', 'main',
+    'points_to_bezier', 'save_multi_svg', 'save_svg',
+]
+
+# Rows of context each strip needs in tiled mode: 2 for the 5x5 blur,
+# 2 for the opening and 4 for the two-iteration closing
+COLOR_TILE_CONTEXT = 8
+
+def blur_to_hsv(img, blur=5):
+    """
+    Blur a BGR image and convert it to HSV.
+    
+    Args:
+        img: BGR image array
+        blur: Amount of blur to apply
+        
+    Returns:
+        HSV image array
+    """
+    # Apply blur to reduce noise
+    with stage('blur'):
+        blurred = cv2.GaussianBlur(img, (blur, blur), 0)
+    
+    # Convert to HSV
+    with stage('hsv'):
+        return cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV)
+
+def clean_mask(mask):
+    """
+    Apply morphological operations to clean up a color mask.
+    
+    Args:
+        mask: Binary color mask
+        
+    Returns:
+        Cleaned binary mask
+    """
+    with stage('clean'):
+        kernel = np.ones((3, 3), np.uint8)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=1)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=2)
+    return mask
+
+@staged('extract_color')
 def extract_color(image_path, color_lower, color_upper, blur=5):
     """
     Extract a specific color range from an image.
@@ -17,28 +85,74 @@ def extract_color(image_path, color_lower, color_upper, blur=5):
     Returns:
         Binary image with the color extracted
     """
-    # Read the image
-    img = cv2.imread(str(image_path))
-    if img is None:
-        raise ValueError(f"Could not read image at {image_path}")
+    hsv = blur_to_hsv(read_image(image_path), blur)
     
-    # Apply blur to reduce noise
-    blurred = cv2.GaussianBlur(img, (blur, blur), 0)
+    # Create a mask for the specified color range
+    with stage('in_range'):
+        mask = cv2.inRange(hsv, np.array(color_lower), np.array(color_upper))
     
-    # Convert to HSV
-    hsv = cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV)
+    return clean_mask(mask)
+
+def build_color_mask(img, color_name, blur=5):
+    """
+    Build the cleaned mask of a named color from an image array.
     
-    # Create a mask for the specified color range
-    mask = cv2.inRange(hsv, np.array(color_lower), np.array(color_upper))
+    Args:
+        img: BGR image array
+        color_name: Name of the color to extract
+        blur: Amount of blur to apply
+        
+    Returns:
+        Binary image with the color extracted
+    """
+    hsv = blur_to_hsv(img, blur)
     
-    # Apply morphological operations to clean up the mask
-    kernel = np.ones((3, 3), np.uint8)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=1)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=2)
+    # Clean each range separately, then combine them (red has two)
+    mask = None
+    for lower, upper in hsv_ranges(color_name):
+        with stage('in_range'):
+            range_mask = cv2.inRange(hsv, np.array(lower), np.array(upper))
+        range_mask = clean_mask(range_mask)
+        mask = range_mask if mask is None else cv2.bitwise_or(mask, range_mask)
     
     return mask
 
-def contours_to_path(binary_image, min_contour_length=50, simplify=True, use_bezier=True, bezier_smoothing=0.25):
+def extract_colors(image_path, color_names, blur=5):
+    """
+    Extract several named colors from an image in one pass.
+    
+    The image is decoded, blurred and converted to HSV once, then every
+    pixel is classified into all requested color ranges with a single
+    lookup table pass.
+    
+    Args:
+        image_path: Path to the image file
+        color_names: Names of the colors to extract
+        blur: Amount of blur to apply
+        
+    Returns:
+        Dict mapping each color name to its binary mask
+    """
+    hsv = blur_to_hsv(read_image(image_path), blur)
+    
+    # Flatten every color into its HSV ranges (red has two)
+    ranges = []
+    owners = []
+    for color_name in color_names:
+        for lower, upper in hsv_ranges(color_name):
+            ranges.append((lower, upper))
+            owners.append(color_name)
+    
+    # Clean each range separately, then combine ranges of the same color
+    masks = {}
+    for color_name, mask in zip(owners, range_masks(hsv, ranges)):
+        mask = clean_mask(mask)
+        masks[color_name] = cv2.bitwise_or(masks[color_name], mask) if color_name in masks else mask
+    
+    return masks
+
+@staged('contours_to_path')
+def contours_to_path(binary_image, min_contour_length=50, simplify=True, use_bezier=True, bezier_smoothing=0.25, fitter=None, prefilter=None):
     """
     Convert contours from a binary image to SVG path data.
     
@@ -48,132 +162,100 @@ def contours_to_path(binary_image, min_contour_length=50, simplify=True, use_bez
         simplify: Whether to simplify the contours
         use_bezier: Whether to use bezier curves
         bezier_smoothing: Smoothing factor for bezier curves
+        fitter: CurveFitter to fit the raw contours with (None for one curve per simplified vertex)
+        prefilter: ComponentFilter that drops small connected components before tracing
+            (None to trace the whole mask)
         
     Returns:
         SVG path data string
     """
-    # Find contours
-    contours, _ = cv2.findContours(binary_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    # Find, filter and sort contours
+    contours = find_contours(binary_image, min_contour_length, prefilter)
     
-    # Filter out small contours
-    contours = [c for c in contours if cv2.arcLength(c, False) > min_contour_length]
-    
-    # Sort contours by area (largest first)
-    contours = sorted(contours, key=cv2.contourArea, reverse=True)
+    return contours_to_svg_path(contours, simplify, use_bezier, bezier_smoothing, fitter)
+
+def contours_to_svg_path(contours, simplify=True, use_bezier=True, bezier_smoothing=0.25, fitter=None):
+    """
+    Convert filtered and sorted contours to SVG path data.
     
+    Args:
+        contours: List of contours
+        simplify: Whether to simplify the contours
+        use_bezier: Whether to use bezier curves
+        bezier_smoothing: Smoothing factor for bezier curves
+        fitter: CurveFitter to fit the raw contours with (None for one curve per simplified vertex)
+        
+    Returns:
+        SVG path data string
+    """
     if not contours:
         print("No significant contours found.")
         return ""
     
     # Create SVG path data
-    svg_path_data = ""
-    
-    for contour in contours:
-        # Simplify contour if requested
-        if simplify:
-            epsilon = 0.0025 * cv2.arcLength(contour, True)
-            contour = cv2.approxPolyDP(contour, epsilon, True)
-        
-        # Extract points from contour
-        points = [point[0] for point in contour]
-        
-        if use_bezier and len(points) > 2:
-            # Convert to bezier curves
-            svg_path_data += points_to_bezier(points, bezier_smoothing)
-        else:
-            # Start a new subpath
-            svg_path_data += f"M{points[0][0]},{points[0][1]}"
-            
-            # Add line segments
-            for point in points[1:]:
-                svg_path_data += f" L{point[0]},{point[1]}"
-    
-    return svg_path_data
+    return contours_to_path_data(contours, simplify, use_bezier, bezier_smoothing, fitter)
 
-def points_to_bezier(points, smoothing=0.25):
+def save_svg(path_data, output_path, width=600, height=420, color="navy", stroke_width=3, lengths=False, split=False):
     """
-    Convert a series of points to a smooth bezier path.
+    Save path data as an SVG file.
     
     Args:
-        points: List of (x, y) coordinates
-        smoothing: Smoothing factor (0-1)
+        path_data: SVG path data string, or an iterable of path data chunks to stream
+        output_path: Path to save the SVG file, or '-' for stdout
+        width: Width of the SVG viewBox
+        height: Height of the SVG viewBox
+        color: Stroke color
+        stroke_width: Width of the stroke
+        lengths: Whether to write the path's length as pathLength and data-length attributes
+        split: Write one <path> per chunk, each with its length and offset along the drawing
         
     Returns:
-        SVG path string with bezier curves
+        Tuple of (path data length, beginning of the path data)
     """
-    if len(points) < 2:
-        return ""
-    
-    # Start path
-    path = f"M{points[0][0]},{points[0][1]}"
-    
-    if len(points) == 2:
-        # Just a straight line
-        return path + f" L{points[1][0]},{points[1][1]}"
-    
-    # Calculate control points for each segment
-    for i in range(1, len(points) - 1):
-        p0 = points[i - 1]
-        p1 = points[i]
-        p2 = points[i + 1]
-        
-        # Calculate distance between points
-        d1 = math.sqrt((p1[0] - p0[0]) ** 2 + (p1[1] - p0[1]) ** 2)
-        d2 = math.sqrt((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2)
-        
-        # Determine control point length (smoothing factor applied)
-        d1_smooth = d1 * smoothing
-        d2_smooth = d2 * smoothing
-        
-        # Calculate unit vectors
-        if d1 > 0:
-            v1x = (p1[0] - p0[0]) / d1
-            v1y = (p1[1] - p0[1]) / d1
-        else:
-            v1x, v1y = 0, 0
-            
-        if d2 > 0:
-            v2x = (p2[0] - p1[0]) / d2
-            v2y = (p2[1] - p1[1]) / d2
-        else:
-            v2x, v2y = 0, 0
-        
-        # Control points
-        c1x = p1[0] - v1x * d1_smooth
-        c1y = p1[1] - v1y * d1_smooth
-        c2x = p1[0] + v2x * d2_smooth
-        c2y = p1[1] + v2y * d2_smooth
-        
-        # Add curve segment
-        if i == 1:
-            # First segment - include the first point
-            path += f" C{c1x},{c1y} {c2x},{c2y} {p2[0]},{p2[1]}"
-        else:
-            # Subsequent segments - use shorthand for first control point
-            path += f" S{c2x},{c2y} {p2[0]},{p2[1]}"
-            
-    return path
+    return svgwriter.save_svg(path_data, output_path, width, height, stroke_attributes(color, stroke_width), lengths, split)
 
-def save_svg(path_data, output_path, width=600, height=420, color="navy", stroke_width=3):
+def save_multi_svg(paths, output_path, width=600, height=420, stroke_width=3, lengths=False):
     """
-    Save path data as an SVG file.
+    Save several colored paths as one SVG file, one <path> per color.
     
     Args:
-        path_data: SVG path data string
-        output_path: Path to save the SVG file
+        paths: Dict mapping stroke color to SVG path data (a string or an iterable of chunks)
+        output_path: Path to save the SVG file, or '-' for stdout
         width: Width of the SVG viewBox
         height: Height of the SVG viewBox
-        color: Stroke color
         stroke_width: Width of the stroke
+        lengths: Whether to write each path's length as pathLength and data-length attributes
     """
-    svg_content = f"""<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}">
-    <path d="{path_data}" fill="none" stroke="{color}" stroke-width="{stroke_width}"/>
-</svg>"""
-    
-    with open(output_path, 'w') as f:
-        f.write(svg_content)
-    
-    print(f"SVG saved to {output_path}")
+    with stage('write'), open_output(output_path) as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}">')
+        for color, path_data in paths.items():
+            f.write('\n')
+            write_path_element(f, path_data, stroke_attributes(color, stroke_width), f' id="{color}"', lengths=lengths)
+        f.write('\n</svg>')
+    
+    if not is_stdout(output_path):
+        print(f"SVG saved to {output_path}")
+
+# Common color ranges in HSV
+COLOR_RANGES = {
+    'blue': ([90, 50, 50], [130, 255, 255]),
+    'dark_blue': ([100, 100, 50], [140, 255, 255]),
+    'light_blue': ([80, 50, 50], [110, 255, 255]),
+    'navy': ([100, 150, 0], [140, 255, 180]),
+    'red': ([0, 100, 100], [10, 255, 255]),  # Red is tricky in HSV as it wraps around
+    'red2': ([160, 100, 100], [179, 255, 255]),  # Second range for red
+    'green': ([40, 50, 50], [80, 255, 255]),
+    'yellow': ([20, 100, 100], [40, 255, 255]),
+    'orange': ([10, 100, 100], [25, 255, 255]),
+    'purple': ([125, 50, 50], [155, 255, 255]),
+    'pink': ([140, 50, 100], [170, 255, 255]),
+    'black': ([0, 0, 0], [180, 255, 50]),
+    'white': ([0, 0, 200], [180, 30, 255]),
+    'gray': ([0, 0, 100], [180, 30, 200])
+}
+
+# Colors extracted by --colors all ('red' already covers 'red2')
+ALL_COLORS = [name for name in COLOR_RANGES if name != 'red2']
 
 def color_name_to_hsv_range(color_name):
     """
@@ -185,33 +267,100 @@ def color_name_to_hsv_range(color_name):
     Returns:
         Tuple of (lower_bound, upper_bound) for HSV filtering
     """
-    # Common color ranges in HSV
-    color_ranges = {
-        'blue': ([90, 50, 50], [130, 255, 255]),
-        'dark_blue': ([100, 100, 50], [140, 255, 255]),
-        'light_blue': ([80, 50, 50], [110, 255, 255]),
-        'navy': ([100, 150, 0], [140, 255, 180]),
-        'red': ([0, 100, 100], [10, 255, 255]),  # Red is tricky in HSV as it wraps around
-        'red2': ([160, 100, 100], [179, 255, 255]),  # Second range for red
-        'green': ([40, 50, 50], [80, 255, 255]),
-        'yellow': ([20, 100, 100], [40, 255, 255]),
-        'orange': ([10, 100, 100], [25, 255, 255]),
-        'purple': ([125, 50, 50], [155, 255, 255]),
-        'pink': ([140, 50, 100], [170, 255, 255]),
-        'black': ([0, 0, 0], [180, 255, 50]),
-        'white': ([0, 0, 200], [180, 30, 255]),
-        'gray': ([0, 0, 100], [180, 30, 200])
-    }
-    
     if color_name == 'red':
         return [(0, 100, 100), (10, 255, 255), (160, 100, 100), (179, 255, 255)]
     
-    if color_name not in color_ranges:
-        raise ValueError(f"Color '{color_name}' not recognized. Available colors: {', '.join(color_ranges.keys())}")
+    if color_name not in COLOR_RANGES:
+        raise ValueError(f"Color '{color_name}' not recognized. Available colors: {', '.join(COLOR_RANGES.keys())}")
     
-    return color_ranges[color_name]
+    return COLOR_RANGES[color_name]
 
-def extract_colored_path(image_path, color_name, output_path=None, min_contour_length=50, simplify=True, use_bezier=True, bezier_smoothing=0.25, show_extracted=False):
+def hsv_ranges(color_name):
+    """
+    List the (lower, upper) HSV ranges of a color name.
+    
+    Args:
+        color_name: Name of the color
+        
+    Returns:
+        List of (lower_bound, upper_bound) pairs
+    """
+    color_range = color_name_to_hsv_range(color_name)
+    return [tuple(color_range[i:i + 2]) for i in range(0, len(color_range), 2)]
+
+def cache_params(color_name, min_contour_length=50, simplify=True, use_bezier=True, bezier_smoothing=0.25, fit_error=None, min_area=0, min_extent=0, join_tolerance=None, centerline=False):
+    """
+    Parameters that identify a cached result; the color is keyed by its HSV ranges.
+    """
+    params = {
+        'ranges': hsv_ranges(color_name),
+        'min_length': min_contour_length,
+        'epsilon': 0.0025 if simplify else None,
+        'bezier_smoothing': bezier_smoothing if use_bezier else None,
+    }
+    
+    # Fitted curves replace simplification and bezier smoothing
+    if fit_error:
+        params.update(epsilon=None, bezier_smoothing=None, fit_error=fit_error)
+    
+    # Dropping components before tracing can remove contours longer than the minimum length
+    if min_area or min_extent:
+        params.update(min_area=min_area, min_extent=min_extent)
+    
+    # Ordering by pen travel reorders, reverses and joins the subpaths
+    if join_tolerance is not None:
+        params.update(join=join_tolerance)
+    
+    # Centerlines are different paths altogether
+    if centerline:
+        params.update(centerline=True)
+    return params
+
+def find_color_contours(image_path, color_name, min_contour_length=50, show_extracted=False, tile_height=None, prefilter=None, centerline=None):
+    """
+    Build the mask of a named color and trace its contours.
+    
+    Args:
+        image_path: Path to the image file
+        color_name: Name of the color to extract
+        min_contour_length: Minimum length of contours to include
+        show_extracted: Whether to save the extracted color mask
+        tile_height: Process the image in strips of this many rows to bound memory (None for the whole image)
+        prefilter: ComponentFilter that drops small connected components before tracing
+            (None to trace the whole mask; not used in tiled mode)
+        centerline: CenterlineTracer that traces the centerlines of the strokes as open
+            polylines instead of their outlines (None to trace outlines; not used in tiled mode)
+        
+    Returns:
+        ContourSet of the contours, largest area first (centerlines longest first)
+    """
+    if tile_height:
+        # Build the mask and trace it strip by strip; no full-size mask exists to save
+        if show_extracted:
+            notice("The extracted color mask is not saved in tiled mode")
+        return find_contours_tiled(
+            open_image(image_path),
+            lambda strip: build_color_mask(strip, color_name),
+            tile_height,
+            COLOR_TILE_CONTEXT,
+            min_contour_length
+        )
+    
+    # Decode once, even for red (which needs two ranges)
+    color_mask = build_color_mask(read_image(image_path), color_name)
+    
+    # Save or show the extracted color mask if requested
+    if show_extracted:
+        mask_path = Path(image_path).with_suffix('.mask.png')
+        cv2.imwrite(str(mask_path), color_mask)
+        print(f"Extracted color mask saved to {mask_path}")
+    
+    if centerline:
+        return centerline.trace(color_mask, min_contour_length)
+    return find_contours(color_mask, min_contour_length, prefilter)
+
+@staged('extract_colored_path')
+def extract_colored_path(image_path, color_name, output_path=None, min_contour_length=50, simplify=True, use_bezier=True, bezier_smoothing=0.25, show_extracted=False, tile_height=None, fit_error=None, min_area=0, min_extent=0, cache=None):
     """
     Extract a colored path from an image.
     
@@ -224,39 +373,29 @@ def extract_colored_path(image_path, color_name, output_path=None, min_contour_l
         use_bezier: Whether to use bezier curves
         bezier_smoothing: Smoothing factor for bezier curves
         show_extracted: Whether to show the extracted color mask
+        tile_height: Process the image in strips of this many rows to bound memory (None for the whole image)
+        fit_error: Fit the raw contours with least-squares cubic curves within this many pixels
+            (None for one curve per simplified vertex)
+        min_area: Drop connected components of fewer pixels before tracing
+        min_extent: Drop connected components whose bounding box is shorter than this on both sides before tracing
+        cache: ResultCache to reuse earlier results from (None to always extract);
+            not used with show_extracted, since that needs the mask
         
     Returns:
         SVG path data string
     """
-    # Get the HSV range for the color
-    color_range = color_name_to_hsv_range(color_name)
+    tile_height, min_area, min_extent = reconcile_options(tile_height=tile_height, min_area=min_area, min_extent=min_extent)
     
-    # If it's red (which needs two ranges), handle separately
-    if len(color_range) == 4:
-        lower1, upper1, lower2, upper2 = color_range
+    def extract():
+        prefilter = ComponentFilter(min_area, min_extent) if min_area or min_extent else None
+        contours = find_color_contours(image_path, color_name, min_contour_length, show_extracted, tile_height, prefilter)
         
-        # Extract both ranges and combine
-        mask1 = extract_color(image_path, lower1, upper1)
-        mask2 = extract_color(image_path, lower2, upper2)
-        color_mask = cv2.bitwise_or(mask1, mask2)
-    else:
-        lower, upper = color_range
-        color_mask = extract_color(image_path, lower, upper)
-    
-    # Save or show the extracted color mask if requested
-    if show_extracted:
-        mask_path = Path(image_path).with_suffix('.mask.png')
-        cv2.imwrite(str(mask_path), color_mask)
-        print(f"Extracted color mask saved to {mask_path}")
+        # Convert to SVG path
+        fitter = CurveFitter(fit_error) if fit_error else None
+        return contours_to_svg_path(contours, simplify, use_bezier, bezier_smoothing, fitter)
     
-    # Convert to SVG path
-    svg_path = contours_to_path(
-        color_mask,
-        min_contour_length=min_contour_length,
-        simplify=simplify,
-        use_bezier=use_bezier,
-        bezier_smoothing=bezier_smoothing
-    )
+    params = cache_params(color_name, min_contour_length, simplify, use_bezier, bezier_smoothing, fit_error, min_area, min_extent)
+    svg_path = cached(None if show_extracted else cache, 'extract_colored_path', image_path, params, extract)
     
     # Determine output path if not provided
     if output_path is None:
@@ -268,16 +407,236 @@ def extract_colored_path(image_path, color_name, output_path=None, min_contour_l
     
     return svg_path
 
+@staged('convert_image')
+def convert_image(image_path, color_name, output_path, min_contour_length=50, simplify=True, use_bezier=True, bezier_smoothing=0.25, show_extracted=False, width=600, height=420, stroke_color=None, stroke_width=3, tile_height=None, fit_error=None, min_area=0, min_extent=0, centerline=False, estimate_width=False, join_tolerance=None, compact=False, precision=2, lengths=False, split_paths=False, cache=None):
+    """
+    Extract a colored path into an SVG file, streaming it one contour at a time.
+    
+    Args:
+        image_path: Path to the image file
+        color_name: Name of the color to extract
+        output_path: Path to save the SVG file, or '-' for stdout
+        min_contour_length: Minimum length of contours to include
+        simplify: Whether to simplify the contours
+        use_bezier: Whether to use bezier curves
+        bezier_smoothing: Smoothing factor for bezier curves
+        show_extracted: Whether to save the extracted color mask
+        width: Width of the SVG viewBox
+        height: Height of the SVG viewBox
+        stroke_color: Stroke color (defaults to the extracted color)
+        stroke_width: Width of the stroke
+        tile_height: Process the image in strips of this many rows to bound memory (None for the whole image)
+        fit_error: Fit the raw contours with least-squares cubic curves within this many pixels
+            (None for one curve per simplified vertex)
+        min_area: Drop connected components of fewer pixels before tracing
+        min_extent: Drop connected components whose bounding box is shorter than this on both sides before tracing
+        centerline: Whether to trace the centerlines of the strokes as open paths instead of their
+            outlines (not used in tiled mode)
+        estimate_width: Whether to measure the strokes along their centerlines and draw the path
+            with their median width instead of stroke_width (only with centerline)
+        join_tolerance: Order the contours by pen travel and join subpaths that start within this
+            many pixels of where the previous one ended (None to keep them by area, one subpath each)
+        compact: Whether to write compact path data (rounded, relative commands, minimal separators)
+        precision: Decimal places kept by the compact encoding
+        lengths: Whether to write the path length into the SVG (pathLength and data-length attributes)
+        split_paths: Whether to write one <path> per contour, each with its length and offset along the drawing
+        cache: ResultCache to reuse earlier results from (None to always extract);
+            not used with show_extracted or estimate_width, since those need the mask
+        
+    Returns:
+        Tuple of (path data length, beginning of the path data); (0, "") if no contours were found
+    """
+    tile_height, centerline, estimate_width, min_area, min_extent = reconcile_options(
+        tile_height=tile_height,
+        centerline=centerline,
+        estimate_width=estimate_width,
+        min_area=min_area,
+        min_extent=min_extent,
+    )
+    tracer = CenterlineTracer(estimate_width) if centerline else None
+    prefilter = ComponentFilter(min_area, min_extent) if min_area or min_extent else None
+    
+    fitter = CurveFitter(fit_error) if fit_error else None
+    planner = PathPlanner(join_tolerance) if join_tolerance is not None else None
+    
+    def trace():
+        contours = find_color_contours(image_path, color_name, min_contour_length, show_extracted, tile_height, prefilter, tracer)
+        return planner.plan(contours) if planner else contours
+    
+    def to_chunks(contours):
+        chunks = iter_path_data(contours, simplify, use_bezier, bezier_smoothing, fitter, closed=not tracer)
+        return planner.iter_join(chunks) if planner else chunks
+    
+    chunks = cached_path_chunks(
+        None if show_extracted or estimate_width else cache,
+        'extract_colored_path',
+        image_path,
+        cache_params(color_name, min_contour_length, simplify, use_bezier, bezier_smoothing, fit_error, min_area, min_extent, join_tolerance, centerline),
+        trace,
+        to_chunks
+    )
+    
+    if chunks is None:
+        print("No significant contours found.")
+        return 0, ""
+    
+    # Draw the strokes as wide as they were measured
+    if tracer and tracer.stroke_width is not None:
+        stroke_width = tracer.stroke_width
+    
+    # One <path> per contour, each encoded on its own
+    if split_paths:
+        chunks = iter_subpaths(chunks)
+    
+    # Re-encode the path data compactly if requested
+    encoder = PathEncoder(precision) if compact else None
+    if encoder:
+        chunks = encoder.iter_encode(chunks, separate=split_paths)
+    
+    summary = save_svg(chunks, output_path, width, height, stroke_color or color_name, stroke_width, lengths, split_paths)
+    
+    # Nothing is traced or fitted when the result comes from the cache
+    if prefilter and prefilter.components and not is_stdout(output_path):
+        print(prefilter.summary())
+    
+    if tracer and tracer.pixels and not is_stdout(output_path):
+        print(tracer.summary())
+    
+    if planner and planner.subpaths and not is_stdout(output_path):
+        print(planner.summary())
+    
+    if fitter and fitter.points and not is_stdout(output_path):
+        print(fitter.summary())
+    
+    if encoder and not is_stdout(output_path):
+        print(encoder.savings())
+    
+    return summary
+
+@staged('extract_colored_paths')
+def extract_colored_paths(image_path, color_names, output_path=None, min_contour_length=50, simplify=True, use_bezier=True, bezier_smoothing=0.25, show_extracted=False, width=600, height=420, stroke_width=3, fit_error=None, min_area=0, min_extent=0, compact=False, precision=2, lengths=False, cache=None):
+    """
+    Extract paths for several colors from an image into one SVG.
+    
+    Args:
+        image_path: Path to the image file
+        color_names: Names of the colors to extract
+        output_path: Path to save the output SVG
+        min_contour_length: Minimum length of contours to include
+        simplify: Whether to simplify the contours
+        use_bezier: Whether to use bezier curves
+        bezier_smoothing: Smoothing factor for bezier curves
+        show_extracted: Whether to save the extracted color masks
+        width: Width of the SVG viewBox
+        height: Height of the SVG viewBox
+        stroke_width: Width of the stroke
+        fit_error: Fit the raw contours with least-squares cubic curves within this many pixels
+            (None for one curve per simplified vertex)
+        min_area: Drop connected components of fewer pixels before tracing
+        min_extent: Drop connected components whose bounding box is shorter than this on both sides before tracing
+        compact: Whether to write compact path data (rounded, relative commands, minimal separators)
+        precision: Decimal places kept by the compact encoding
+        lengths: Whether to write each color's path length into the SVG (pathLength and data-length attributes)
+        cache: ResultCache to reuse earlier per-color results from (None to always extract);
+            not used with show_extracted, since that needs the masks
+        
+    Returns:
+        Dict mapping each color name to its SVG path data string
+    """
+    color_names = list(dict.fromkeys(color_names))
+    
+    # Look up every color first, so the image is only decoded if one is missing
+    keys, svg_paths = {}, {}
+    if cache is not None and not show_extracted:
+        for color_name in color_names:
+            params = cache_params(color_name, min_contour_length, simplify, use_bezier, bezier_smoothing, fit_error, min_area, min_extent)
+            keys[color_name], svg_paths[color_name] = cache.fetch('extract_colored_path', image_path, params)
+    
+    missing = [color_name for color_name in color_names if svg_paths.get(color_name) is None]
+    masks = extract_colors(image_path, missing) if missing else {}
+    
+    # One prefilter for all colors, so its summary covers them all
+    prefilter = ComponentFilter(min_area, min_extent) if min_area or min_extent else None
+    
+    # Determine output path if not provided
+    if output_path is None:
+        output_path = Path(image_path).with_suffix('.svg')
+    
+    # Progress goes to stderr when the SVG itself is written to stdout
+    log = sys.stderr if is_stdout(output_path) else sys.stdout
+    paths = {}
+    with contextlib.redirect_stdout(log):
+        for color_name in color_names:
+            svg_path = svg_paths.get(color_name)
+            
+            # Save the extracted color mask if requested
+            if show_extracted:
+                mask_path = Path(image_path).with_suffix(f'.{color_name}.mask.png')
+                cv2.imwrite(str(mask_path), masks[color_name])
+                print(f"Extracted {color_name} mask saved to {mask_path}")
+            
+            print(f"{color_name}: ", end="")
+            if svg_path is None:
+                svg_path = contours_to_path(
+                    masks[color_name],
+                    min_contour_length=min_contour_length,
+                    simplify=simplify,
+                    use_bezier=use_bezier,
+                    bezier_smoothing=bezier_smoothing,
+                    fitter=CurveFitter(fit_error) if fit_error else None,
+                    prefilter=prefilter
+                )
+                if color_name in keys:
+                    cache.put(keys[color_name], svg_path)
+            elif not svg_path:
+                print("No significant contours found.")
+            
+            if svg_path and compact:
+                encoder = PathEncoder(precision)
+                svg_path = encoder.encode(svg_path)
+                print(encoder.savings())
+            elif svg_path:
+                print(f"{len(svg_path)} bytes of path data")
+            if svg_path:
+                paths[color_name] = svg_path
+    
+    # Save all colors into one SVG
+    if paths:
+        save_multi_svg(paths, output_path, width, height, stroke_width, lengths)
+    
+    if prefilter and prefilter.components:
+        print(prefilter.summary(), file=log)
+    
+    return paths
+
 def main():
     parser = argparse.ArgumentParser(description='Extract a colored path from an image and convert to SVG')
     parser.add_argument('image_path', type=str, help='Path to the input image')
     parser.add_argument('--color', type=str, default='blue', help='Color to extract (blue, red, green, etc.)')
-    parser.add_argument('--output', type=str, help='Path to save the output SVG', default=None)
+    parser.add_argument('--colors', type=str, default=None, help="Comma-separated colors to extract in one pass into one SVG, or 'all'")
+    parser.add_argument('--output', type=str, help="Path to save the output SVG ('-' for stdout)", default=None)
     parser.add_argument('--min-length', type=int, default=50, help='Minimum length of contours to include')
     parser.add_argument('--no-simplify', action='store_true', help='Disable contour simplification')
     parser.add_argument('--no-bezier', action='store_true', help='Disable bezier curves')
     parser.add_argument('--bezier-smoothing', type=float, default=0.25, help='Bezier curve smoothing factor (0-1)')
+    parser.add_argument('--fit-error', type=float, default=None, help='Fit the raw contours with as few cubic curves as keep within this many pixels (e.g. 2), instead of one curve per simplified vertex')
+    parser.add_argument('--min-area', type=int, default=0, help='Drop connected components of fewer pixels before tracing')
+    parser.add_argument('--min-extent', type=int, default=0, help='Drop connected components whose bounding box is shorter than this many pixels on both sides before tracing')
     parser.add_argument('--show-extracted', action='store_true', help='Save the extracted color mask')
+    parser.add_argument('--tile-height', type=int, default=None, help='Process the image in strips of this many rows to bound memory use (single color)')
+    parser.add_argument('--join-paths', type=float, nargs='?', const=DEFAULT_TOLERANCE, default=None, metavar='PX',
+                        help=f'Order the contours by pen travel instead of by area and join those starting within PX pixels (default {DEFAULT_TOLERANCE:g}) of where the previous one ended (single color)')
+    parser.add_argument('--centerline', action='store_true', help='Trace the centerline of every stroke as an open path instead of its outline (single color)')
+    parser.add_argument('--estimate-width', action='store_true', help='With --centerline, measure the strokes and draw the path with their median width instead of --stroke-width (single color)')
+    parser.add_argument('--compact', action='store_true', help='Write compact path data: rounded coordinates, relative commands, no redundant characters')
+    parser.add_argument('--precision', type=int, default=2, help='Decimal places kept with --compact')
+    parser.add_argument('--lengths', action='store_true', help='Write the path length into the SVG (pathLength and data-length) so pages need not measure it')
+    parser.add_argument('--split-paths', action='store_true', help='Write one <path> per contour with its length and its offset along the drawing (single color)')
+    parser.add_argument('--cache', action='store_true', help='Reuse results of earlier identical extractions (stored in $SVGTRACE_CACHE_DIR or ~/.cache/svgtrace)')
+    parser.add_argument('--cache-dir', type=str, default=None, help='Cache directory (implies --cache)')
+    parser.add_argument('--cache-size', type=int, default=256, help='Maximum cache size on disk in MB')
+    parser.add_argument('--profile', action='store_true', help='Print a one-line summary of the time, memory and contours of each stage')
+    parser.add_argument('--profile-output', type=str, default=None, help='Save a Chrome trace of the stages as JSON (implies --profile)')
     parser.add_argument('--width', type=int, default=600, help='Width of the SVG viewBox')
     parser.add_argument('--height', type=int, default=420, help='Height of the SVG viewBox')
     parser.add_argument('--stroke-color', type=str, default=None, help='Stroke color for the SVG path (defaults to extraction color)')
@@ -291,25 +650,84 @@ def main():
     else:
         output_path = Path(args.output)
     
-    # Extract the colored path
-    svg_path = extract_colored_path(
-        args.image_path,
-        args.color,
-        output_path,
-        min_contour_length=args.min_length,
-        simplify=not args.no_simplify,
-        use_bezier=not args.no_bezier,
-        bezier_smoothing=args.bezier_smoothing,
-        show_extracted=args.show_extracted
-    )
-    
-    if svg_path:
-        # Determine stroke color
-        stroke_color = args.stroke_color or args.color
-        
-        # Save the SVG
-        save_svg(svg_path, output_path, args.width, args.height, stroke_color, args.stroke_width)
-        print(f"Path data: {svg_path[:100]}..." if len(svg_path) > 100 else svg_path)
+    cache = ResultCache(args.cache_dir, args.cache_size * 1024 * 1024) if args.cache or args.cache_dir else None
+    
+    profiler_context = profiling() if args.profile or args.profile_output else contextlib.nullcontext()
+    
+    with profiler_context as profiler:
+        # Extract several colors in one pass
+        if args.colors:
+            color_names = ALL_COLORS if args.colors == 'all' else [c.strip() for c in args.colors.split(',') if c.strip()]
+            single_color_options = [
+                (args.tile_height, '--tile-height'),
+                (args.centerline, '--centerline'),
+                (args.estimate_width, '--estimate-width'),
+                (args.join_paths is not None, '--join-paths'),
+                (args.split_paths, '--split-paths'),
+                (args.stroke_color, '--stroke-color'),
+            ]
+            for used, flag in single_color_options:
+                if used:
+                    notice(f"{flag} is not used with --colors")
+            extract_colored_paths(
+                args.image_path,
+                color_names,
+                output_path,
+                min_contour_length=args.min_length,
+                simplify=not args.no_simplify,
+                use_bezier=not args.no_bezier,
+                bezier_smoothing=args.bezier_smoothing,
+                show_extracted=args.show_extracted,
+                width=args.width,
+                height=args.height,
+                stroke_width=args.stroke_width,
+                fit_error=args.fit_error,
+                min_area=args.min_area,
+                min_extent=args.min_extent,
+                compact=args.compact,
+                precision=args.precision,
+                lengths=args.lengths,
+                cache=cache
+            )
+            path_length = 0
+        else:
+            # Extract the colored path and save it
+            path_length, preview = convert_image(
+                args.image_path,
+                args.color,
+                output_path,
+                min_contour_length=args.min_length,
+                simplify=not args.no_simplify,
+                use_bezier=not args.no_bezier,
+                bezier_smoothing=args.bezier_smoothing,
+                show_extracted=args.show_extracted,
+                width=args.width,
+                height=args.height,
+                stroke_color=args.stroke_color,
+                stroke_width=args.stroke_width,
+                tile_height=args.tile_height,
+                fit_error=args.fit_error,
+                min_area=args.min_area,
+                min_extent=args.min_extent,
+                centerline=args.centerline,
+                estimate_width=args.estimate_width,
+                join_tolerance=args.join_paths,
+                compact=args.compact,
+                precision=args.precision,
+                lengths=args.lengths,
+                split_paths=args.split_paths,
+                cache=cache
+            )
+    
+    if path_length and not is_stdout(output_path):
+        print(format_preview(path_length, preview))
+    
+    if cache and not is_stdout(output_path):
+        print(cache.stats())
+    
+    # Keep stdout clean when the SVG is written there
+    if profiler:
+        profiler.report(args.profile_output, file=sys.stderr if is_stdout(output_path) else None)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
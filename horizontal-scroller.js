@@ -21,6 +21,14 @@ const ANIMATION_CONFIG = {
   animationScale: 0.9,
 };
 
+// Length of a path for the stroke-dash animation. The SVG converters can
+// store it in data-length (--lengths / --split-paths), which spares the
+// layout-time getTotalLength() measurement.
+function getPathLength(path) {
+  const storedLength = parseFloat(path.getAttribute("data-length"));
+  return storedLength > 0 ? storedLength : path.getTotalLength();
+}
+
 class HorizontalScroller {
   constructor(options = {}) {
     // Default options
@@ -419,9 +427,22 @@ class HorizontalScroller {
           svgDelay = parseFloat(svg.getAttribute("data-delay")) || 0;
         }
 
+        // Paths split per contour (--split-paths) carry their offset along
+        // the whole drawing, and are drawn one after another as one path
+        const svgLength = [...paths].reduce(
+          (end, path) =>
+            Math.max(
+              end,
+              parseFloat(path.getAttribute("data-offset")) +
+                parseFloat(path.getAttribute("data-length")) || 0
+            ),
+          0
+        );
+
         paths.forEach((path, pathIndex) => {
           if (path.getTotalLength) {
-            const totalLength = path.getTotalLength();
+            const totalLength = getPathLength(path);
+            const offset = parseFloat(path.getAttribute("data-offset"));
 
             // FORCE initial state - completely undrawn, override any CSS
             path.style.strokeDasharray = `${totalLength} ${totalLength}`;
@@ -441,6 +462,15 @@ class HorizontalScroller {
               totalLength,
               speed: svgSpeed, // Each path gets speed from its parent SVG
               delay: svgDelay, // Delay offset in pixels from parent SVG
+              // Share of the parent SVG's drawing, for split paths
+              drawingShare:
+                svgLength > 0 && !isNaN(offset)
+                  ? {
+                      start: offset / svgLength,
+                      end: (offset + totalLength) / svgLength,
+                      last: offset + totalLength >= svgLength,
+                    }
+                  : null,
             });
 
             globalPathIndex++;
@@ -460,15 +490,24 @@ class HorizontalScroller {
       const delayProgress =
         this.maxScroll > 0 ? pathData.delay / this.maxScroll : 0;
 
-      const startProgress = currentProgress + delayProgress;
-      const endProgress = startProgress + pathDuration;
+      let startProgress = currentProgress + delayProgress;
+      let endProgress = startProgress + pathDuration;
+
+      // Split paths draw their part of the SVG's duration, in order along the drawing
+      const share = pathData.drawingShare;
+      if (share) {
+        startProgress = currentProgress + delayProgress + pathDuration * share.start;
+        endProgress = currentProgress + delayProgress + pathDuration * share.end;
+      }
 
       // Ensure bounds
       pathData.startProgress = Math.min(startProgress, 0.95);
       pathData.endProgress = Math.min(endProgress, 1.0);
 
       // Move to next position (continuous drawing, but don't include delay in next position)
-      currentProgress = currentProgress + pathDuration;
+      if (!share || share.last) {
+        currentProgress = currentProgress + pathDuration;
+      }
 
       console.log(
         `Path ${index + 1}: speed=${pathData.speed}, delay=${
@@ -927,7 +966,7 @@ document.addEventListener("DOMContentLoaded", () => {
   const allPaths = document.querySelectorAll("path");
   allPaths.forEach((path) => {
     if (path.getTotalLength) {
-      const totalLength = path.getTotalLength();
+      const totalLength = getPathLength(path);
       // Force complete reset
       path.style.strokeDasharray = `${totalLength} ${totalLength}`;
       path.style.strokeDashoffset = `${totalLength}px`;
@@ -1,111 +1,292 @@
-import cv2
-import numpy as np
 import argparse
+import contextlib
+import sys
 from pathlib import Path
 
-def image_to_svg_path(image_path, threshold_value=127, min_contour_length=100, smoothing=True):
+from svgtrace import svgwriter
+from svgtrace.cache import ResultCache, cached, cached_path_chunks
+from svgtrace.components import ComponentFilter
+from svgtrace.decode import is_stdin
+from svgtrace.encode import PathEncoder
+from svgtrace.instrument import profiling, stage, staged
+from svgtrace.measure import iter_subpaths
+from svgtrace.options import reconcile_options
+from svgtrace.order import DEFAULT_TOLERANCE, PathPlanner
+from svgtrace.pipeline import decode_image, find_contours, fit_to_viewbox, iter_path_data, threshold_image, to_gray
+from svgtrace.pyramid import find_contours_pyramid
+from svgtrace.serialize import polylines_to_path
+from svgtrace.svgwriter import format_preview, is_stdout
+from svgtrace.tiling import find_contours_tiled, open_image
+
+def find_image_contours(image_path, threshold_value=127, min_contour_length=100, smoothing=True, tile_height=None, prefilter=None, pyramid_levels=None, fit_size=None, fast_decode=False):
     """
-    Convert an image to an SVG path.
+    Threshold an image and trace its contours.
     
     Args:
         image_path: Path to the image file
         threshold_value: Value for binary thresholding (0-255)
         min_contour_length: Minimum length of contours to include
         smoothing: Whether to apply smoothing to the contours
+        tile_height: Process the image in strips of this many rows to bound memory (None for the whole image)
+        prefilter: ComponentFilter that drops small connected components before tracing
+            (None to trace the whole mask; not used in tiled mode)
+        pyramid_levels: Find the contours on a copy halved this many times first and
+            threshold and trace at full resolution only around them (None to trace the whole
+            image; not used in tiled mode)
+        fit_size: (width, height) of a viewBox to resize the image to fit before tracing
+            (None to trace at the image's own size; not used in tiled mode)
+        fast_decode: Decode JPEGs straight to grayscale, shrunk while decoding when fit_size is
+            much smaller than the image
         
     Returns:
-        SVG path data string
+        ContourSet of the contours, largest area first
     """
-    # Read the image
-    img = cv2.imread(str(image_path))
-    if img is None:
-        raise ValueError(f"Could not read image at {image_path}")
-    
-    # Convert to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    
-    # Apply Gaussian blur to reduce noise
-    if smoothing:
-        gray = cv2.GaussianBlur(gray, (5, 5), 0)
-    
-    # Apply binary threshold
-    _, binary = cv2.threshold(gray, threshold_value, 255, cv2.THRESH_BINARY_INV)
-    
-    # Find contours
-    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    
-    # Filter out small contours
-    contours = [c for c in contours if cv2.arcLength(c, False) > min_contour_length]
+    # Blur and threshold so dark strokes become the foreground
+    mask_fn = lambda strip: threshold_image(to_gray(strip), threshold_value, smoothing)
     
-    # Sort contours by area (largest first)
-    contours = sorted(contours, key=cv2.contourArea, reverse=True)
+    # Find, filter and sort contours, strip by strip in tiled mode
+    if tile_height:
+        return find_contours_tiled(open_image(image_path, fast_decode), mask_fn, tile_height, 2, min_contour_length)
+    img = decode_image(image_path, fast_decode, fit_size=fit_size)
+    if fit_size:
+        img = fit_to_viewbox(img, *fit_size)
+    if pyramid_levels:
+        return find_contours_pyramid(to_gray(img), threshold_value, smoothing, min_contour_length, pyramid_levels)
+    return find_contours(mask_fn(img), min_contour_length, prefilter)
+
+def cache_params(threshold_value=127, min_contour_length=100, smoothing=True, min_area=0, min_extent=0, pyramid_levels=None, fit_size=None, fast_decode=False, join_tolerance=None):
+    """
+    Parameters that identify a cached result (the tile height never changes it).
+    """
+    params = {'threshold': threshold_value, 'min_length': min_contour_length, 'smoothing': smoothing}
+    if min_area or min_extent:
+        params.update(min_area=min_area, min_extent=min_extent)
+    if pyramid_levels:
+        params.update(pyramid=pyramid_levels)
+    if fit_size:
+        params.update(fit_viewbox=list(fit_size))
+    if fast_decode:
+        params.update(fast_decode=True)
+    if join_tolerance is not None:
+        params.update(join=join_tolerance)
+    return params
+
+@staged('image_to_svg_path')
+def image_to_svg_path(image_path, threshold_value=127, min_contour_length=100, smoothing=True, tile_height=None, min_area=0, min_extent=0, pyramid_levels=None, cache=None):
+    """
+    Convert an image to an SVG path.
     
-    if not contours:
-        print("No significant contours found. Try adjusting the threshold value.")
-        return ""
+    Args:
+        image_path: Path to the image file
+        threshold_value: Value for binary thresholding (0-255)
+        min_contour_length: Minimum length of contours to include
+        smoothing: Whether to apply smoothing to the contours
+        tile_height: Process the image in strips of this many rows to bound memory (None for the whole image)
+        min_area: Drop connected components of fewer pixels before tracing
+        min_extent: Drop connected components whose bounding box is shorter than this on both sides before tracing
+        pyramid_levels: Trace coarse to fine, halving the image this many times for the coarse pass
+            (None to trace at full resolution only; not used in tiled mode)
+        cache: ResultCache to reuse earlier results from (None to always convert)
+        
+    Returns:
+        SVG path data string
+    """
+    tile_height, min_area, min_extent, pyramid_levels = reconcile_options(tile_height=tile_height, min_area=min_area, min_extent=min_extent, pyramid_levels=pyramid_levels)
     
-    # Create SVG path data
-    svg_path_data = ""
-    for contour in contours:
-        # Start a new subpath
-        svg_path_data += f"M{contour[0][0][0]},{contour[0][0][1]}"
+    def convert():
+        prefilter = ComponentFilter(min_area, min_extent) if min_area or min_extent else None
+        contours = find_image_contours(image_path, threshold_value, min_contour_length, smoothing, tile_height, prefilter, pyramid_levels)
         
-        # Add line segments
-        for point in contour[1:]:
-            x, y = point[0]
-            svg_path_data += f" L{x},{y}"
+        if not contours:
+            print("No significant contours found. Try adjusting the threshold value.")
+            return ""
+        
+        # Create SVG path data, one subpath of line segments per contour
+        with stage('serialize'):
+            return polylines_to_path(contours)
     
-    return svg_path_data
+    params = cache_params(threshold_value, min_contour_length, smoothing, min_area, min_extent, pyramid_levels)
+    return cached(cache, 'image_to_svg', image_path, params, convert)
 
-def save_svg(path_data, output_path, width=600, height=420):
+def save_svg(path_data, output_path, width=600, height=420, lengths=False, split=False):
     """
     Save path data as an SVG file.
     
     Args:
-        path_data: SVG path data string
-        output_path: Path to save the SVG file
+        path_data: SVG path data string, or an iterable of path data chunks to stream
+        output_path: Path to save the SVG file, or '-' for stdout
         width: Width of the SVG viewBox
         height: Height of the SVG viewBox
+        lengths: Whether to write the path's length as pathLength and data-length attributes
+        split: Write one <path> per chunk, each with its length and offset along the drawing
+        
+    Returns:
+        Tuple of (path data length, beginning of the path data)
+    """
+    return svgwriter.save_svg(path_data, output_path, width, height, svgwriter.stroke_attributes(), lengths, split)
+
+@staged('convert_image')
+def convert_image(image_path, output_path, threshold_value=127, min_contour_length=100, smoothing=True, width=600, height=420, tile_height=None, min_area=0, min_extent=0, pyramid_levels=None, fit_viewbox=False, fast_decode=False, join_tolerance=None, compact=False, precision=2, lengths=False, split_paths=False, cache=None):
     """
-    svg_content = f"""<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}">
-    <path d="{path_data}" fill="none" stroke="navy" stroke-width="3"/>
-</svg>"""
+    Convert an image to an SVG file, streaming the path one contour at a time.
     
-    with open(output_path, 'w') as f:
-        f.write(svg_content)
+    Args:
+        image_path: Path to the image file
+        output_path: Path to save the SVG file, or '-' for stdout
+        threshold_value: Value for binary thresholding (0-255)
+        min_contour_length: Minimum length of contours to include
+        smoothing: Whether to apply smoothing to the contours
+        width: Width of the SVG viewBox
+        height: Height of the SVG viewBox
+        tile_height: Process the image in strips of this many rows to bound memory (None for the whole image)
+        min_area: Drop connected components of fewer pixels before tracing
+        min_extent: Drop connected components whose bounding box is shorter than this on both sides before tracing
+        pyramid_levels: Trace coarse to fine, halving the image this many times for the coarse pass
+            (None to trace at full resolution only; not used in tiled mode)
+        fit_viewbox: Whether to shrink (or enlarge) the image to fit the viewBox before tracing, so the
+            path coordinates are viewBox units (not used in tiled mode)
+        fast_decode: Decode JPEGs straight to grayscale, shrunk while decoding when fitting a much
+            smaller viewBox (gray levels differ slightly from converting the color image)
+        join_tolerance: Order the contours by pen travel and join subpaths that start within this
+            many pixels of where the previous one ended (None to keep them by area, one subpath each)
+        compact: Whether to write compact path data (rounded, relative commands, minimal separators)
+        precision: Decimal places kept by the compact encoding
+        lengths: Whether to write the path length into the SVG (pathLength and data-length attributes)
+        split_paths: Whether to write one <path> per contour, each with its length and offset along the drawing
+        cache: ResultCache to reuse earlier results from (None to always convert)
+        
+    Returns:
+        Tuple of (path data length, beginning of the path data); (0, "") if no contours were found
+    """
+    tile_height, min_area, min_extent, pyramid_levels, fit_viewbox = reconcile_options(
+        tile_height=tile_height,
+        min_area=min_area,
+        min_extent=min_extent,
+        pyramid_levels=pyramid_levels,
+        fit_viewbox=fit_viewbox,
+    )
+    prefilter = ComponentFilter(min_area, min_extent) if min_area or min_extent else None
+    fit_size = (width, height) if fit_viewbox else None
+    planner = PathPlanner(join_tolerance) if join_tolerance is not None else None
+    
+    def trace():
+        contours = find_image_contours(image_path, threshold_value, min_contour_length, smoothing, tile_height, prefilter, pyramid_levels, fit_size, fast_decode)
+        return planner.plan(contours) if planner else contours
+    
+    def to_chunks(contours):
+        chunks = iter_path_data(contours, simplify=False, use_bezier=False)
+        return planner.iter_join(chunks) if planner else chunks
+    
+    chunks = cached_path_chunks(
+        cache,
+        'image_to_svg',
+        image_path,
+        cache_params(threshold_value, min_contour_length, smoothing, min_area, min_extent, pyramid_levels, fit_size, fast_decode, join_tolerance),
+        trace,
+        to_chunks
+    )
+    
+    if chunks is None:
+        print("No significant contours found. Try adjusting the threshold value.")
+        return 0, ""
+    
+    # One <path> per contour, each encoded on its own
+    if split_paths:
+        chunks = iter_subpaths(chunks)
+    
+    # Re-encode the path data compactly if requested
+    encoder = PathEncoder(precision) if compact else None
+    if encoder:
+        chunks = encoder.iter_encode(chunks, separate=split_paths)
+    
+    summary = save_svg(chunks, output_path, width, height, lengths, split_paths)
+    
+    # Nothing is traced when the result comes from the cache
+    if prefilter and prefilter.components and not is_stdout(output_path):
+        print(prefilter.summary())
     
-    print(f"SVG saved to {output_path}")
+    if planner and planner.subpaths and not is_stdout(output_path):
+        print(planner.summary())
+    
+    if encoder and not is_stdout(output_path):
+        print(encoder.savings())
+    
+    return summary
 
 def main():
     parser = argparse.ArgumentParser(description='Convert an image to an SVG path')
-    parser.add_argument('image_path', type=str, help='Path to the input image')
-    parser.add_argument('--output', type=str, help='Path to save the output SVG', default=None)
+    parser.add_argument('image_path', type=str, help="Path to the input image ('-' for stdin)")
+    parser.add_argument('--output', type=str, help="Path to save the output SVG ('-' for stdout, the default when reading stdin)", default=None)
     parser.add_argument('--threshold', type=int, default=127, help='Threshold value for binary conversion (0-255)')
     parser.add_argument('--min_length', type=int, default=100, help='Minimum length of contours to include')
     parser.add_argument('--width', type=int, default=600, help='Width of the SVG viewBox')
     parser.add_argument('--height', type=int, default=420, help='Height of the SVG viewBox')
     parser.add_argument('--no_smooth', action='store_true', help='Disable smoothing')
+    parser.add_argument('--min_area', type=int, default=0, help='Drop connected components of fewer pixels before tracing')
+    parser.add_argument('--min_extent', type=int, default=0, help='Drop connected components whose bounding box is shorter than this many pixels on both sides before tracing')
+    parser.add_argument('--pyramid', type=int, nargs='?', const=2, default=None, metavar='LEVELS',
+                        help='Find the contours on a copy of the image halved LEVELS times (default 2) first, then threshold and trace at full resolution only around them')
+    parser.add_argument('--fit_viewbox', action='store_true', help='Resize the image to fit the viewBox before tracing, so path coordinates are in viewBox units')
+    parser.add_argument('--fast_decode', action='store_true', help='Decode JPEGs straight to grayscale, and shrunk while decoding with --fit_viewbox (slightly different gray levels)')
+    parser.add_argument('--join_paths', type=float, nargs='?', const=DEFAULT_TOLERANCE, default=None, metavar='PX',
+                        help=f'Order the contours by pen travel instead of by area and join those starting within PX pixels (default {DEFAULT_TOLERANCE:g}) of where the previous one ended')
+    parser.add_argument('--compact', action='store_true', help='Write compact path data: rounded coordinates, relative commands, no redundant characters')
+    parser.add_argument('--precision', type=int, default=2, help='Decimal places kept with --compact')
+    parser.add_argument('--lengths', action='store_true', help='Write the path length into the SVG (pathLength and data-length) so pages need not measure it')
+    parser.add_argument('--split_paths', action='store_true', help='Write one <path> per contour with its length and its offset along the drawing')
+    parser.add_argument('--tile_height', type=int, default=None, help='Process the image in strips of this many rows to bound memory use')
+    parser.add_argument('--cache', action='store_true', help='Reuse results of earlier identical conversions (stored in $SVGTRACE_CACHE_DIR or ~/.cache/svgtrace)')
+    parser.add_argument('--cache_dir', type=str, default=None, help='Cache directory (implies --cache)')
+    parser.add_argument('--cache_size', type=int, default=256, help='Maximum cache size on disk in MB')
+    parser.add_argument('--profile', action='store_true', help='Print a one-line summary of the time, memory and contours of each stage')
+    parser.add_argument('--profile_output', type=str, default=None, help='Save a Chrome trace of the stages as JSON (implies --profile)')
     
     args = parser.parse_args()
     
     # Determine output path
     if args.output is None:
         input_path = Path(args.image_path)
-        output_path = input_path.with_suffix('.svg')
+        output_path = input_path if is_stdin(input_path) else input_path.with_suffix('.svg')
     else:
         output_path = Path(args.output)
     
-    # Convert image to SVG path
-    path_data = image_to_svg_path(
-        args.image_path, 
-        threshold_value=args.threshold,
-        min_contour_length=args.min_length,
-        smoothing=not args.no_smooth
-    )
+    cache = ResultCache(args.cache_dir, args.cache_size * 1024 * 1024) if args.cache or args.cache_dir else None
+    
+    profiler_context = profiling() if args.profile or args.profile_output else contextlib.nullcontext()
+    
+    # Convert image to SVG path and save it
+    with profiler_context as profiler:
+        path_length, preview = convert_image(
+            args.image_path,
+            output_path,
+            threshold_value=args.threshold,
+            min_contour_length=args.min_length,
+            smoothing=not args.no_smooth,
+            width=args.width,
+            height=args.height,
+            tile_height=args.tile_height,
+            min_area=args.min_area,
+            min_extent=args.min_extent,
+            pyramid_levels=args.pyramid,
+            fit_viewbox=args.fit_viewbox,
+            fast_decode=args.fast_decode,
+            join_tolerance=args.join_paths,
+            compact=args.compact,
+            precision=args.precision,
+            lengths=args.lengths,
+            split_paths=args.split_paths,
+            cache=cache
+        )
+    
+    if path_length and not is_stdout(output_path):
+        print(format_preview(path_length, preview))
+    
+    if cache and not is_stdout(output_path):
+        print(cache.stats())
     
-    if path_data:
-        save_svg(path_data, output_path, args.width, args.height)
-        print(f"Path data: {path_data[:100]}..." if len(path_data) > 100 else path_data)
+    # Keep stdout clean when the SVG is written there
+    if profiler:
+        profiler.report(args.profile_output, file=sys.stderr if is_stdout(output_path) else None)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,159 +1,235 @@
-import cv2
-import numpy as np
 import argparse
+import contextlib
+import sys
 from pathlib import Path
-import math
 
-def simplify_contour(contour, epsilon_factor=0.0025):
-    """
-    Simplify a contour using the Douglas-Peucker algorithm.
-    
-    Args:
-        contour: The contour to simplify
-        epsilon_factor: Factor to determine epsilon based on contour length
-        
-    Returns:
-        Simplified contour
-    """
-    epsilon = epsilon_factor * cv2.arcLength(contour, True)
-    return cv2.approxPolyDP(contour, epsilon, True)
+from svgtrace import svgwriter
+# Defined in this script before svgtrace existed, and still importable from it
+from svgtrace.bezier import points_to_bezier
+from svgtrace.cache import ResultCache, cached, cached_path_chunks
+from svgtrace.components import ComponentFilter
+from svgtrace.decode import is_stdin
+from svgtrace.encode import PathEncoder
+from svgtrace.fit import CurveFitter
+from svgtrace.instrument import profiling, stage, staged
+from svgtrace.lazy import lazy_import
+from svgtrace.measure import iter_subpaths
+from svgtrace.options import notice, reconcile_options
+from svgtrace.order import DEFAULT_TOLERANCE, PathPlanner
+from svgtrace.pipeline import (
+    contours_to_path_data,
+    enhance,
+    find_contours,
+    fit_to_viewbox,
+    decode_image,
+    iter_path_data,
+    simplify_contour,
+    threshold_image,
+    to_gray,
+)
+from svgtrace.pyramid import find_contours_pyramid
+from svgtrace.simplify import DEFAULT_LEVELS, SimplificationIndex, level_path, parse_levels
+from svgtrace.skeleton import CenterlineTracer
+from svgtrace.svgwriter import format_preview, is_stdout
+from svgtrace.tiling import find_contours_tiled, open_image
+
+cv2 = lazy_import('cv2')
+
+__all__ = [
+    'EDGE_TILE_CONTEXT', 'THRESHOLD_TILE_CONTEXT',
+    'cache_params', 'convert_image', 'enhance_image', 'image_array_to_contours', 'image_array_to_svg_path',
+    'image_to_svg_path', 'main', 'points_to_bezier', 'save_svg', 'simplify_contour',
+]
 
-def points_to_bezier(points, smoothing=0.25):
+# Rows of context each strip needs in tiled mode: the 5x5 blur reaches 2 rows,
+# edge detection adds Canny's Sobel and suppression steps and the dilation
+THRESHOLD_TILE_CONTEXT = 2
+EDGE_TILE_CONTEXT = 8
+
+def image_array_to_contours(img, threshold_value=127, min_contour_length=50, smoothing=True, binary=False, edge_detection=False, tile_height=None, prefilter=None, pyramid_levels=None, centerline=None):
     """
-    Convert a series of points to a smooth bezier path.
+    Build the mask of an image array and trace its contours.
     
     Args:
-        points: List of (x, y) coordinates
-        smoothing: Smoothing factor (0-1)
+        img: BGR, grayscale or binary image array
+        threshold_value: Value for binary thresholding (0-255)
+        min_contour_length: Minimum length of contours to include
+        smoothing: Whether to apply smoothing to the contours
+        binary: Whether img is already a binary mask (skips blur and threshold)
+        edge_detection: Whether to build the mask with edge detection instead of thresholding
+        tile_height: Process the image in strips of this many rows to bound memory (None for the whole image)
+        prefilter: ComponentFilter that drops small connected components before tracing
+            (None to trace the whole mask; not used in tiled mode)
+        pyramid_levels: Find the contours on a copy halved this many times first and
+            threshold and trace at full resolution only around them (None to trace the whole
+            image; only used when thresholding the whole image)
+        centerline: CenterlineTracer that traces the centerlines of the strokes as open
+            polylines instead of their outlines (None to trace outlines; not used in tiled mode)
         
     Returns:
-        SVG path string with bezier curves
+        ContourSet of the contours, largest area first (centerlines longest first)
     """
-    if len(points) < 2:
-        return ""
-    
-    # Start path
-    path = f"M{points[0][0]},{points[0][1]}"
+    # Coarse to fine tracing of the thresholded image
+    if pyramid_levels and not (binary or edge_detection or tile_height or centerline):
+        return find_contours_pyramid(to_gray(img), threshold_value, smoothing, min_contour_length, pyramid_levels)
     
-    if len(points) == 2:
-        # Just a straight line
-        return path + f" L{points[1][0]},{points[1][1]}"
+    # Choose how the mask is built and how many neighbouring rows that needs
+    if binary:
+        mask_fn, context = (lambda strip: strip), 0
+    elif edge_detection:
+        # Canny's hysteresis is not strictly local, so strips can differ slightly at seams
+        mask_fn, context = (lambda strip: enhance(strip, edge_detection=True)), EDGE_TILE_CONTEXT
+    else:
+        mask_fn, context = (lambda strip: threshold_image(to_gray(strip), threshold_value, smoothing)), THRESHOLD_TILE_CONTEXT
     
-    # Calculate control points for each segment
-    for i in range(1, len(points) - 1):
-        p0 = points[i - 1]
-        p1 = points[i]
-        p2 = points[i + 1]
-        
-        # Calculate distance between points
-        d1 = math.sqrt((p1[0] - p0[0]) ** 2 + (p1[1] - p0[1]) ** 2)
-        d2 = math.sqrt((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2)
-        
-        # Determine control point length (smoothing factor applied)
-        d1_smooth = d1 * smoothing
-        d2_smooth = d2 * smoothing
-        
-        # Calculate unit vectors
-        if d1 > 0:
-            v1x = (p1[0] - p0[0]) / d1
-            v1y = (p1[1] - p0[1]) / d1
-        else:
-            v1x, v1y = 0, 0
-            
-        if d2 > 0:
-            v2x = (p2[0] - p1[0]) / d2
-            v2y = (p2[1] - p1[1]) / d2
-        else:
-            v2x, v2y = 0, 0
-        
-        # Control points
-        c1x = p1[0] - v1x * d1_smooth
-        c1y = p1[1] - v1y * d1_smooth
-        c2x = p1[0] + v2x * d2_smooth
-        c2y = p1[1] + v2y * d2_smooth
-        
-        # Add curve segment
-        if i == 1:
-            # First segment - include the first point
-            path += f" C{c1x},{c1y} {c2x},{c2y} {p2[0]},{p2[1]}"
-        else:
-            # Subsequent segments - use shorthand for first control point
-            path += f" S{c2x},{c2y} {p2[0]},{p2[1]}"
-            
-    return path
+    # Find, filter and sort contours
+    if tile_height:
+        return find_contours_tiled(img, mask_fn, tile_height, context, min_contour_length)
+    if centerline:
+        return centerline.trace(mask_fn(img), min_contour_length)
+    return find_contours(mask_fn(img), min_contour_length, prefilter)
 
-def image_to_svg_path(image_path, threshold_value=127, min_contour_length=50, smoothing=True, use_bezier=True, bezier_smoothing=0.25, simplify=True):
+def image_array_to_svg_path(img, threshold_value=127, min_contour_length=50, smoothing=True, use_bezier=True, bezier_smoothing=0.25, simplify=True, binary=False, edge_detection=False, tile_height=None, fit_error=None, min_area=0, min_extent=0, pyramid_levels=None, centerline=False):
     """
-    Convert an image to an SVG path with advanced options.
+    Convert an image array to an SVG path with advanced options.
     
     Args:
-        image_path: Path to the image file
+        img: BGR, grayscale or binary image array
         threshold_value: Value for binary thresholding (0-255)
         min_contour_length: Minimum length of contours to include
         smoothing: Whether to apply smoothing to the contours
         use_bezier: Whether to use bezier curves for smoother paths
         bezier_smoothing: Smoothing factor for bezier curves (0-1)
         simplify: Whether to simplify contours
+        binary: Whether img is already a binary mask (skips blur and threshold)
+        edge_detection: Whether to build the mask with edge detection instead of thresholding
+        tile_height: Process the image in strips of this many rows to bound memory (None for the whole image)
+        fit_error: Fit the raw contours with least-squares cubic curves within this many pixels
+            (None for one curve per simplified vertex)
+        min_area: Drop connected components of fewer pixels before tracing
+        min_extent: Drop connected components whose bounding box is shorter than this on both sides before tracing
+        pyramid_levels: Trace coarse to fine, halving the image this many times for the coarse pass
+            (None to trace at full resolution only)
+        centerline: Whether to trace the centerlines of the strokes as open paths instead of their outlines
         
     Returns:
         SVG path data string
     """
-    # Read the image
-    img = cv2.imread(str(image_path))
-    if img is None:
-        raise ValueError(f"Could not read image at {image_path}")
+    prefilter = ComponentFilter(min_area, min_extent) if min_area or min_extent else None
+    tracer = CenterlineTracer() if centerline else None
+    contours = image_array_to_contours(img, threshold_value, min_contour_length, smoothing, binary, edge_detection, tile_height, prefilter, pyramid_levels, tracer)
     
-    # Convert to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    if not contours:
+        print("No significant contours found. Try adjusting the threshold value.")
+        return ""
     
-    # Apply Gaussian blur to reduce noise
-    if smoothing:
-        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    # Create SVG path data
+    fitter = CurveFitter(fit_error) if fit_error else None
+    return contours_to_path_data(contours, simplify, use_bezier, bezier_smoothing, fitter, closed=not tracer)
+
+def cache_params(threshold_value=127, min_contour_length=50, smoothing=True, use_bezier=True, bezier_smoothing=0.25, simplify=True, edge_detection=False, tile_height=None, fit_error=None, min_area=0, min_extent=0, pyramid_levels=None, fit_size=None, fast_decode=False, join_tolerance=None, centerline=False):
+    """
+    Parameters that identify a cached result, leaving out settings that don't affect it.
+    """
+    params = {
+        # The edge mask ignores the threshold and smoothing settings
+        'mask': 'edges' if edge_detection else 'threshold',
+        'threshold': None if edge_detection else threshold_value,
+        'smoothing': None if edge_detection else smoothing,
+        'min_length': min_contour_length,
+        'epsilon': 0.0025 if simplify else None,
+        'bezier_smoothing': bezier_smoothing if use_bezier else None,
+        # Only tiled edge detection can differ from the whole-image result
+        'tile_height': tile_height if edge_detection else None,
+    }
     
-    # Apply binary threshold
-    _, binary = cv2.threshold(gray, threshold_value, 255, cv2.THRESH_BINARY_INV)
+    # Fitted curves replace simplification and bezier smoothing
+    if fit_error:
+        params.update(epsilon=None, bezier_smoothing=None, fit_error=fit_error)
     
-    # Find contours
-    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    # Dropping components before tracing can remove contours longer than the minimum length
+    if min_area or min_extent:
+        params.update(min_area=min_area, min_extent=min_extent)
     
-    # Filter out small contours
-    contours = [c for c in contours if cv2.arcLength(c, False) > min_contour_length]
+    # The coarse pass can miss contours close to the minimum length
+    if pyramid_levels:
+        params.update(pyramid=pyramid_levels)
     
-    # Sort contours by area (largest first)
-    contours = sorted(contours, key=cv2.contourArea, reverse=True)
+    # Tracing at the viewBox scale changes every coordinate
+    if fit_size:
+        params.update(fit_viewbox=list(fit_size))
     
-    if not contours:
-        print("No significant contours found. Try adjusting the threshold value.")
-        return ""
+    # Decoding JPEGs straight to grayscale gives slightly different gray levels
+    if fast_decode:
+        params.update(fast_decode=True)
     
-    # Create SVG path data
-    svg_path_data = ""
+    # Ordering by pen travel reorders, reverses and joins the subpaths
+    if join_tolerance is not None:
+        params.update(join=join_tolerance)
     
-    for contour in contours:
-        # Simplify contour if requested
-        if simplify:
-            contour = simplify_contour(contour)
-        
-        # Extract points from contour
-        points = [point[0] for point in contour]
+    # Centerlines are different paths altogether
+    if centerline:
+        params.update(centerline=True)
+    return params
+
+@staged('image_to_svg_path')
+def image_to_svg_path(image_path, threshold_value=127, min_contour_length=50, smoothing=True, use_bezier=True, bezier_smoothing=0.25, simplify=True, tile_height=None, fit_error=None, min_area=0, min_extent=0, pyramid_levels=None, fast_decode=False, centerline=False, cache=None):
+    """
+    Convert an image to an SVG path with advanced options.
+    
+    Args:
+        image_path: Path to the image file
+        threshold_value: Value for binary thresholding (0-255)
+        min_contour_length: Minimum length of contours to include
+        smoothing: Whether to apply smoothing to the contours
+        use_bezier: Whether to use bezier curves for smoother paths
+        bezier_smoothing: Smoothing factor for bezier curves (0-1)
+        simplify: Whether to simplify contours
+        tile_height: Process the image in strips of this many rows to bound memory (None for the whole image)
+        fit_error: Fit the raw contours with least-squares cubic curves within this many pixels
+            (None for one curve per simplified vertex)
+        min_area: Drop connected components of fewer pixels before tracing
+        min_extent: Drop connected components whose bounding box is shorter than this on both sides before tracing
+        pyramid_levels: Trace coarse to fine, halving the image this many times for the coarse pass
+            (None to trace at full resolution only)
+        fast_decode: Decode JPEGs straight to grayscale (gray levels differ slightly from converting the color image)
+        centerline: Whether to trace the centerlines of the strokes as open paths instead of their outlines
+            (not used in tiled mode)
+        cache: ResultCache to reuse earlier results from (None to always convert)
         
-        # Convert to path data
-        if use_bezier and len(points) > 2:
-            svg_path_data += points_to_bezier(points, bezier_smoothing)
-        else:
-            # Start a new subpath
-            svg_path_data += f"M{points[0][0]},{points[0][1]}"
-            
-            # Add line segments
-            for point in points[1:]:
-                svg_path_data += f" L{point[0]},{point[1]}"
+    Returns:
+        SVG path data string
+    """
+    tile_height, centerline, min_area, min_extent, pyramid_levels = reconcile_options(
+        tile_height=tile_height,
+        centerline=centerline,
+        min_area=min_area,
+        min_extent=min_extent,
+        pyramid_levels=pyramid_levels,
+    )
     
-        # Close the path
-        # svg_path_data += " Z"
+    def convert():
+        return image_array_to_svg_path(
+            open_image(image_path, fast_decode) if tile_height else decode_image(image_path, fast_decode),
+            threshold_value=threshold_value,
+            min_contour_length=min_contour_length,
+            smoothing=smoothing,
+            use_bezier=use_bezier,
+            bezier_smoothing=bezier_smoothing,
+            simplify=simplify,
+            tile_height=tile_height,
+            fit_error=fit_error,
+            min_area=min_area,
+            min_extent=min_extent,
+            pyramid_levels=pyramid_levels,
+            centerline=centerline
+        )
     
-    return svg_path_data
+    params = cache_params(threshold_value, min_contour_length, smoothing, use_bezier, bezier_smoothing, simplify, fit_error=fit_error, min_area=min_area, min_extent=min_extent, pyramid_levels=pyramid_levels, fast_decode=fast_decode, centerline=centerline)
+    return cached(cache, 'image_to_svg_advanced', image_path, params, convert)
 
-def enhance_image(image_path, output_path=None, edge_detection=True, blur_amount=5):
+@staged('enhance_image')
+def enhance_image(image_path, output_path=None, edge_detection=True, blur_amount=5, fast_decode=False, cache=None):
     """
     Enhance an image to better detect lines and edges.
     
@@ -162,71 +238,243 @@ def enhance_image(image_path, output_path=None, edge_detection=True, blur_amount
         output_path: Path to save the enhanced image (None to not save)
         edge_detection: Whether to use edge detection
         blur_amount: Amount of blur to apply (odd number)
+        fast_decode: Decode JPEGs straight to grayscale (gray levels differ slightly from converting the color image)
+        cache: ResultCache to reuse earlier results from (None to always enhance);
+            cached arrays are read-only
         
     Returns:
         Enhanced image array
     """
-    # Read the image
-    img = cv2.imread(str(image_path))
-    if img is None:
-        raise ValueError(f"Could not read image at {image_path}")
+    params = {'edge_detection': edge_detection, 'blur': blur_amount | 1}
+    if fast_decode:
+        params.update(fast_decode=True)
+    enhanced = cached(cache, 'enhance_image', image_path, params, lambda: enhance(decode_image(image_path, fast_decode), edge_detection, blur_amount))
     
-    # Make blur amount odd if it's even
-    if blur_amount % 2 == 0:
-        blur_amount += 1
+    # Save enhanced image if requested
+    if output_path:
+        cv2.imwrite(str(output_path), enhanced)
     
-    # Convert to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    
-    # Apply Gaussian blur
-    blurred = cv2.GaussianBlur(gray, (blur_amount, blur_amount), 0)
+    return enhanced
+
+def save_svg(path_data, output_path, width=600, height=420, color="navy", stroke_width=3, lengths=False, split=False):
+    """
+    Save path data as an SVG file.
     
-    if edge_detection:
-        # Apply Canny edge detection
-        edges = cv2.Canny(blurred, 50, 150)
-        
-        # Dilate to connect edges
-        kernel = np.ones((3, 3), np.uint8)
-        dilated = cv2.dilate(edges, kernel, iterations=1)
-        
-        # Save enhanced image if requested
-        if output_path:
-            cv2.imwrite(str(output_path), dilated)
-        
-        return dilated
-    else:
-        # Just return the blurred grayscale image
-        if output_path:
-            cv2.imwrite(str(output_path), blurred)
+    Args:
+        path_data: SVG path data string, or an iterable of path data chunks to stream
+        output_path: Path to save the SVG file, or '-' for stdout
+        width: Width of the SVG viewBox
+        height: Height of the SVG viewBox
+        color: Stroke color
+        stroke_width: Width of the stroke
+        lengths: Whether to write the path's length as pathLength and data-length attributes
+        split: Write one <path> per chunk, each with its length and offset along the drawing
         
-        return blurred
+    Returns:
+        Tuple of (path data length, beginning of the path data)
+    """
+    # This converter has always written a space before the closing "/>"
+    return svgwriter.save_svg(path_data, output_path, width, height, svgwriter.stroke_attributes(color, stroke_width) + ' ', lengths, split)
 
-def save_svg(path_data, output_path, width=600, height=420, color="navy", stroke_width=3):
+@staged('convert_image')
+def convert_image(image_path, output_path, enhanced_output=None, edge_detection=False, threshold_value=127, min_contour_length=50, smoothing=True, use_bezier=True, bezier_smoothing=0.25, simplify=True, width=600, height=420, color="navy", stroke_width=3, tile_height=None, fit_error=None, min_area=0, min_extent=0, pyramid_levels=None, fit_viewbox=False, fast_decode=False, centerline=False, estimate_width=False, join_tolerance=None, compact=False, precision=2, lengths=False, split_paths=False, detail_levels=None, cache=None):
     """
-    Save path data as an SVG file.
+    Convert an image to an SVG file, optionally with edge detection preprocessing.
+    
+    The image is decoded once and every stage works on in-memory arrays;
+    nothing but the SVG is written unless enhanced_output is given. Path
+    data is streamed to the output one contour at a time.
     
     Args:
-        path_data: SVG path data string
-        output_path: Path to save the SVG file
+        image_path: Path to the image file
+        output_path: Path to save the SVG file, or '-' for stdout
+        enhanced_output: Path to save the enhanced image for debugging (None to not save)
+        edge_detection: Whether to use edge detection preprocessing
+        threshold_value: Value for binary thresholding (0-255)
+        min_contour_length: Minimum length of contours to include
+        smoothing: Whether to apply smoothing to the contours
+        use_bezier: Whether to use bezier curves for smoother paths
+        bezier_smoothing: Smoothing factor for bezier curves (0-1)
+        simplify: Whether to simplify contours
         width: Width of the SVG viewBox
         height: Height of the SVG viewBox
         color: Stroke color
         stroke_width: Width of the stroke
+        tile_height: Process the image in strips of this many rows to bound memory (None for the whole image)
+        fit_error: Fit the raw contours with least-squares cubic curves within this many pixels
+            (None for one curve per simplified vertex)
+        min_area: Drop connected components of fewer pixels before tracing
+        min_extent: Drop connected components whose bounding box is shorter than this on both sides before tracing
+        pyramid_levels: Trace coarse to fine, halving the image this many times for the coarse pass
+            (None to trace at full resolution only; not used with edge detection or in tiled mode)
+        fit_viewbox: Whether to shrink (or enlarge) the image to fit the viewBox before tracing, so the
+            path coordinates are viewBox units (not used in tiled mode)
+        fast_decode: Decode JPEGs straight to grayscale, shrunk while decoding when fitting a much
+            smaller viewBox (gray levels differ slightly from converting the color image)
+        centerline: Whether to trace the centerlines of the strokes as open paths instead of their
+            outlines (not used in tiled mode)
+        estimate_width: Whether to measure the strokes along their centerlines and draw the path
+            with their median width instead of stroke_width (only with centerline)
+        join_tolerance: Order the contours by pen travel and join subpaths that start within this
+            many pixels of where the previous one ended (None to keep them by area, one subpath each)
+        compact: Whether to write compact path data (rounded, relative commands, minimal separators)
+        precision: Decimal places kept by the compact encoding
+        lengths: Whether to write the path length into the SVG (pathLength and data-length attributes)
+        split_paths: Whether to write one <path> per contour, each with its length and offset along the drawing
+        detail_levels: Dict of level name to simplification factor; writes one SVG per level
+            (<output>.<name>.svg) from a single trace instead of output_path (None for one SVG)
+        cache: ResultCache to reuse earlier results from (None to always convert);
+            not used when enhanced_output, detail_levels or estimate_width is given
+        
+    Returns:
+        Tuple of (path data length, beginning of the path data) of the SVG written last;
+        (0, "") if no contours were found
     """
-    svg_content = f"""<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}">
-    <path d="{path_data}" fill="none" stroke="{color}" stroke-width="{stroke_width}" />
-</svg>"""
+    tile_height, centerline, estimate_width, min_area, min_extent, pyramid_levels, edge_detection, fit_viewbox = reconcile_options(
+        tile_height=tile_height,
+        centerline=centerline,
+        estimate_width=estimate_width,
+        min_area=min_area,
+        min_extent=min_extent,
+        pyramid_levels=pyramid_levels,
+        edge_detection=edge_detection,
+        fit_viewbox=fit_viewbox,
+    )
+    tracer = CenterlineTracer(estimate_width) if centerline else None
+    prefilter = ComponentFilter(min_area, min_extent) if min_area or min_extent else None
+    planner = PathPlanner(join_tolerance) if join_tolerance is not None else None
+    
+    def trace():
+        if tile_height:
+            img = open_image(image_path, fast_decode)
+        else:
+            img = decode_image(image_path, fast_decode, fit_size=(width, height) if fit_viewbox else None)
+        if fit_viewbox:
+            img = fit_to_viewbox(img, width, height)
+        
+        # The edge mask from enhance() is already binary, so it is traced directly.
+        # In tiled mode it is computed strip by strip while tracing instead.
+        binary = False
+        if edge_detection and not tile_height:
+            img = enhance(img, edge_detection=True)
+            binary = True
+            if enhanced_output:
+                cv2.imwrite(str(enhanced_output), img)
+        elif edge_detection and enhanced_output:
+            notice("The enhanced image is not saved in tiled mode")
+        
+        # Trace the contours
+        contours = image_array_to_contours(
+            img,
+            threshold_value=threshold_value,
+            min_contour_length=min_contour_length,
+            smoothing=smoothing,
+            binary=binary,
+            edge_detection=edge_detection,
+            tile_height=tile_height,
+            prefilter=prefilter,
+            pyramid_levels=pyramid_levels,
+            centerline=tracer
+        )
+        return planner.plan(contours) if planner else contours
+    
+    fitter = CurveFitter(fit_error) if fit_error else None
     
-    with open(output_path, 'w') as f:
-        f.write(svg_content)
+    def to_chunks(contours):
+        chunks = iter_path_data(contours, simplify, use_bezier, bezier_smoothing, fitter, closed=not tracer)
+        return planner.iter_join(chunks) if planner else chunks
     
-    print(f"SVG saved to {output_path}")
+    # Fitted curves don't come from simplified vertices, so they have no levels
+    if detail_levels and (fitter or not simplify):
+        notice("Detail levels are not used with curve fitting or without simplification")
+        detail_levels = None
+    
+    # Levels simplify the contours as closed outlines
+    if detail_levels and tracer:
+        notice("Detail levels are not used with centerline tracing")
+        detail_levels = None
+    
+    if detail_levels:
+        contours = trace()
+        if not contours:
+            print("No significant contours found. Try adjusting the threshold value.")
+            return 0, ""
+        
+        # Index the contours once for the finest level; every level is a cut of it
+        with stage('simplify_index', vertices_in=len(contours.points)):
+            index = SimplificationIndex(contours, min(detail_levels.values()))
+        
+        for name, epsilon_factor in detail_levels.items():
+            with stage('simplify', level=name) as s:
+                simplified = index.simplify(epsilon_factor)
+                s.set(vertices_out=len(simplified.points))
+            chunks = iter_path_data(simplified, False, use_bezier, bezier_smoothing)
+            if planner:
+                chunks = planner.iter_join(chunks)
+            if split_paths:
+                chunks = iter_subpaths(chunks)
+            if compact:
+                chunks = PathEncoder(precision).iter_encode(chunks, separate=split_paths)
+            summary = save_svg(chunks, level_path(output_path, name), width, height, color, stroke_width, lengths, split_paths)
+            print(f"  {name}: epsilon factor {epsilon_factor:g}, {len(simplified.points)} vertices")
+        
+        if prefilter and prefilter.components:
+            print(prefilter.summary())
+        return summary
+    
+    # Stream the path data into the SVG, or replay it from the cache
+    chunks = cached_path_chunks(
+        None if enhanced_output or estimate_width else cache,
+        'image_to_svg_advanced',
+        image_path,
+        cache_params(threshold_value, min_contour_length, smoothing, use_bezier, bezier_smoothing, simplify, edge_detection, tile_height, fit_error, min_area, min_extent,
+                     pyramid_levels, (width, height) if fit_viewbox else None, fast_decode, join_tolerance, centerline),
+        trace,
+        to_chunks
+    )
+    
+    if chunks is None:
+        print("No significant contours found. Try adjusting the threshold value.")
+        return 0, ""
+    
+    # Draw the strokes as wide as they were measured
+    if tracer and tracer.stroke_width is not None:
+        stroke_width = tracer.stroke_width
+    
+    # One <path> per contour, each encoded on its own
+    if split_paths:
+        chunks = iter_subpaths(chunks)
+    
+    # Re-encode the path data compactly if requested
+    encoder = PathEncoder(precision) if compact else None
+    if encoder:
+        chunks = encoder.iter_encode(chunks, separate=split_paths)
+    
+    summary = save_svg(chunks, output_path, width, height, color, stroke_width, lengths, split_paths)
+    
+    # Nothing is traced or fitted when the result comes from the cache
+    if prefilter and prefilter.components and not is_stdout(output_path):
+        print(prefilter.summary())
+    
+    if tracer and tracer.pixels and not is_stdout(output_path):
+        print(tracer.summary())
+    
+    if planner and planner.subpaths and not is_stdout(output_path):
+        print(planner.summary())
+    
+    if fitter and fitter.points and not is_stdout(output_path):
+        print(fitter.summary())
+    
+    if encoder and not is_stdout(output_path):
+        print(encoder.savings())
+    
+    return summary
 
 def main():
     parser = argparse.ArgumentParser(description='Convert an image to an SVG path with advanced options')
-    parser.add_argument('image_path', type=str, help='Path to the input image')
-    parser.add_argument('--output', type=str, help='Path to save the output SVG', default=None)
-    parser.add_argument('--enhanced-output', type=str, help='Path to save the enhanced image', default=None)
+    parser.add_argument('image_path', type=str, help="Path to the input image ('-' for stdin)")
+    parser.add_argument('--output', type=str, help="Path to save the output SVG ('-' for stdout, the default when reading stdin)", default=None)
+    parser.add_argument('--enhanced-output', type=str, help='Path to save the enhanced image (debug artifact)', default=None)
     parser.add_argument('--threshold', type=int, default=127, help='Threshold value for binary conversion (0-255)')
     parser.add_argument('--min-length', type=int, default=50, help='Minimum length of contours to include')
     parser.add_argument('--width', type=int, default=600, help='Width of the SVG viewBox')
@@ -236,6 +484,31 @@ def main():
     parser.add_argument('--bezier-smoothing', type=float, default=0.25, help='Bezier curve smoothing factor (0-1)')
     parser.add_argument('--no-simplify', action='store_true', help='Disable contour simplification')
     parser.add_argument('--edge-detection', action='store_true', help='Use edge detection preprocessing')
+    parser.add_argument('--fit-error', type=float, default=None, help='Fit the raw contours with as few cubic curves as keep within this many pixels (e.g. 2), instead of one curve per simplified vertex')
+    parser.add_argument('--min-area', type=int, default=0, help='Drop connected components of fewer pixels before tracing')
+    parser.add_argument('--min-extent', type=int, default=0, help='Drop connected components whose bounding box is shorter than this many pixels on both sides before tracing')
+    parser.add_argument('--pyramid', type=int, nargs='?', const=2, default=None, metavar='LEVELS',
+                        help='Find the contours on a copy of the image halved LEVELS times (default 2) first, then threshold and trace at full resolution only around them')
+    parser.add_argument('--fit-viewbox', action='store_true', help='Resize the image to fit the viewBox before tracing, so path coordinates are in viewBox units')
+    parser.add_argument('--fast-decode', action='store_true', help='Decode JPEGs straight to grayscale, and shrunk while decoding with --fit-viewbox (slightly different gray levels)')
+    parser.add_argument('--centerline', action='store_true', help='Trace the centerline of every stroke as an open path instead of its outline (for single-stroke line art)')
+    parser.add_argument('--estimate-width', action='store_true', help='With --centerline, measure the strokes and draw the path with their median width instead of --stroke-width')
+    parser.add_argument('--save-enhanced', action='store_true', help='Save the enhanced image next to the input (<image>.enhanced.png)')
+    parser.add_argument('--tile-height', type=int, default=None, help='Process the image in strips of this many rows to bound memory use')
+    parser.add_argument('--join-paths', type=float, nargs='?', const=DEFAULT_TOLERANCE, default=None, metavar='PX',
+                        help=f'Order the contours by pen travel instead of by area and join those starting within PX pixels (default {DEFAULT_TOLERANCE:g}) of where the previous one ended')
+    parser.add_argument('--compact', action='store_true', help='Write compact path data: rounded coordinates, relative commands, no redundant characters')
+    parser.add_argument('--precision', type=int, default=2, help='Decimal places kept with --compact')
+    parser.add_argument('--lengths', action='store_true', help='Write the path length into the SVG (pathLength and data-length) so pages need not measure it')
+    parser.add_argument('--split-paths', action='store_true', help='Write one <path> per contour with its length and its offset along the drawing')
+    parser.add_argument('--lod', type=parse_levels, nargs='?', const=DEFAULT_LEVELS, default=None, metavar='NAME=FACTOR,...',
+                        help='Write one SVG per level of detail from a single trace, as <output>.<name>.svg '
+                             '(default levels: small=0.01,medium=0.005,large=0.0025)')
+    parser.add_argument('--cache', action='store_true', help='Reuse results of earlier identical conversions (stored in $SVGTRACE_CACHE_DIR or ~/.cache/svgtrace)')
+    parser.add_argument('--cache-dir', type=str, default=None, help='Cache directory (implies --cache)')
+    parser.add_argument('--cache-size', type=int, default=256, help='Maximum cache size on disk in MB')
+    parser.add_argument('--profile', action='store_true', help='Print a one-line summary of the time, memory and contours of each stage')
+    parser.add_argument('--profile-output', type=str, default=None, help='Save a Chrome trace of the stages as JSON (implies --profile)')
     parser.add_argument('--color', type=str, default='navy', help='Stroke color for the SVG path')
     parser.add_argument('--stroke-width', type=int, default=3, help='Stroke width for the SVG path')
     
@@ -244,42 +517,68 @@ def main():
     # Determine output path
     if args.output is None:
         input_path = Path(args.image_path)
-        output_path = input_path.with_suffix('.svg')
+        output_path = input_path if is_stdin(input_path) else input_path.with_suffix('.svg')
     else:
         output_path = Path(args.output)
     
-    # Preprocess image if edge detection is requested
-    if args.edge_detection:
-        enhanced_image_path = args.enhanced_output or str(Path(args.image_path).with_suffix('.enhanced.png'))
-        processed_img = enhance_image(args.image_path, enhanced_image_path, True)
-        
-        # Write the enhanced image to a temporary file
-        temp_path = Path(args.image_path).with_suffix('.temp.png')
-        cv2.imwrite(str(temp_path), processed_img)
-        
-        # Use the enhanced image for path creation
-        image_path_for_svg = str(temp_path)
-    else:
-        image_path_for_svg = args.image_path
-    
-    # Convert image to SVG path
-    path_data = image_to_svg_path(
-        image_path_for_svg, 
-        threshold_value=args.threshold,
-        min_contour_length=args.min_length,
-        smoothing=not args.no_smooth,
-        use_bezier=not args.no_bezier,
-        bezier_smoothing=args.bezier_smoothing,
-        simplify=not args.no_simplify
-    )
+    if args.lod and is_stdout(output_path):
+        parser.error("--lod writes one file per level and can't write to stdout")
+    if args.save_enhanced and is_stdin(args.image_path):
+        parser.error("--save-enhanced saves next to the input; use --enhanced-output when reading stdin")
+    
+    # Only write the enhanced image when it is asked for
+    enhanced_output = args.enhanced_output
+    if enhanced_output is None and args.save_enhanced:
+        enhanced_output = Path(args.image_path).with_suffix('.enhanced.png')
+    
+    cache = ResultCache(args.cache_dir, args.cache_size * 1024 * 1024) if args.cache or args.cache_dir else None
+    
+    profiler_context = profiling() if args.profile or args.profile_output else contextlib.nullcontext()
+    
+    # Convert the image and save the SVG
+    with profiler_context as profiler:
+        path_length, preview = convert_image(
+            args.image_path,
+            output_path,
+            enhanced_output=enhanced_output,
+            edge_detection=args.edge_detection,
+            threshold_value=args.threshold,
+            min_contour_length=args.min_length,
+            smoothing=not args.no_smooth,
+            use_bezier=not args.no_bezier,
+            bezier_smoothing=args.bezier_smoothing,
+            simplify=not args.no_simplify,
+            width=args.width,
+            height=args.height,
+            color=args.color,
+            stroke_width=args.stroke_width,
+            tile_height=args.tile_height,
+            fit_error=args.fit_error,
+            min_area=args.min_area,
+            min_extent=args.min_extent,
+            pyramid_levels=args.pyramid,
+            fit_viewbox=args.fit_viewbox,
+            fast_decode=args.fast_decode,
+            centerline=args.centerline,
+            estimate_width=args.estimate_width,
+            join_tolerance=args.join_paths,
+            compact=args.compact,
+            precision=args.precision,
+            lengths=args.lengths,
+            split_paths=args.split_paths,
+            detail_levels=args.lod,
+            cache=cache
+        )
+    
+    if path_length and not is_stdout(output_path):
+        print(format_preview(path_length, preview))
     
-    # Clean up temporary file if it was created
-    if args.edge_detection:
-        temp_path.unlink(missing_ok=True)
+    if cache and not is_stdout(output_path):
+        print(cache.stats())
     
-    if path_data:
-        save_svg(path_data, output_path, args.width, args.height, args.color, args.stroke_width)
-        print(f"Path data: {path_data[:100]}..." if len(path_data) > 100 else path_data)
+    # Keep stdout clean when the SVG is written there
+    if profiler:
+        profiler.report(args.profile_output, file=sys.stderr if is_stdout(output_path) else None)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
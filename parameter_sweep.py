@@ -0,0 +1,122 @@
+import argparse
+import math
+import time
+from pathlib import Path
+
+from svgtrace.svgwriter import is_stdout, open_output, write_path_element, write_svg
+from svgtrace.sweep import iter_sweep, variant_label, variant_name
+
+# Height of the label row above each contact sheet cell
+LABEL_HEIGHT = 24
+
+def parse_values(text, cast):
+    """
+    Parse a comma-separated list of values, e.g. "100,127,150".
+    """
+    return [cast(value) for value in text.split(',') if value.strip()]
+
+def save_contact_sheet(variants, output_path, width=600, height=420, columns=None, color="navy", stroke_width=3):
+    """
+    Save every variant as a labelled cell of one SVG file.
+
+    Args:
+        variants: List of (parameters dict, SVG path data) tuples
+        output_path: Path to save the SVG file, or '-' for stdout
+        width: Width of each cell's viewBox
+        height: Height of each cell's viewBox
+        columns: Number of cells per row (defaults to a roughly square grid)
+        color: Stroke color
+        stroke_width: Width of the stroke
+    """
+    columns = columns or math.ceil(math.sqrt(len(variants)))
+    rows = math.ceil(len(variants) / columns)
+    cell_height = height + LABEL_HEIGHT
+
+    with open_output(output_path) as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {columns * width} {rows * cell_height}">\n')
+        for i, (params, path_data) in enumerate(variants):
+            x, y = (i % columns) * width, (i // columns) * cell_height
+            f.write(f'  <text x="{x + 6}" y="{y + LABEL_HEIGHT - 6}" font-family="sans-serif" font-size="16">{variant_label(params)}</text>\n')
+
+            # A nested viewport clips each variant to its own cell
+            f.write(f'  <svg x="{x}" y="{y + LABEL_HEIGHT}" width="{width}" height="{height}" viewBox="0 0 {width} {height}">\n')
+            f.write(f'    <rect width="{width}" height="{height}" fill="none" stroke="#ccc"/>\n')
+            write_path_element(f, path_data, f' fill="none" stroke="{color}" stroke-width="{stroke_width}"')
+            f.write('\n  </svg>\n')
+        f.write('</svg>')
+
+    if not is_stdout(output_path):
+        print(f"Contact sheet with {len(variants)} variants saved to {output_path}")
+
+def save_variants(variants, output_dir, stem, width=600, height=420, color="navy", stroke_width=3):
+    """
+    Save every variant as its own SVG file, named after its parameters.
+
+    Args:
+        variants: Iterable of (parameters dict, SVG path data) tuples
+        output_dir: Directory for the SVG files
+        stem: File name prefix, usually the image name
+        width: Width of the SVG viewBox
+        height: Height of the SVG viewBox
+        color: Stroke color
+        stroke_width: Width of the stroke
+
+    Returns:
+        Number of files written
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    count = 0
+    for params, path_data in variants:
+        output_path = output_dir / f"{stem}_{variant_name(params)}.svg"
+        write_svg(output_path, path_data, width, height, f' fill="none" stroke="{color}" stroke-width="{stroke_width}"')
+        print(f"{output_path}: {len(path_data)} bytes of path data")
+        count += 1
+
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert an image with every combination of several settings in one pass')
+    parser.add_argument('image_path', type=str, help='Path to the input image')
+    parser.add_argument('--thresholds', type=str, default='127', help='Comma-separated threshold values (0-255)')
+    parser.add_argument('--min-lengths', type=str, default='50', help='Comma-separated minimum contour lengths')
+    parser.add_argument('--bezier-smoothings', type=str, default='0.25', help='Comma-separated bezier smoothing factors (0-1)')
+    parser.add_argument('--blur', choices=['on', 'off', 'both'], default='on', help='Blur before thresholding')
+    parser.add_argument('--no-bezier', action='store_true', help='Disable bezier curves')
+    parser.add_argument('--no-simplify', action='store_true', help='Disable contour simplification')
+    parser.add_argument('--output', type=str, default=None, help="Path to save the contact sheet SVG ('-' for stdout)")
+    parser.add_argument('--output-dir', type=str, default=None, help='Write one SVG per variant into this directory instead of a contact sheet')
+    parser.add_argument('--columns', type=int, default=None, help='Cells per row of the contact sheet')
+    parser.add_argument('--width', type=int, default=600, help='Width of the SVG viewBox')
+    parser.add_argument('--height', type=int, default=420, help='Height of the SVG viewBox')
+    parser.add_argument('--color', type=str, default='navy', help='Stroke color for the SVG paths')
+    parser.add_argument('--stroke-width', type=int, default=3, help='Stroke width for the SVG paths')
+
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    variants = iter_sweep(
+        args.image_path,
+        thresholds=parse_values(args.thresholds, int),
+        min_lengths=parse_values(args.min_lengths, int),
+        bezier_smoothings=parse_values(args.bezier_smoothings, float),
+        smoothings={'on': (True,), 'off': (False,), 'both': (True, False)}[args.blur],
+        simplify=not args.no_simplify,
+        use_bezier=not args.no_bezier
+    )
+
+    if args.output_dir:
+        count = save_variants(variants, args.output_dir, Path(args.image_path).stem, args.width, args.height, args.color, args.stroke_width)
+    else:
+        output_path = args.output or Path(args.image_path).with_suffix('.sweep.svg')
+        variants = list(variants)
+        save_contact_sheet(variants, output_path, args.width, args.height, args.columns, args.color, args.stroke_width)
+        count = len(variants)
+        if is_stdout(output_path):
+            return
+
+    print(f"{count} variants in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Shared building blocks for the image to SVG path converters.
+
+The command line scripts in the repository root (`image_to_svg.py`,
+`image_to_svg_advanced.py` and `extract_colored_path.py`) import their
+common pipeline stages from this package.
+"""
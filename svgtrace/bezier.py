@@ -0,0 +1,148 @@
+from svgtrace.lazy import lazy_import
+from svgtrace.serialize import _as_points
+
+np = lazy_import('numpy')
+
+def bezier_control_points_batch(points, offsets, smoothing=0.25):
+    """
+    Compute smooth bezier control points for many contours at once.
+
+    All contours are stored back to back in `points`; contour `k` spans
+    `points[offsets[k]:offsets[k + 1]]`. Every interior vertex of a contour
+    produces one curve segment ending at the following vertex, with control
+    points placed along the incoming and outgoing directions.
+
+    Args:
+        points: Concatenated contour points, shape (N, 2)
+        offsets: Contour start offsets with a trailing total, shape (K + 1,)
+        smoothing: Smoothing factor (0-1)
+
+    Returns:
+        Tuple of (c1, c2, end, segment_offsets) where c1, c2 and end are
+        (M, 2) arrays and segment_offsets splits the M segments per contour
+        the same way `offsets` splits the points
+    """
+    points = _as_points(points)
+    offsets = np.asarray(offsets, dtype=np.intp)
+
+    # Segment vectors and lengths between consecutive points
+    delta = np.diff(points, axis=0).astype(np.float64)
+    length = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+
+    # Unit vectors, zero for repeated points
+    unit = np.zeros_like(delta)
+    np.divide(delta, length[:, None], out=unit, where=length[:, None] > 0)
+
+    # Interior vertices: skip the first and last point of every contour
+    interior = np.ones(len(points), dtype=bool)
+    starts, stops = offsets[:-1], offsets[1:]
+    non_empty = stops > starts
+    interior[starts[non_empty]] = False
+    interior[stops[non_empty] - 1] = False
+    centers = np.flatnonzero(interior)
+
+    # Control points pulled along the incoming and outgoing directions
+    vertex = points[centers]
+    c1 = vertex - unit[centers - 1] * (length[centers - 1] * smoothing)[:, None]
+    c2 = vertex + unit[centers] * (length[centers] * smoothing)[:, None]
+    end = points[centers + 1]
+
+    segment_counts = np.maximum(stops - starts - 2, 0)
+    segment_offsets = np.concatenate(([0], np.cumsum(segment_counts)))
+
+    return c1, c2, end, segment_offsets
+
+def bezier_control_points(points, smoothing=0.25):
+    """
+    Compute smooth bezier control points for a single contour.
+
+    Args:
+        points: Contour points, (N, 1, 2) or (N, 2)
+        smoothing: Smoothing factor (0-1)
+
+    Returns:
+        Tuple of (c1, c2, end) arrays, each of shape (N - 2, 2)
+    """
+    points = _as_points(points)
+    c1, c2, end, _ = bezier_control_points_batch(points, [0, len(points)], smoothing)
+    return c1, c2, end
+
+def _format_bezier(start, c1, c2, end):
+    """
+    Format one subpath: a full C segment followed by S shorthand segments.
+    """
+    values = np.empty((len(end), 4), dtype=object)
+    values[:, :2] = c2
+    values[:, 2:] = end
+
+    template = "M%s,%s C%s,%s " + "%s,%s %s,%s" + " S%s,%s %s,%s" * (len(end) - 1)
+    head = tuple(start.tolist()) + tuple(c1[0].tolist())
+    return template % (head + tuple(values.ravel()))
+
+def bezier_path(points, smoothing=0.25):
+    """
+    Convert a series of points to a smooth bezier path.
+
+    Args:
+        points: Contour points, (N, 1, 2) or (N, 2)
+        smoothing: Smoothing factor (0-1)
+
+    Returns:
+        SVG path string with bezier curves
+    """
+    points = _as_points(points)
+    if len(points) < 2:
+        return ""
+
+    if len(points) == 2:
+        # Just a straight line
+        return "M%s,%s L%s,%s" % tuple(points.ravel().tolist())
+
+    c1, c2, end = bezier_control_points(points, smoothing)
+    return _format_bezier(points[0], c1, c2, end)
+
+def points_to_bezier(points, smoothing=0.25):
+    """
+    Convert a series of points to a smooth bezier path.
+
+    Kept for compatibility with the converters' old helper of this name;
+    same as bezier_path.
+
+    Args:
+        points: List of (x, y) coordinates
+        smoothing: Smoothing factor (0-1)
+
+    Returns:
+        SVG path string with bezier curves
+    """
+    return bezier_path(points, smoothing)
+
+def bezier_paths(contours, smoothing=0.25):
+    """
+    Convert several contours to one SVG path string of bezier subpaths.
+
+    The control points of all contours are computed in one batch.
+
+    Args:
+        contours: Iterable of contours, each (N, 1, 2) or (N, 2)
+        smoothing: Smoothing factor (0-1)
+
+    Returns:
+        SVG path data string with one subpath per contour
+    """
+    contours = [_as_points(contour) for contour in contours]
+    if not contours:
+        return ""
+
+    offsets = np.concatenate(([0], np.cumsum([len(contour) for contour in contours])))
+    c1, c2, end, segment_offsets = bezier_control_points_batch(np.concatenate(contours), offsets, smoothing)
+
+    path_data = []
+    for k, contour in enumerate(contours):
+        lo, hi = segment_offsets[k], segment_offsets[k + 1]
+        if hi > lo:
+            path_data.append(_format_bezier(contour[0], c1[lo:hi], c2[lo:hi], end[lo:hi]))
+        else:
+            path_data.append(bezier_path(contour, smoothing))
+
+    return "".join(path_data)
@@ -0,0 +1,329 @@
+"""
+Content-addressed cache for conversion results.
+
+Results are keyed by a hash of the image file's bytes plus the normalized
+parameters that affect the result, so renaming or touching an unchanged
+image still hits, while editing it (or changing a parameter) misses. A hit
+returns the stored result without decoding the image.
+
+Two layers are used: a small in-process LRU for repeated calls in the same
+session, and an on-disk store whose total size is bounded by evicting the
+least recently used entries.
+"""
+import hashlib
+import json
+import numbers
+import os
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from svgtrace.decode import is_stdin, read_stdin
+from svgtrace.instrument import stage
+from svgtrace.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Bump when the stored results change format or meaning
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'svgtrace'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class CacheMiss(Exception):
+    """
+    Raised by ResultCache.fetch() on a miss while the cache is probing.
+    """
+
+# Digests of files already hashed in this process, keyed by (path, mtime, size)
+_digests = {}
+
+def file_digest(image_path):
+    """
+    SHA-256 of a file's contents, remembered while the file is unchanged.
+
+    An image path of '-' stands for the bytes read from standard input.
+    """
+    if is_stdin(image_path):
+        return hashlib.sha256(read_stdin()).hexdigest()
+    path = Path(image_path).resolve()
+    stat = path.stat()
+    stamp = (str(path), stat.st_mtime_ns, stat.st_size)
+    if stamp not in _digests:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        _digests[stamp] = h.hexdigest()
+    return _digests[stamp]
+
+def _normalize(value):
+    """
+    Turn a parameter value into a canonical JSON-serializable form.
+    """
+    if isinstance(value, float):
+        # 0.25 and 0.250000001 are different settings, 0.25 and 0.2500 are not
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, numbers.Integral) and not isinstance(value, bool):
+        # NumPy integers too, without importing NumPy for plain ints
+        return int(value)
+    if isinstance(value, Path):
+        return str(value)
+    return value
+
+def cache_key(namespace, image_path, params):
+    """
+    Build the key of a result.
+
+    Args:
+        namespace: Name of the cached operation
+        image_path: Path to the input image (hashed by content)
+        params: Dict of the parameters that affect the result
+
+    Returns:
+        Hex digest string
+    """
+    normalized = {name: _normalize(value) for name, value in params.items()}
+    payload = json.dumps([CACHE_VERSION, namespace, file_digest(image_path), normalized], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ResultCache:
+    """
+    Two-layer LRU cache of path data strings and image arrays.
+
+    Attributes:
+        hits: Number of lookups answered from either layer
+        misses: Number of lookups that had to be computed
+        probing: Whether a miss raises CacheMiss instead of being computed, so a caller
+            can serve a cached conversion before it decodes anything
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, memory_entries=64):
+        self.directory = Path(directory or os.environ.get('SVGTRACE_CACHE_DIR') or DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self.probing = False
+        self._memory = OrderedDict()
+        self._disk_bytes = None
+
+    def _entry_path(self, key, suffix):
+        return self.directory / key[:2] / (key + suffix)
+
+    def _entry_files(self, key, suffix):
+        """
+        The path of an entry and of the temporary file it is written to first.
+
+        The temporary name is unique, so streams of the same entry don't mix.
+        """
+        path = self._entry_path(key, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path, path.with_name(f'{path.name}.{uuid.uuid4().hex}.tmp')
+
+    def _commit(self, tmp, path):
+        """
+        Rename a written entry into place, so readers never see partial entries.
+        """
+        os.replace(tmp, path)
+
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(size for _, size, _ in self._entries())
+        else:
+            self._disk_bytes += path.stat().st_size
+        if self._disk_bytes > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        """
+        List (mtime, size, path) of every entry on disk.
+        """
+        entries = []
+        for path in self.directory.glob('*/*'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Evicted by another process
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return entries
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Look up a result, returning None on a miss.
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        # Path data is tried first, so serving it never imports NumPy
+        for suffix, load in (('.txt', lambda p: p.read_text()), ('.npy', lambda p: np.load(p))):
+            path = self._entry_path(key, suffix)
+            try:
+                value = load(path)
+            except (FileNotFoundError, ValueError, OSError):
+                continue
+
+            # Mark the entry as recently used for eviction
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            if not isinstance(value, str):
+                value.flags.writeable = False
+            self._remember(key, value)
+            return value
+
+        return None
+
+    def put(self, key, value):
+        """
+        Store a path data string or an image array.
+        """
+        if isinstance(value, np.ndarray):
+            value = value.copy()
+            value.flags.writeable = False
+        self._remember(key, value)
+
+        path, tmp = self._entry_files(key, '.npy' if isinstance(value, np.ndarray) else '.txt')
+        with open(tmp, 'wb') as f:
+            if isinstance(value, np.ndarray):
+                np.save(f, value)
+            else:
+                f.write(value.encode())
+        self._commit(tmp, path)
+
+    def evict(self):
+        """
+        Delete the least recently used entries until the store fits in max_bytes.
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._disk_bytes = total
+
+    def fetch(self, namespace, image_path, params):
+        """
+        Look up the result for these inputs, counting the hit or miss.
+
+        Args:
+            namespace: Name of the cached operation
+            image_path: Path to the input image
+            params: Dict of the parameters that affect the result
+
+        Returns:
+            Tuple of (key, result or None on a miss)
+        """
+        with stage('cache_lookup') as s:
+            key = cache_key(namespace, image_path, params)
+            value = self.get(key)
+            s.set(hit=value is not None)
+        if value is None:
+            if self.probing:
+                raise CacheMiss(key)
+            self.misses += 1
+        else:
+            self.hits += 1
+        return key, value
+
+    def lookup(self, namespace, image_path, params, compute):
+        """
+        Return the cached result for these inputs, computing and storing it on a miss.
+
+        Args:
+            namespace: Name of the cached operation
+            image_path: Path to the input image
+            params: Dict of the parameters that affect the result
+            compute: Function producing the result (a string or an array)
+
+        Returns:
+            The result
+        """
+        key, value = self.fetch(namespace, image_path, params)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def iter_store(self, key, path_chunks):
+        """
+        Pass streamed path data chunks through, storing the whole path once they are exhausted.
+
+        Each chunk is written to the entry's temporary file as it passes, so the
+        whole path is never held in memory. The entry is only renamed into place
+        once the chunks are exhausted, and it isn't kept in the in-process LRU.
+        """
+        path, tmp = self._entry_files(key, '.txt')
+        try:
+            with open(tmp, 'wb') as f:
+                for chunk in path_chunks:
+                    f.write(chunk.encode())
+                    yield chunk
+        except BaseException:
+            # A stream that fails or is closed early leaves no entry behind
+            tmp.unlink(missing_ok=True)
+            raise
+        self._commit(tmp, path)
+
+    def stats(self):
+        """
+        Describe the hit and miss counts for the CLIs.
+        """
+        return f"Cache: {self.hits} hit{'s' * (self.hits != 1)}, {self.misses} miss{'es' * (self.misses != 1)} ({self.directory})"
+
+def cached(cache, namespace, image_path, params, compute):
+    """
+    Call `compute` through `cache`, or directly when cache is None.
+    """
+    if cache is None:
+        return compute()
+    return cache.lookup(namespace, image_path, params, compute)
+
+def cached_path_chunks(cache, namespace, image_path, params, trace, to_chunks):
+    """
+    Path data chunks for a conversion, streamed when traced and replayed on a cache hit.
+
+    Args:
+        cache: ResultCache, or None to always trace
+        namespace: Name of the cached operation
+        image_path: Path to the input image
+        params: Dict of the parameters that affect the result
+        trace: Function returning the contours of the image
+        to_chunks: Function turning contours into an iterable of path data chunks
+
+    Returns:
+        Iterable of path data chunks, or None if no contours were found
+    """
+    key, path_data = None, None
+    if cache is not None:
+        key, path_data = cache.fetch(namespace, image_path, params)
+
+    # A hit skips decoding and tracing altogether
+    if path_data is not None:
+        return (path_data,) if path_data else None
+
+    contours = trace()
+    if not contours:
+        if cache is not None:
+            cache.put(key, "")
+        return None
+
+    chunks = to_chunks(contours)
+    if cache is not None:
+        chunks = cache.iter_store(key, chunks)
+    return chunks
@@ -0,0 +1,82 @@
+"""
+Classify HSV pixels into many color ranges with a single table lookup.
+"""
+from functools import lru_cache
+
+from svgtrace.instrument import stage
+from svgtrace.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# OpenCV stores 8-bit hue as 0-179
+HUE_LEVELS = 180
+
+def _label_dtype(count):
+    """
+    Smallest unsigned integer type with one bit per range.
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if count <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"At most 64 color ranges can be classified at once, got {count}")
+
+@lru_cache(maxsize=8)
+def build_hsv_lut(ranges):
+    """
+    Build a lookup table mapping every HSV triple to the ranges containing it.
+
+    Bit `i` of an entry is set when the HSV value lies inside `ranges[i]`,
+    with inclusive bounds like `cv2.inRange`. Overlapping ranges are fine.
+
+    Args:
+        ranges: Tuple of ((h, s, v), (h, s, v)) lower/upper bound pairs
+
+    Returns:
+        Flat table of HUE_LEVELS * 256 * 256 entries indexed by (h << 16) | (s << 8) | v
+    """
+    dtype = _label_dtype(len(ranges))
+    lut = np.zeros((HUE_LEVELS, 256, 256), dtype=dtype)
+
+    for i, (lower, upper) in enumerate(ranges):
+        (h0, s0, v0), (h1, s1, v1) = lower, upper
+        lut[h0:h1 + 1, s0:s1 + 1, v0:v1 + 1] |= dtype(1 << i)
+
+    return lut.reshape(-1)
+
+def classify_hsv(hsv, ranges):
+    """
+    Label every pixel of an HSV image with a bit mask of matching ranges.
+
+    Args:
+        hsv: 8-bit HSV image, shape (H, W, 3)
+        ranges: Sequence of (lower, upper) HSV bound pairs
+
+    Returns:
+        Array of shape (H, W) whose bit `i` is set where ranges[i] matches
+    """
+    ranges = tuple((tuple(int(c) for c in lower), tuple(int(c) for c in upper)) for lower, upper in ranges)
+    lut = build_hsv_lut(ranges)
+
+    index = hsv[..., 0].astype(np.uint32) << 16
+    index |= hsv[..., 1].astype(np.uint32) << 8
+    index |= hsv[..., 2]
+    return lut[index]
+
+def range_masks(hsv, ranges):
+    """
+    Compute one binary mask per HSV range in a single classification pass.
+
+    Args:
+        hsv: 8-bit HSV image, shape (H, W, 3)
+        ranges: Sequence of (lower, upper) HSV bound pairs
+
+    Returns:
+        List of uint8 masks (0 or 255), identical to `cv2.inRange` per range
+    """
+    with stage('classify', ranges=len(ranges)):
+        labels = classify_hsv(hsv, ranges)
+        masks = []
+        for i in range(len(ranges)):
+            bit = labels.dtype.type(1 << i)
+            masks.append(np.multiply((labels & bit) != 0, 255, dtype=np.uint8))
+    return masks
@@ -0,0 +1,172 @@
+"""
+Contiguous storage of traced contours and their metrics.
+
+findContours returns one small array per contour, and the stages after it
+used to ask OpenCV for each contour's arc length (to filter), area (to
+sort) and perimeter (to simplify) one call at a time. ContourSet keeps
+all points in one array with per-contour offsets and computes each
+metric for all contours in a single vectorized pass, the first time it
+is needed, with the same values cv2.arcLength, cv2.contourArea and
+cv2.boundingRect return.
+"""
+import functools
+
+from svgtrace.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+def _segment_sums(values, starts, stops):
+    """
+    Sum per-point values over each contour, where values[i] belongs to the
+    segment from point i to point i + 1 and the last point of every contour
+    starts no segment.
+    """
+    values[stops[:-1] - 1] = 0
+    return np.add.reduceat(values, starts)
+
+class ContourSet:
+    """
+    Contours stored back to back, with their metrics computed once.
+
+    Contour `k` spans `points[offsets[k]:offsets[k + 1]]`. Iterating or
+    indexing with an integer gives contours as (N, 1, 2) views, so a
+    ContourSet can be passed wherever a list of OpenCV contours is expected.
+
+    Attributes:
+        points: All contour points, shape (N, 1, 2)
+        offsets: Contour start offsets with a trailing total, shape (K + 1,)
+        lengths: Open arc length of each contour, as cv2.arcLength(c, False)
+        perimeters: Closed arc length of each contour, as cv2.arcLength(c, True)
+        areas: Area of each contour, as cv2.contourArea(c)
+        boxes: Bounding box (x, y, width, height) of each contour, as cv2.boundingRect(c)
+    """
+
+    def __init__(self, points, offsets):
+        self.points = np.ascontiguousarray(points).reshape(-1, 1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+
+    @classmethod
+    def from_contours(cls, contours):
+        """
+        Collect OpenCV contours into one array.
+        """
+        if not len(contours):
+            return cls(np.zeros((0, 1, 2), dtype=np.int32), [0])
+        offsets = np.zeros(len(contours) + 1, dtype=np.intp)
+        np.cumsum(list(map(len, contours)), out=offsets[1:])
+        return cls(np.concatenate(contours), offsets)
+
+    @functools.cached_property
+    def _segments(self):
+        """
+        Length of the segment starting at every point, in single precision like OpenCV.
+        """
+        delta = np.diff(self.points[:, 0].astype(np.float32), axis=0)
+        segments = np.zeros(len(self.points), dtype=np.float32)
+        segments[:-1] = np.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1])
+        return segments
+
+    @functools.cached_property
+    def lengths(self):
+        if not len(self):
+            return np.zeros(0)
+        return _segment_sums(self._segments.astype(np.float64), self.offsets[:-1], self.offsets[1:])
+
+    @functools.cached_property
+    def perimeters(self):
+        if not len(self):
+            return np.zeros(0)
+        closing = (self.points[self.offsets[:-1], 0] - self.points[self.offsets[1:] - 1, 0]).astype(np.float32)
+        closing = np.sqrt(closing[:, 0] * closing[:, 0] + closing[:, 1] * closing[:, 1])
+        return self.lengths + closing
+
+    @functools.cached_property
+    def areas(self):
+        if not len(self):
+            return np.zeros(0)
+        starts, stops = self.offsets[:-1], self.offsets[1:]
+
+        # Shoelace formula; every product and sum of pixel coordinates is exact in double precision
+        x = self.points[:, 0, 0].astype(np.float64)
+        y = self.points[:, 0, 1].astype(np.float64)
+        cross = np.empty(len(x))
+        cross[:-1] = x[:-1] * y[1:] - x[1:] * y[:-1]
+        cross[-1] = 0
+        twice_area = _segment_sums(cross, starts, stops)
+
+        # Close every contour
+        first, last = starts, stops - 1
+        twice_area += x[last] * y[first] - x[first] * y[last]
+        return np.abs(twice_area) / 2
+
+    @functools.cached_property
+    def boxes(self):
+        if not len(self):
+            return np.zeros((0, 4), dtype=np.int32)
+        low = np.minimum.reduceat(self.points[:, 0], self.offsets[:-1])
+        high = np.maximum.reduceat(self.points[:, 0], self.offsets[:-1])
+        return np.concatenate((low, high - low + 1), axis=1)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, k):
+        if isinstance(k, (int, np.integer)):
+            if k < 0:
+                k += len(self)
+            if not 0 <= k < len(self):
+                raise IndexError("contour index out of range")
+            return self.points[self.offsets[k]:self.offsets[k + 1]]
+        return self.select(np.arange(len(self))[k])
+
+    def __iter__(self):
+        points, offsets = self.points, self.offsets.tolist()
+        for start, stop in zip(offsets[:-1], offsets[1:]):
+            yield points[start:stop]
+
+    def select(self, indices, reverse=None):
+        """
+        Gather some contours, in the given order, into a new ContourSet.
+
+        Metrics already computed are carried over instead of being computed again.
+
+        Args:
+            indices: Contour indices, or a boolean mask over the contours
+            reverse: Boolean per gathered contour, True to gather its points in reverse order
+                (None to keep every contour's direction)
+
+        Returns:
+            ContourSet
+        """
+        indices = np.asarray(indices)
+        indices = np.flatnonzero(indices) if indices.dtype == bool else indices.astype(np.intp)
+        starts = self.offsets[indices]
+        counts = self.offsets[indices + 1] - starts
+        offsets = np.zeros(len(indices) + 1, dtype=np.intp)
+        np.cumsum(counts, out=offsets[1:])
+
+        # Index of every gathered point in the source array; gathering whole
+        # points as single opaque items is much faster than gathering rows
+        source = np.repeat(starts - offsets[:-1], counts) + np.arange(offsets[-1])
+        if reverse is not None and np.any(reverse):
+            # Walk reversed contours from their last point back to their first
+            flip = np.repeat(np.asarray(reverse, dtype=bool), counts)
+            source[flip] = np.repeat(starts + counts - 1 + offsets[:-1], counts)[flip] - np.arange(offsets[-1])[flip]
+        point_type = np.dtype((np.void, 2 * self.points.itemsize))
+        points = self.points.reshape(-1).view(point_type)[source].view(self.points.dtype)
+        subset = ContourSet(points, offsets)
+
+        for name in ('lengths', 'perimeters', 'areas', 'boxes'):
+            if name in self.__dict__:
+                subset.__dict__[name] = self.__dict__[name][indices]
+        return subset
+
+    def filter_sort(self, min_length=50):
+        """
+        Drop contours not longer than min_length and sort the rest by area, largest first.
+
+        Contours with equal areas keep their order, as with a stable sort.
+        Areas are only computed for the contours that are kept.
+        """
+        kept = self.select(self.lengths > min_length)
+        return kept.select(np.argsort(-kept.areas, kind='stable'))
@@ -0,0 +1,172 @@
+"""
+Choosing the cheapest decode of an image for a pipeline.
+
+The threshold and edge pipelines only look at the grayscale image, yet
+the converters decode every image to BGR and convert it right away,
+paying for the decoder's color conversion, three times the memory and a
+cvtColor pass. A JPEG decoder can instead hand out the luma channel
+directly, and shrink the image by 2, 4 or 8 while decoding (by dropping
+DCT coefficients), far cheaper than decoding at full size and resizing.
+Both give gray levels a few steps off those of cvtColor, so the
+converters only use them when asked to (`--fast-decode`).
+
+Other formats keep the BGR decode: OpenCV decodes PNG to grayscale more
+slowly than to BGR followed by cvtColor, and its reduced decode of them
+is a full decode followed by a resize.
+
+An image path of '-' reads the image from standard input, which is
+buffered once and decoded from memory with imdecode.
+"""
+import functools
+import struct
+import sys
+from pathlib import Path
+
+from svgtrace.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Image path that stands for standard input
+STDIN = '-'
+
+JPEG_SUFFIXES = ('.jpg', '.jpeg', '.jpe', '.jfif')
+
+# OpenCV imread flags of each decode mode, by name (looked up when first
+# decoding, so importing this module doesn't load OpenCV)
+DECODE_FLAGS = {
+    'color': 'IMREAD_COLOR',
+    'gray': 'IMREAD_GRAYSCALE',
+    'color/2': 'IMREAD_REDUCED_COLOR_2',
+    'color/4': 'IMREAD_REDUCED_COLOR_4',
+    'color/8': 'IMREAD_REDUCED_COLOR_8',
+    'gray/2': 'IMREAD_REDUCED_GRAYSCALE_2',
+    'gray/4': 'IMREAD_REDUCED_GRAYSCALE_4',
+    'gray/8': 'IMREAD_REDUCED_GRAYSCALE_8',
+}
+
+def is_stdin(image_path):
+    """
+    Whether an image path refers to standard input ('-').
+    """
+    return str(image_path) == STDIN
+
+@functools.lru_cache(maxsize=None)
+def read_stdin():
+    """
+    All bytes of standard input, read once.
+    """
+    return sys.stdin.buffer.read()
+
+def read_head(image_path, size=2):
+    """
+    The first bytes of an image file or of standard input.
+    """
+    if is_stdin(image_path):
+        return read_stdin()[:size]
+    with open(image_path, 'rb') as f:
+        return f.read(size)
+
+def is_jpeg(image_path):
+    """
+    Whether an image is a JPEG, from its name or, for standard input, its first bytes.
+    """
+    if is_stdin(image_path):
+        return read_head(image_path) == b'\xff\xd8'
+    return Path(image_path).suffix.lower() in JPEG_SUFFIXES
+
+def jpeg_size(data):
+    """
+    Width and height of a JPEG image from its frame header.
+
+    Args:
+        data: Bytes of the JPEG file (only the part up to the frame header is needed)
+
+    Returns:
+        Tuple of (width, height), or None if no frame header is found
+    """
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            offset += 1
+            continue
+        length, = struct.unpack('>H', data[offset + 2:offset + 4])
+
+        # Start of frame markers, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if offset + 9 > len(data):
+                return None
+            height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + length
+    return None
+
+def image_size(image_path):
+    """
+    Width and height of a JPEG without decoding it, or None for other formats.
+    """
+    if not is_jpeg(image_path):
+        return None
+    if is_stdin(image_path):
+        return jpeg_size(read_stdin())
+    # Headers (EXIF, ICC profiles, ...) rarely push the frame header past the first 256 kB
+    with open(image_path, 'rb') as f:
+        return jpeg_size(f.read(256 * 1024))
+
+def reduction_factor(size, width, height):
+    """
+    Largest JPEG reduction (1, 2, 4 or 8) that still leaves at least the viewBox fit size.
+
+    Args:
+        size: (width, height) of the image
+        width: Width of the SVG viewBox
+        height: Height of the SVG viewBox
+    """
+    scale = min(width / size[0], height / size[1])
+    return next((factor for factor in (8, 4, 2) if factor * scale <= 1), 1)
+
+def decode_mode(image_path, gray=True, fit_size=None):
+    """
+    Cheapest decode mode that serves a pipeline.
+
+    Args:
+        image_path: Path to the image file, or '-' for standard input
+        gray: Whether the pipeline only needs the grayscale image
+        fit_size: (width, height) of a viewBox the image is resized to fit (None to keep its size)
+
+    Returns:
+        Name of a decode mode in DECODE_FLAGS
+    """
+    if not is_jpeg(image_path):
+        return 'color'
+    mode = 'gray' if gray else 'color'
+    size = image_size(image_path) if fit_size else None
+    factor = reduction_factor(size, *fit_size) if size else 1
+    return f'{mode}/{factor}' if factor > 1 else mode
+
+def decode_flags(mode='color'):
+    """
+    OpenCV imread flags of a decode mode.
+    """
+    return getattr(cv2, DECODE_FLAGS[mode])
+
+def decode(image_path, flags):
+    """
+    Decode an image file, or standard input when image_path is '-'.
+
+    Args:
+        image_path: Path to the image file, or '-' for standard input
+        flags: OpenCV imread flags, see decode_flags()
+
+    Returns:
+        Image array, or None if it can't be decoded
+    """
+    if is_stdin(image_path):
+        # imdecode asserts on an empty buffer rather than failing like imread
+        data = read_stdin()
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags) if data else None
+    return cv2.imread(str(image_path), flags)
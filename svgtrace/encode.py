@@ -0,0 +1,216 @@
+"""
+Compact re-encoding of SVG path data.
+
+The converters write every command in absolute form with full float
+precision ("C123.45678901234,67.8901234567 ..."). PathEncoder rewrites
+that into the shortest equivalent form it can find at a fixed decimal
+precision: coordinates are rounded, each segment uses whichever of the
+absolute or relative command is shorter, repeated command letters are
+dropped and separators are only written where the syntax needs them.
+"""
+import re
+
+_TOKEN = re.compile(r'[A-DF-Za-df-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+# Number of coordinate pairs taken by each command
+_PAIRS = {'M': 1, 'L': 1, 'C': 3, 'S': 2, 'Z': 0}
+
+class PathEncoder:
+    """
+    Stateful encoder, so a path can be fed in chunks (one per contour).
+
+    Coordinates are kept as integers scaled by 10**precision. Relative
+    offsets are computed from the rounded absolute positions, so rounding
+    errors never accumulate along a path.
+
+    Attributes:
+        input_bytes: Total length of the path data passed in
+        output_bytes: Total length of the encoded path data
+    """
+
+    def __init__(self, precision=2, relative=True):
+        if precision < 0:
+            raise ValueError("precision must be zero or positive")
+        self.precision = precision
+        self.relative = relative
+        self.scale = 10 ** precision
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.restart()
+
+    def restart(self):
+        """
+        Start an independent path, e.g. the d attribute of another <path> element.
+        """
+        # Current point, start of the current subpath and emitter state
+        self._point = (0, 0)
+        self._subpath_start = (0, 0)
+        self._implicit = None
+        self._last_number = None
+
+    def _format(self, n):
+        """
+        Format a scaled integer with as few characters as possible.
+        """
+        if self.precision == 0:
+            return str(n)
+
+        whole, frac = divmod(abs(n), self.scale)
+        frac = str(frac).rjust(self.precision, '0').rstrip('0')
+        text = (str(whole) if whole or not frac else '') + ('.' + frac if frac else '')
+        return '-' + text if n < 0 and text != '0' else text
+
+    def _numbers(self, numbers):
+        """
+        Join formatted numbers, writing a separator only where one is needed.
+
+        Returns the joined text assuming it follows a command letter, and the
+        separator needed if it follows the previous number instead.
+        """
+        text = ''
+        previous = None
+        first_separator = ''
+        for i, number in enumerate(numbers):
+            separator = self._separator(previous, number)
+            if i == 0:
+                first_separator = self._separator(self._last_number, number)
+            else:
+                text += separator
+            text += number
+            previous = number
+        return text, first_separator
+
+    @staticmethod
+    def _separator(previous, number):
+        """
+        Separator needed between two numbers.
+        """
+        if previous is None or number[0] == '-':
+            return ''
+        if number[0] == '.' and ('.' in previous or 'e' in previous):
+            return ''
+        return ' '
+
+    def _candidate(self, command, numbers):
+        """
+        Text for one segment written with `command`, eliding a repeated letter.
+        """
+        text, separator = self._numbers(numbers)
+        if command == self._implicit:
+            return separator + text
+        return command + text
+
+    def _segment(self, command, points):
+        """
+        Encode one absolute segment given as scaled integer points.
+        """
+        x0, y0 = self._point
+        absolute = [self._format(v) for point in points for v in point]
+        candidates = [self._candidate(command, absolute)]
+
+        if self.relative:
+            relative = [self._format(v) for x, y in points for v in (x - x0, y - y0)]
+            candidates.append(self._candidate(command.lower(), relative))
+
+        text = min(candidates, key=len)
+        emitted = text[0] if text[0].isalpha() else self._implicit
+
+        # After a moveto, further coordinate pairs are implicit linetos
+        self._implicit = {'M': 'L', 'm': 'l'}.get(emitted, emitted)
+        self._last_number = (absolute if emitted.isupper() else relative)[-1]
+        self._point = points[-1]
+        if command == 'M':
+            self._subpath_start = points[-1]
+        return text
+
+    def encode(self, path_data):
+        """
+        Encode a chunk of path data.
+
+        Args:
+            path_data: SVG path data string, continuing from any earlier chunks
+
+        Returns:
+            Compact path data string
+        """
+        tokens = _TOKEN.findall(path_data)
+        output = []
+        i = 0
+        command = None
+        while i < len(tokens):
+            if tokens[i].isalpha():
+                command = tokens[i]
+                if command.upper() not in _PAIRS:
+                    raise ValueError(f"Unsupported path command '{command}'")
+                i += 1
+            elif command is None:
+                raise ValueError(f"Path data must start with a command: {path_data[:20]!r}")
+
+            upper = command.upper()
+            if upper == 'Z':
+                output.append('z')
+                self._point = self._subpath_start
+                self._implicit = None
+                self._last_number = None
+                continue
+
+            # Read the coordinate pairs of one segment and make them absolute
+            count = 2 * _PAIRS[upper]
+            values = [float(v) for v in tokens[i:i + count]]
+            if len(values) != count:
+                raise ValueError(f"Incomplete '{command}' segment in path data")
+            i += count
+
+            x0, y0 = self._point
+            points = []
+            for x, y in zip(values[::2], values[1::2]):
+                point = (round(x * self.scale), round(y * self.scale))
+                if command.islower():
+                    point = (point[0] + x0, point[1] + y0)
+                points.append(point)
+
+            output.append(self._segment(upper, points))
+
+            # Extra pairs after a moveto are linetos
+            if upper == 'M':
+                command = 'l' if command.islower() else 'L'
+
+        encoded = ''.join(output)
+        self.input_bytes += len(path_data)
+        self.output_bytes += len(encoded)
+        return encoded
+
+    def iter_encode(self, path_chunks, separate=False):
+        """
+        Encode an iterable of path data chunks lazily.
+
+        With `separate`, every chunk is encoded as a path of its own, for
+        output that writes each chunk as its own <path> element.
+        """
+        for chunk in path_chunks:
+            if separate:
+                self.restart()
+            yield self.encode(chunk)
+
+    def savings(self):
+        """
+        Describe how much smaller the encoded path data is.
+        """
+        saved = self.input_bytes - self.output_bytes
+        ratio = saved / self.input_bytes if self.input_bytes else 0.0
+        return (f"Compact path data: {self.output_bytes} bytes instead of {self.input_bytes} "
+                f"({saved} bytes, {ratio:.1%} smaller)")
+
+def compact_path(path_data, precision=2, relative=True):
+    """
+    Encode a complete path data string compactly.
+
+    Args:
+        path_data: SVG path data string
+        precision: Number of decimal places kept
+        relative: Whether relative commands may be used
+
+    Returns:
+        Compact path data string
+    """
+    return PathEncoder(precision, relative).encode(path_data)
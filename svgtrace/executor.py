@@ -0,0 +1,148 @@
+"""
+Pipelined execution of multi-stage jobs on thread pools.
+
+OpenCV releases the GIL while it decodes and processes images, and file
+I/O releases it while waiting, so threads of one process can decode one
+image, trace another and write a third at the same time without the
+memory cost of a process pool. PipelinedExecutor runs every item through
+a chain of stages, each with its own threads, connected by bounded queues:
+when a later stage falls behind, the queue in front of it fills up and
+the earlier stages wait instead of piling up decoded images.
+"""
+import queue
+import threading
+import time
+
+# Marks the end of the items on a stage's queue
+_DONE = object()
+
+class Stage:
+    """
+    One step of a pipelined job.
+
+    Attributes:
+        name: Name used in reports
+        func: Function applied to every item's value, returning the value passed on
+        threads: Number of threads running the stage
+        busy_seconds: Total time the stage's threads spent in func
+        items: Number of items the stage processed
+    """
+
+    def __init__(self, name, func, threads=1):
+        if threads < 1:
+            raise ValueError(f"Stage {name!r} needs at least one thread")
+        self.name = name
+        self.func = func
+        self.threads = threads
+        self.busy_seconds = 0.0
+        self.items = 0
+
+class PipelinedExecutor:
+    """
+    Run items through stages on thread pools connected by bounded queues.
+
+    Attributes:
+        stages: The Stage objects, in order
+        queue_depth: Maximum number of items waiting in front of each stage
+        wall_seconds: Wall time of the last map() call
+    """
+
+    def __init__(self, stages, queue_depth=4):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = [s if isinstance(s, Stage) else Stage(*s) for s in stages]
+        self.queue_depth = queue_depth
+        self.wall_seconds = 0.0
+
+    def _run_stage(self, index, inbox, outbox, remaining, lock):
+        stage = self.stages[index]
+        while True:
+            entry = inbox.get()
+            if entry is _DONE:
+                break
+            key, value, seconds, error = entry
+
+            # Items that failed in an earlier stage pass through untouched
+            if error is None:
+                start = time.perf_counter()
+                try:
+                    value = stage.func(value)
+                except Exception as e:
+                    value, error = None, e
+                elapsed = time.perf_counter() - start
+                seconds = seconds + (elapsed,)
+                with lock:
+                    stage.busy_seconds += elapsed
+                    stage.items += 1
+            outbox.put((key, value, seconds, error))
+
+        # The last thread of a stage to finish tells the next stage
+        with lock:
+            remaining[index] -= 1
+            last = remaining[index] == 0
+        if last:
+            following = self.stages[index + 1].threads if index + 1 < len(self.stages) else 1
+            for _ in range(following):
+                outbox.put(_DONE)
+
+    def map(self, items):
+        """
+        Run every item through all stages.
+
+        Args:
+            items: Iterable of (key, value) pairs; the first stage receives each value
+
+        Yields:
+            Tuple of (key, result, per-stage seconds, exception or None) per item, in the
+            order they finish; an item that fails skips the remaining stages
+        """
+        queues = [queue.Queue(self.queue_depth) for _ in self.stages] + [queue.Queue()]
+        remaining = [stage.threads for stage in self.stages]
+        lock = threading.Lock()
+        for stage in self.stages:
+            stage.busy_seconds = 0.0
+            stage.items = 0
+
+        threads = [
+            threading.Thread(target=self._run_stage, args=(i, queues[i], queues[i + 1], remaining, lock),
+                             name=f'{stage.name}-{n}', daemon=True)
+            for i, stage in enumerate(self.stages)
+            for n in range(stage.threads)
+        ]
+
+        def feed():
+            for key, value in items:
+                queues[0].put((key, value, (), None))
+            for _ in range(self.stages[0].threads):
+                queues[0].put(_DONE)
+
+        start = time.perf_counter()
+        feeder = threading.Thread(target=feed, name='feed', daemon=True)
+        for thread in threads + [feeder]:
+            thread.start()
+        try:
+            while True:
+                entry = queues[-1].get()
+                if entry is _DONE:
+                    break
+                yield entry
+        finally:
+            self.wall_seconds = time.perf_counter() - start
+
+    def utilization(self):
+        """
+        Busy time of every stage over the last map() call.
+
+        Returns:
+            List of (name, threads, items, busy seconds, share of its threads' wall time busy)
+        """
+        wall = self.wall_seconds or 1.0
+        return [(s.name, s.threads, s.items, s.busy_seconds, s.busy_seconds / (wall * s.threads)) for s in self.stages]
+
+    def summary(self):
+        """
+        One-line description of where the last map() call spent its time.
+        """
+        parts = [f"{name} {busy:.2f}s on {threads} thread{'s' if threads > 1 else ''} ({share:.0%} busy)"
+                 for name, threads, _, busy, share in self.utilization()]
+        return f"Pipeline stages: {', '.join(parts)}; queue depth {self.queue_depth}"
@@ -0,0 +1,379 @@
+"""
+Least-squares cubic bezier fitting of traced contours.
+
+`bezier_path` writes one curve segment per simplified vertex, so smooth
+strokes still cost a segment every few pixels. CurveFitter follows
+Schneider's algorithm ("An Algorithm for Automatically Fitting Digitized
+Curves", Graphics Gems, 1990) instead: the raw findContours points are
+split at corners, and each run between corners is covered by as few
+cubic segments as keep every point within a maximum error. A segment is
+fitted by least squares with fixed end tangents, its parameters refined
+by Newton-Raphson, and split at the worst point when it still misses.
+"""
+from svgtrace.lazy import lazy_import
+from svgtrace.serialize import _as_points, polyline_to_path
+
+np = lazy_import('numpy')
+
+# Turning angle (degrees) above which a contour point is a corner
+DEFAULT_CORNER_ANGLE = 70
+
+# Arc length (pixels) over which tangents and turning angles are measured,
+# long enough to see past the staircase of pixel contours
+TANGENT_RADIUS = 4.0
+
+# Newton-Raphson refinements tried before a segment is split
+MAX_ITERATIONS = 4
+
+def _unit(vectors):
+    """
+    Normalize vectors, leaving zero vectors unchanged.
+    """
+    vectors = np.asarray(vectors, dtype=np.float64)
+    norm = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norm, out=np.zeros_like(vectors), where=norm > 0)
+
+def _arc_lengths(points):
+    """
+    Cumulative arc length at every point of a polyline.
+    """
+    steps = np.hypot(*np.diff(points, axis=0).T)
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+def find_corners(points, corner_angle=DEFAULT_CORNER_ANGLE, radius=TANGENT_RADIUS):
+    """
+    Find the corners of a closed contour.
+
+    The turning angle at each point is measured between the points one
+    `radius` of arc length behind and ahead of it, and corners are the
+    points turning more than `corner_angle` that turn the most within
+    that radius.
+
+    Args:
+        points: Contour points, shape (N, 2)
+        corner_angle: Turning angle in degrees above which a point is a corner
+        radius: Arc length over which the turning angle is measured
+
+    Returns:
+        Sorted array of corner indices
+    """
+    n = len(points)
+    arc = _arc_lengths(np.concatenate((points, points[:1])))
+    perimeter = arc[-1]
+    if n < 3 or perimeter <= 4 * radius:
+        return np.zeros(0, dtype=np.intp)
+
+    # Three laps of the contour, so neighbours wrap around the start
+    laps = np.concatenate((arc[:-1] - perimeter, arc[:-1], arc[:-1] + perimeter))
+    here = arc[:-1]
+    ahead = np.searchsorted(laps, here + radius) % n
+    behind = (np.searchsorted(laps, here - radius, side='right') - 1) % n
+
+    incoming = _unit(points - points[behind])
+    outgoing = _unit(points[ahead] - points)
+    cosine = np.clip((incoming * outgoing).sum(axis=1), -1.0, 1.0)
+    turn = np.degrees(np.arccos(cosine))
+
+    # Keep the sharpest point of every cluster of candidates
+    candidates = np.flatnonzero(turn > corner_angle)
+    corners = []
+    for i in candidates[np.argsort(-turn[candidates], kind='stable')]:
+        if all(min(abs(arc[i] - arc[j]), perimeter - abs(arc[i] - arc[j])) > radius for j in corners):
+            corners.append(i)
+    return np.sort(np.array(corners, dtype=np.intp))
+
+def _end_tangent(points, arc, radius=TANGENT_RADIUS):
+    """
+    Unit tangent leaving the first point of a run, towards the point one radius along it.
+    """
+    ahead = min(int(np.searchsorted(arc, radius)), len(points) - 1)
+    tangent = _unit(points[ahead] - points[0])
+    if not tangent.any():
+        tangent = _unit(points[-1] - points[0])
+    return tangent
+
+def _center_tangent(points, arc, i, radius=TANGENT_RADIUS):
+    """
+    Unit tangent at an interior point, pointing back along the run.
+    """
+    behind = max(int(np.searchsorted(arc, arc[i] - radius, side='right')) - 1, 0)
+    ahead = min(int(np.searchsorted(arc, arc[i] + radius)), len(points) - 1)
+    tangent = _unit(points[behind] - points[ahead])
+    if not tangent.any():
+        tangent = _unit(points[i - 1] - points[i + 1])
+    return tangent
+
+def _bernstein(t):
+    """
+    Cubic Bernstein basis at parameters t, shape (len(t), 4).
+    """
+    s = 1 - t
+    basis = np.empty((len(t), 4))
+    basis[:, 0] = s * s * s
+    basis[:, 1] = 3 * s * s * t
+    basis[:, 2] = 3 * s * t * t
+    basis[:, 3] = t * t * t
+    return basis
+
+def _evaluate(curve, t):
+    """
+    Points, first and second derivatives of a cubic at parameters t.
+    """
+    p0, p1, p2, p3 = curve
+    s = (1 - t)[:, None]
+    t = t[:, None]
+    point = _bernstein(t[:, 0]) @ curve
+    first = 3 * (s * s * (p1 - p0) + 2 * s * t * (p2 - p1) + t * t * (p3 - p2))
+    second = 6 * (s * (p2 - 2 * p1 + p0) + t * (p3 - 2 * p2 + p1))
+    return point, first, second
+
+def _generate_bezier(points, t, tangent_start, tangent_end):
+    """
+    Least-squares cubic through the run's end points with the given end tangents.
+    """
+    start, end = points[0], points[-1]
+    basis = _bernstein(t)
+
+    # Normal equations for the two tangent lengths
+    a1 = basis[:, 1, None] * tangent_start
+    a2 = basis[:, 2, None] * tangent_end
+    residual = points - (basis[:, 0] + basis[:, 1])[:, None] * start - (basis[:, 2] + basis[:, 3])[:, None] * end
+    c00, c01, c11 = np.einsum('ij,ij->', a1, a1), np.einsum('ij,ij->', a1, a2), np.einsum('ij,ij->', a2, a2)
+    x0, x1 = np.einsum('ij,ij->', a1, residual), np.einsum('ij,ij->', a2, residual)
+
+    chord = np.linalg.norm(end - start)
+    det = c00 * c11 - c01 * c01
+    alpha_start = alpha_end = 0.0
+    if abs(det) > 1e-12:
+        alpha_start = (x0 * c11 - x1 * c01) / det
+        alpha_end = (c00 * x1 - c01 * x0) / det
+
+    # Degenerate fits fall back to Wu and Barsky's heuristic
+    epsilon = 1e-6 * chord
+    if alpha_start < epsilon or alpha_end < epsilon:
+        alpha_start = alpha_end = chord / 3
+
+    return np.array([start, start + alpha_start * tangent_start, end + alpha_end * tangent_end, end])
+
+def _max_error(points, curve, t):
+    """
+    Largest distance between the points and the curve at their parameters, and its index.
+    """
+    point, _, _ = _evaluate(curve, t)
+    distance = np.hypot(*(point - points).T)
+    i = int(np.argmax(distance[1:-1])) + 1 if len(points) > 2 else 0
+    return float(distance.max()), i
+
+def _reparameterize(points, curve, t):
+    """
+    One Newton-Raphson step towards each point's closest parameter on the curve.
+    """
+    point, first, second = _evaluate(curve, t)
+    delta = point - points
+    numerator = (delta * first).sum(axis=1)
+    denominator = (first * first).sum(axis=1) + (delta * second).sum(axis=1)
+    step = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=np.abs(denominator) > 1e-12)
+    t = np.clip(t - step, 0.0, 1.0)
+    # Keep the parameters in order along the run
+    return np.maximum.accumulate(t)
+
+def fit_run(points, tangent_start, tangent_end, max_error):
+    """
+    Fit an open run of points with cubic segments.
+
+    Args:
+        points: Run points, shape (N, 2)
+        tangent_start: Unit tangent leaving the first point
+        tangent_end: Unit tangent at the last point, pointing back along the run
+        max_error: Maximum distance allowed between the points and the curve
+
+    Returns:
+        Tuple of (list of (4, 2) control point arrays, largest remaining error)
+    """
+    segments = []
+    worst = 0.0
+    # Work list of (start, stop, tangent_start, tangent_end), leftmost last
+    pending = [(0, len(points) - 1, tangent_start, tangent_end)]
+    arc = _arc_lengths(points)
+
+    while pending:
+        lo, hi, t1, t2 = pending.pop()
+        run = points[lo:hi + 1]
+
+        if len(run) == 2:
+            third = np.linalg.norm(run[1] - run[0]) / 3
+            segments.append(np.array([run[0], run[0] + t1 * third, run[1] + t2 * third, run[1]]))
+            continue
+
+        run_arc = arc[lo:hi + 1] - arc[lo]
+        t = run_arc / run_arc[-1] if run_arc[-1] > 0 else np.linspace(0, 1, len(run))
+        curve = _generate_bezier(run, t, t1, t2)
+        error, split = _max_error(run, curve, t)
+
+        # Close misses are usually fixed by better parameters
+        if max_error < error < 4 * max_error:
+            for _ in range(MAX_ITERATIONS):
+                t = _reparameterize(run, curve, t)
+                curve = _generate_bezier(run, t, t1, t2)
+                error, split = _max_error(run, curve, t)
+                if error <= max_error:
+                    break
+
+        if error <= max_error:
+            segments.append(curve)
+            worst = max(worst, error)
+            continue
+
+        # Split at the worst point, with a shared tangent there
+        middle = _center_tangent(points[lo:hi + 1], run_arc, split)
+        pending.append((lo + split, hi, -middle, t2))
+        pending.append((lo, lo + split, t1, middle))
+
+    return segments, worst
+
+def fit_contour(contour, max_error=1.0, corner_angle=DEFAULT_CORNER_ANGLE, closed=True):
+    """
+    Fit a contour with as few cubic segments as the error allows.
+
+    Args:
+        contour: Contour points, (N, 1, 2) or (N, 2)
+        max_error: Maximum distance in pixels between the contour points and the curve
+        corner_angle: Turning angle in degrees above which a point is a corner
+        closed: Whether the contour is a closed outline (False for an open polyline,
+            whose ends are kept where they are)
+
+    Returns:
+        Tuple of (segments array of shape (K, 4, 2), largest distance of a point from the curve)
+    """
+    points = _as_points(contour).astype(np.float64)
+
+    # Drop repeated points, which have no tangent
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.any(np.diff(points, axis=0) != 0, axis=1)
+    points = points[keep]
+    if not closed:
+        return _fit_open(points, max_error, corner_angle)
+    if len(points) > 1 and np.array_equal(points[0], points[-1]):
+        points = points[:-1]
+    if len(points) < 3:
+        return np.zeros((0, 4, 2)), 0.0
+
+    corners = find_corners(points, corner_angle)
+    if len(corners):
+        # Start the closed loop at a corner, so every run ends at one
+        points = np.roll(points, -corners[0], axis=0)
+        corners = corners - corners[0]
+    loop = np.concatenate((points, points[:1]))
+    arc = _arc_lengths(loop)
+
+    segments = []
+    worst = 0.0
+    bounds = list(corners) + [len(points)] if len(corners) else [0, len(points)]
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        run = loop[lo:hi + 1]
+        run_arc = arc[lo:hi + 1] - arc[lo]
+        if len(corners):
+            tangent_start = _end_tangent(run, run_arc)
+            tangent_end = _end_tangent(run[::-1], run_arc[-1] - run_arc[::-1])
+        else:
+            # A smooth loop: both ends share the tangent through the start point
+            ahead = int(np.searchsorted(arc, TANGENT_RADIUS))
+            behind = int(np.searchsorted(arc, arc[-1] - TANGENT_RADIUS, side='right')) - 1
+            tangent_start = _unit(loop[ahead] - loop[behind])
+            tangent_end = -tangent_start
+        run_segments, error = fit_run(run, tangent_start, tangent_end, max_error)
+        segments.extend(run_segments)
+        worst = max(worst, error)
+
+    return np.array(segments), worst
+
+def _fit_open(points, max_error, corner_angle):
+    """
+    Fit an open polyline, its runs split at the corners between its two ends.
+    """
+    if len(points) < 3:
+        return np.zeros((0, 4, 2)), 0.0
+    arc = _arc_lengths(points)
+
+    # Corners are looked for as if the polyline were closed; the ends aren't corners
+    corners = [i for i in find_corners(points, corner_angle).tolist()
+               if TANGENT_RADIUS < arc[i] < arc[-1] - TANGENT_RADIUS]
+
+    segments = []
+    worst = 0.0
+    bounds = [0] + corners + [len(points) - 1]
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        run = points[lo:hi + 1]
+        run_arc = arc[lo:hi + 1] - arc[lo]
+        tangent_start = _end_tangent(run, run_arc)
+        tangent_end = _end_tangent(run[::-1], run_arc[-1] - run_arc[::-1])
+        run_segments, error = fit_run(run, tangent_start, tangent_end, max_error)
+        segments.extend(run_segments)
+        worst = max(worst, error)
+
+    return np.array(segments), worst
+
+def curves_to_path(segments, decimals=3):
+    """
+    Format a chain of cubic segments as an SVG subpath.
+
+    Args:
+        segments: Array of shape (K, 4, 2); each segment starts where the previous one ends
+        decimals: Decimal places kept; fitted control points carry no more precision than that
+
+    Returns:
+        SVG path string of the form "Mx,y Cx,y x,y x,y Cx,y ..."
+    """
+    if len(segments) == 0:
+        return ""
+    # Adding 0.0 turns -0.0 into 0.0, so rounding never writes "-0"
+    segments = np.round(np.asarray(segments, dtype=np.float64), decimals) + 0.0
+    number = f'%.{decimals}f'
+    values = [number % v for v in segments[0, 0].tolist() + segments[:, 1:].reshape(-1).tolist()]
+    if decimals > 0:
+        values = [v.rstrip('0').rstrip('.') for v in values]
+    template = "M%s,%s" + " C%s,%s %s,%s %s,%s" * len(segments)
+    return template % tuple(values)
+
+class CurveFitter:
+    """
+    Fits contours with CurveFitter.path and keeps totals for the summary line.
+
+    Attributes:
+        max_error: Maximum distance in pixels between contour points and the curve
+        corner_angle: Turning angle in degrees above which a point is a corner
+        points: Number of contour points fitted
+        segments: Number of cubic segments written
+        max_deviation: Largest distance of a contour point from its curve
+    """
+
+    def __init__(self, max_error=1.0, corner_angle=DEFAULT_CORNER_ANGLE):
+        if max_error <= 0:
+            raise ValueError("max_error must be positive")
+        self.max_error = max_error
+        self.corner_angle = corner_angle
+        self.points = 0
+        self.segments = 0
+        self.max_deviation = 0.0
+
+    def path(self, contour, closed=True):
+        """
+        Fit a contour, closed or open, and return it as SVG path data.
+
+        Contours too small to fit are written as line segments.
+        """
+        segments, deviation = fit_contour(contour, self.max_error, self.corner_angle, closed)
+        self.points += len(contour)
+        self.max_deviation = max(self.max_deviation, deviation)
+        if len(segments) == 0:
+            self.segments += max(len(contour) - 1, 0)
+            return polyline_to_path(contour)
+        self.segments += len(segments)
+        return curves_to_path(segments)
+
+    def summary(self):
+        """
+        Describe the fitted curves.
+        """
+        return (f"Curve fit: {self.points} contour points -> {self.segments} cubic segments, "
+                f"max deviation {self.max_deviation:.2f}px (limit {self.max_error:g}px)")
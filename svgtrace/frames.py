@@ -0,0 +1,343 @@
+"""
+Tracing of animations and frame sequences with contour reuse.
+
+Consecutive frames of an animation usually differ in a small part of the
+picture, yet tracing every frame on its own blurs, thresholds, traces and
+converts the whole image each time. FrameTracer keeps the previous
+frame's mask and contours: it re-thresholds only the tiles whose pixels
+changed, compares the new mask with the old one tile by tile, and traces
+again only the region around the changed tiles. Contours away from that
+region are carried over, and every contour with exactly the same points
+as one of the previous frame gets that contour's path data back instead
+of being simplified and converted again.
+
+The retraced region grows until it covers every old contour whose
+bounding box (plus one pixel) it touches, and the bounding box of every
+contour traced in it, so no component can cross its edge and no carried
+over contour can enclose or be enclosed by a retraced one. The contours,
+their order and the path data are then exactly those of tracing the
+frame on its own.
+
+When most of the picture moves in every frame, as in confetti, almost
+nothing can be carried over and comparing tiles only adds work. A frame
+that reused few contours of the one before is followed by a full trace,
+whose contours are still matched for path data, so tracing becomes
+incremental again as soon as the frames settle.
+"""
+import glob
+from pathlib import Path
+
+from svgtrace.contours import ContourSet
+from svgtrace.instrument import stage
+from svgtrace.lazy import lazy_import
+from svgtrace.pipeline import iter_path_data, read_image, threshold_image, to_gray
+from svgtrace.pyramid import BLUR_CONTEXT
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Side of the square tiles frames are compared in; must be at least BLUR_CONTEXT
+TILE = 32
+
+# Past this share of changed tiles a frame is traced in full, which is then cheaper
+FULL_TRACE_SHARE = 0.5
+
+# Below this share of contours carried over from the previous frame, the next frame
+# is traced in full; path data is still matched, so reuse resumes once frames settle
+MIN_REUSED_SHARE = 0.25
+
+# Still image formats read as frames when the source is a directory
+FRAME_SUFFIXES = {'.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp'}
+
+def frame_paths(source):
+    """
+    Still frames of a sequence, in name order.
+
+    Args:
+        source: Directory of images, glob pattern, or list of image paths
+
+    Returns:
+        List of paths, or None when source is a single animated image or video
+    """
+    if isinstance(source, (list, tuple)):
+        return [Path(p) for p in source]
+    if Path(source).is_dir():
+        return sorted(p for p in Path(source).iterdir() if p.suffix.lower() in FRAME_SUFFIXES)
+    if glob.has_magic(str(source)):
+        return sorted(Path(p) for p in glob.glob(str(source)))
+    return None
+
+def iter_frames(source):
+    """
+    Decode the frames of an animated image, a video or a sequence of stills one at a time.
+
+    Animated GIF, WebP and APNG files and videos are streamed through
+    OpenCV's video reader, which composites transparent frames over white.
+
+    Args:
+        source: Animated image or video path, directory of images, glob pattern, or list of image paths
+
+    Yields:
+        Tuple of (BGR image array, frame duration in seconds or None when unknown)
+    """
+    paths = frame_paths(source)
+    if paths is not None:
+        if not paths:
+            raise ValueError(f"No frames found in {source}")
+        for path in paths:
+            yield read_image(path), None
+        return
+
+    capture = cv2.VideoCapture(str(source))
+    if not capture.isOpened():
+        raise ValueError(f"Could not read frames from {source}")
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        duration = 1 / fps if fps > 0 else None
+        while True:
+            with stage('decode') as s:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                s.set(width=frame.shape[1], height=frame.shape[0])
+            yield frame, duration
+    finally:
+        capture.release()
+
+def changed_tiles(a, b, tile=TILE):
+    """
+    Map of the tiles where two arrays of the same shape differ.
+
+    Returns:
+        Boolean array with one entry per tile, partial tiles at the right and bottom included
+    """
+    height, width = a.shape
+    with stage('diff'):
+        diff = cv2.absdiff(a, b)
+        diff = cv2.copyMakeBorder(diff, 0, -height % tile, 0, -width % tile, cv2.BORDER_CONSTANT, value=0)
+        rows, cols = diff.shape[0] // tile, diff.shape[1] // tile
+        # Reducing the rows of each tile first keeps the reductions contiguous, which is much faster
+        return diff.reshape(rows, tile, cols * tile).max(axis=1).reshape(rows, cols, tile).max(axis=2) > 0
+
+def tile_groups(tiles):
+    """
+    Connected groups of set tiles, 8-connected.
+
+    Returns:
+        Tuple of (label array, list of (label, x0, y0, x1, y1) tile rectangles)
+    """
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(tiles.astype(np.uint8), connectivity=8)
+    groups = [(k, x, y, x + w, y + h) for k, (x, y, w, h) in enumerate(stats[1:, :4].tolist(), 1)]
+    return labels, groups
+
+def paint_boxes(tiles, boxes, tile=TILE, margin=1):
+    """
+    Set the tiles under bounding boxes (x, y, width, height), each widened by `margin` pixels.
+    """
+    rows, cols = tiles.shape
+    for x, y, w, h in boxes.tolist():
+        tiles[max(y - margin, 0) // tile:min((y + h + margin - 1) // tile + 1, rows),
+              max(x - margin, 0) // tile:min((x + w + margin - 1) // tile + 1, cols)] = True
+
+def boxes_touching(tiles, boxes, tile=TILE, margin=1):
+    """
+    Which bounding boxes, each widened by `margin` pixels, overlap a set tile.
+
+    Returns:
+        Boolean array with one entry per box
+    """
+    if not len(boxes):
+        return np.zeros(0, dtype=bool)
+    rows, cols = tiles.shape
+
+    # Summed-area table of the tile map, so each box is counted in four lookups
+    table = np.zeros((rows + 1, cols + 1), dtype=np.int32)
+    table[1:, 1:] = tiles.cumsum(axis=0).cumsum(axis=1)
+
+    x, y, w, h = boxes.T.astype(np.intp)
+    x0, y0 = np.maximum(x - margin, 0) // tile, np.maximum(y - margin, 0) // tile
+    x1 = np.minimum((x + w + margin - 1) // tile + 1, cols)
+    y1 = np.minimum((y + h + margin - 1) // tile + 1, rows)
+    return table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0] > 0
+
+class FrameTracer:
+    """
+    Traces the frames of an animation one after another, reusing unchanged contours.
+
+    Attributes:
+        threshold_value: Value for binary thresholding (0-255)
+        smoothing: Whether to blur frames before thresholding
+        min_contour_length: Minimum length of contours to include
+        path_options: Keyword arguments of iter_path_data for each contour's path data
+        reuse: Whether to reuse the previous frame's mask and contours (False traces every frame in full)
+        tile: Side of the square tiles frames are compared in
+        frames: Number of frames traced
+        traced_pixels: Total pixels traced, over all frames
+        reused: Total contours whose path data was carried over from the previous frame
+        converted: Total contours converted to path data
+    """
+
+    def __init__(self, threshold_value=127, smoothing=True, min_contour_length=50, reuse=True, tile=TILE, **path_options):
+        if tile < BLUR_CONTEXT:
+            raise ValueError(f"tile must be at least {BLUR_CONTEXT} pixels")
+        self.threshold_value = threshold_value
+        self.smoothing = smoothing
+        self.min_contour_length = min_contour_length
+        self.path_options = path_options
+        self.reuse = reuse
+        self.tile = tile
+        self.frames = 0
+        self.traced_pixels = 0
+        self.reused = 0
+        self.converted = 0
+        self._gray = None
+        self._mask = None
+        self._contours = None
+        self._paths = None
+        self._reused_share = 1.0
+
+    def _threshold(self, gray, tiles):
+        """
+        The previous mask with the given tiles thresholded again from gray.
+        """
+        mask = self._mask.copy()
+        height, width = gray.shape
+        context = BLUR_CONTEXT if self.smoothing else 0
+        _, groups = tile_groups(tiles)
+        for _, tx0, ty0, tx1, ty1 in groups:
+            x0, y0 = tx0 * self.tile, ty0 * self.tile
+            x1, y1 = min(tx1 * self.tile, width), min(ty1 * self.tile, height)
+            cx0, cy0 = max(x0 - context, 0), max(y0 - context, 0)
+            cx1, cy1 = min(x1 + context, width), min(y1 + context, height)
+            strip = threshold_image(gray[cy0:cy1, cx0:cx1], self.threshold_value, self.smoothing)
+            mask[y0:y1, x0:x1] = strip[y0 - cy0:y1 - cy0, x0 - cx0:x1 - cx0]
+        return mask
+
+    def _retrace(self, mask, region):
+        """
+        Trace the components of mask within a tile region.
+
+        Returns:
+            List of contours in image coordinates
+        """
+        height, width = mask.shape
+        labels, groups = tile_groups(region)
+        contours = []
+        for k, tx0, ty0, tx1, ty1 in groups:
+            x0, y0 = tx0 * self.tile, ty0 * self.tile
+            x1, y1 = min(tx1 * self.tile, width), min(ty1 * self.tile, height)
+
+            # Only the group's own tiles, since its rectangle can cover other groups and kept contours
+            inside = (labels[ty0:ty1, tx0:tx1] == k).astype(np.uint8)
+            inside = cv2.resize(inside, None, fx=self.tile, fy=self.tile, interpolation=cv2.INTER_NEAREST)
+            crop = mask[y0:y1, x0:x1] * inside[:y1 - y0, :x1 - x0]
+
+            traced, _ = cv2.findContours(crop, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(x0, y0))
+            contours.extend(traced)
+            self.traced_pixels += crop.size
+        return contours
+
+    def _update(self, mask):
+        """
+        All external contours of a mask, reusing those of the previous mask away from its changes.
+
+        Returns:
+            ContourSet in findContours order, or None when most of the mask would have to be traced again
+        """
+        old = self._contours
+        region = changed_tiles(mask, self._mask, self.tile)
+        if not region.any():
+            return old
+
+        with stage('retrace') as s:
+            stale = np.zeros(len(old), dtype=bool)
+            while True:
+                # Grow the region over every old contour that touches it
+                touching = boxes_touching(region, old.boxes) & ~stale
+                if touching.any():
+                    stale |= touching
+                    paint_boxes(region, old.boxes[touching], self.tile)
+                    if region.mean() > FULL_TRACE_SHARE:
+                        s.set(full=True)
+                        return None
+                    continue
+
+                # Trace it, and start over if a new contour reaches beyond it
+                traced = ContourSet.from_contours(self._retrace(mask, region))
+                grown = region.copy()
+                paint_boxes(grown, traced.boxes, self.tile)
+                if not (boxes_touching(grown, old.boxes) & ~stale).any():
+                    break
+                region = grown
+
+            kept = np.flatnonzero(~stale)
+            s.set(reused=len(kept), traced=len(traced))
+
+        # findContours lists contours by their first pixel in raster order, last first
+        contours = list(old.select(kept)) + list(traced)
+        starts = np.array([c[0, 0, ::-1] for c in contours], dtype=np.intp).reshape(-1, 2)
+        order = np.lexsort((-starts[:, 1], -starts[:, 0]))
+        return ContourSet.from_contours([contours[i] for i in order])
+
+    def trace(self, frame):
+        """
+        Trace one frame.
+
+        Args:
+            frame: BGR or grayscale image array
+
+        Returns:
+            Tuple of (ContourSet of the contours, largest area first, list of their path data strings)
+        """
+        gray = to_gray(frame)
+        self.frames += 1
+
+        reuse = self.reuse and self._gray is not None and self._gray.shape == gray.shape
+        mask = contours = None
+        if reuse and self._reused_share >= MIN_REUSED_SHARE:
+            # Threshold again only around the pixels that changed; the blur spreads a change by its context
+            tiles = changed_tiles(gray, self._gray, self.tile)
+            tiles = cv2.dilate(tiles.astype(np.uint8), np.ones((3, 3), dtype=np.uint8)) > 0
+            if tiles.mean() <= FULL_TRACE_SHARE:
+                mask = self._threshold(gray, tiles) if tiles.any() else self._mask
+                contours = self._update(mask)
+
+        # Past a point, thresholding or tracing the whole frame is cheaper
+        if mask is None:
+            mask = threshold_image(gray, self.threshold_value, self.smoothing)
+        if contours is None:
+            with stage('find_contours') as s:
+                contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                contours = ContourSet.from_contours(contours)
+                s.set(contours=len(contours))
+            self.traced_pixels += mask.size
+
+        with stage('filter_sort') as s:
+            kept = np.flatnonzero(contours.lengths > self.min_contour_length)
+            order = kept[np.argsort(-contours.areas[kept], kind='stable')].tolist()
+            s.set(kept=len(order))
+
+        # A contour with exactly the same points as one of the previous frame has the same path data
+        previous = self._paths if reuse else {}
+        keys = [contours[i].tobytes() for i in order]
+        paths = {key: previous[key] for key in keys if key in previous}
+        missing = [i for i, key in zip(order, keys) if key not in paths]
+        if missing:
+            for i, path_data in zip(missing, iter_path_data(contours.select(missing), **self.path_options)):
+                paths[contours[i].tobytes()] = path_data
+        self.reused += len(order) - len(missing)
+        self.converted += len(missing)
+        self._reused_share = 1 - len(missing) / len(order) if order else 1.0
+
+        self._gray, self._mask, self._contours, self._paths = gray, mask, contours, paths
+        return contours.select(order), [paths[key] for key in keys]
+
+    def summary(self):
+        """
+        One-line description of how much work reuse saved.
+        """
+        if not self.frames or self._gray is None:
+            return "No frames traced"
+        share = self.traced_pixels / (self.frames * self._gray.size)
+        return (f"Traced {self.frames} frames: {share:.1%} of the pixels traced, "
+                f"{self.reused} contours reused, {self.converted} converted to path data")
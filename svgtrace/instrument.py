@@ -0,0 +1,305 @@
+"""
+Per-stage instrumentation of the conversion pipeline.
+
+Pipeline stages are wrapped in `stage(name)` blocks. Nothing is recorded
+unless a Profiler is active (see `profiling()`); otherwise `stage` returns
+a shared object whose enter and exit do nothing, so the hooks cost a
+function call per stage.
+
+For every stage an active Profiler records wall time, CPU time, how much
+the stage raised the process's peak memory and any details the stage
+reports, such as image dimensions or contour and vertex counts. By default
+memory is read from the peak resident set size, which costs nothing but
+only shows growth past the previous high-water mark. With trace_memory the
+peak of each stage is measured with tracemalloc instead (NumPy and OpenCV
+arrays are included, since their buffers are allocated by NumPy), which is
+exact but slows down stages that allocate many Python objects.
+
+Results can be exported as a Chrome trace (chrome://tracing or
+https://ui.perfetto.dev) or condensed into a one-line summary.
+"""
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+# Profiler receiving stage events, or None when profiling is off
+_active = None
+
+class _NullStage:
+    """
+    Stand-in for a stage when no profiler is active.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **info):
+        pass
+
+_NULL_STAGE = _NullStage()
+
+def _peak_rss():
+    """
+    Peak resident set size of the process in bytes, or None if unknown.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class _Stage:
+    """
+    One timed stage of an active profiler.
+    """
+
+    def __init__(self, profiler, name, info):
+        self.profiler = profiler
+        self.name = name
+        self.info = info
+        self.child_wall = 0.0
+        self.peak = 0
+
+    def set(self, **info):
+        """
+        Attach details to the stage, e.g. the number of contours it produced.
+        """
+        self.info.update(info)
+
+    def __enter__(self):
+        stack = self.profiler._stack
+        if self.profiler.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # The peak is about to be reset, so hand it to the enclosing stage first
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.memory_start = current
+        else:
+            self.memory_start = _peak_rss()
+        stack.append(self)
+        self.cpu_start = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.start
+        cpu = time.process_time() - self.cpu_start
+        stack = self.profiler._stack
+        stack.pop()
+
+        memory = None
+        if self.profiler.trace_memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            memory = self.peak - self.memory_start
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, self.peak)
+        elif self.memory_start is not None:
+            memory = _peak_rss() - self.memory_start
+        if stack:
+            stack[-1].child_wall += wall
+
+        self.profiler.events.append({
+            'name': self.name,
+            'start': self.start - self.profiler.origin,
+            'wall': wall,
+            'self_wall': wall - self.child_wall,
+            'cpu': cpu,
+            'memory': memory,
+            'depth': len(stack),
+            'thread': threading.get_ident(),
+            'info': self.info,
+        })
+        return False
+
+class Profiler:
+    """
+    Collects stage events while active.
+
+    Attributes:
+        events: One dict per finished stage, in the order they finished
+        trace_memory: Whether peak memory is measured with tracemalloc
+            (exact, but slows Python allocations down)
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.events = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+
+    @property
+    def _stack(self):
+        # Stages nest per thread
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def stage(self, name, **info):
+        return _Stage(self, name, info)
+
+    def totals(self):
+        """
+        Sum the self time of every stage name, in order of first appearance.
+
+        Returns:
+            Dict mapping stage name to (seconds, number of calls)
+        """
+        totals = {}
+        for event in sorted(self.events, key=lambda e: e['start']):
+            seconds, calls = totals.get(event['name'], (0.0, 0))
+            totals[event['name']] = (seconds + event['self_wall'], calls + 1)
+        return totals
+
+    def counts(self):
+        """
+        Sum the numeric details reported by the stages (contours, vertices, ...).
+
+        Image dimensions are taken from the first stage that reports them.
+        """
+        counts = {}
+        for event in self.events:
+            for key, value in event['info'].items():
+                if key in ('width', 'height'):
+                    counts.setdefault(key, value)
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    counts[key] = counts.get(key, 0) + value
+        return counts
+
+    def summary(self):
+        """
+        One-line description of where the time went.
+        """
+        top_level = sum(e['wall'] for e in self.events if e['depth'] == 0)
+        parts = [f"{name} {seconds * 1000:.1f}ms" + (f" ({calls}x)" if calls > 1 else "")
+                 for name, (seconds, calls) in self.totals().items()]
+        line = f"Profile: {top_level * 1000:.1f}ms total: " + ", ".join(parts)
+
+        counts = self.counts()
+        details = []
+        if 'width' in counts:
+            details.append(f"{counts['width']}x{counts['height']} image")
+        decode = next((e['info'] for e in self.events if 'decode_mode' in e['info']), None)
+        if decode and 'decoded_bytes' in decode:
+            details.append(f"decoded as {decode['decode_mode']} ({decode['decoded_bytes'] / 1024 / 1024:.1f}MB)")
+        if 'contours' in counts:
+            details.append(f"{counts['contours']} contours" + (f" ({counts['kept']} kept)" if 'kept' in counts else ""))
+        elif 'kept' in counts:
+            details.append(f"{counts['kept']} contours")
+        if 'dropped' in counts:
+            details.append(f"{counts['dropped']} of {counts['components']} components dropped before tracing")
+        if 'vertices_in' in counts:
+            details.append(f"{counts['vertices_in']} -> {counts['vertices_out']} vertices after simplification")
+        if 'segments' in counts:
+            details.append(f"{counts['points']} points fitted with {counts['segments']} curve segments")
+        peak = max((e['memory'] for e in self.events if e['memory'] is not None), default=None)
+        if peak is not None:
+            details.append(f"{'traced' if self.trace_memory else 'RSS'} peak +{peak / 1024 / 1024:.1f}MB")
+        return line + ("; " + ", ".join(details) if details else "")
+
+    def chrome_trace(self):
+        """
+        Events in the Chrome trace event format.
+        """
+        pid = os.getpid()
+        trace_events = []
+        for event in self.events:
+            args = dict(event['info'])
+            args['cpu_ms'] = round(event['cpu'] * 1000, 3)
+            if event['memory'] is not None:
+                args['peak_memory_delta_bytes'] = event['memory']
+            trace_events.append({
+                'name': event['name'],
+                'cat': 'svgtrace',
+                'ph': 'X',
+                'ts': event['start'] * 1e6,
+                'dur': event['wall'] * 1e6,
+                'pid': pid,
+                'tid': event['thread'],
+                'args': args,
+            })
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def write_trace(self, path):
+        """
+        Save the Chrome trace as JSON.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def report(self, trace_path=None, file=None):
+        """
+        Print the summary line and save the trace if a path is given.
+
+        Args:
+            trace_path: Path to save the Chrome trace JSON (None to not save)
+            file: Text stream for the summary (defaults to stdout)
+        """
+        file = file or sys.stdout
+        print(self.summary(), file=file)
+        if trace_path:
+            self.write_trace(trace_path)
+            print(f"Trace saved to {trace_path}", file=file)
+
+def stage(name, **info):
+    """
+    Time a block as a pipeline stage if profiling is active.
+
+    Usage:
+        with stage('find_contours') as s:
+            contours = ...
+            s.set(contours=len(contours))
+    """
+    if _active is None:
+        return _NULL_STAGE
+    return _Stage(_active, name, info)
+
+def staged(name):
+    """
+    Decorator timing every call of a function as a stage.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _Stage(_active, name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+@contextlib.contextmanager
+def profiling(trace_memory=False):
+    """
+    Record the stages run inside the block.
+
+    Yields:
+        The active Profiler
+    """
+    global _active
+    profiler = Profiler(trace_memory)
+    previous = _active
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
+        if started_tracing:
+            tracemalloc.stop()
@@ -0,0 +1,52 @@
+"""
+Deferred imports of OpenCV and NumPy.
+
+Importing cv2 (and with it numpy) takes most of a converter's start-up
+time, which `--help`, argument errors and results served from the cache
+never need. The package's modules and the converters bind these modules
+with lazy_import instead, so they are only imported when a stage first
+uses them.
+"""
+import importlib
+import sys
+import types
+
+class _LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that imports it on first attribute access.
+    """
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        # Later lookups find the module's attributes directly
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+def lazy_import(name):
+    """
+    Bind a module without importing it yet.
+
+    Args:
+        name: Absolute module name, e.g. 'cv2'
+
+    Returns:
+        The module if it was already imported, otherwise a stand-in that
+        imports it when one of its attributes is first used
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return _LazyModule(name)
+
+def preload(*names):
+    """
+    Import modules now, for long-running processes whose first job shouldn't pay for it.
+
+    Stand-ins bound with lazy_import before this still import on their
+    first use, but then find the module already loaded.
+
+    Args:
+        names: Absolute module names, e.g. 'cv2'
+    """
+    for name in names:
+        importlib.import_module(name)
@@ -0,0 +1,285 @@
+"""
+Exact lengths of SVG path data.
+
+The page animates every path by its length (stroke-dasharray and
+stroke-dashoffset), which the browser only knows after measuring the
+path with getTotalLength() during layout. The converters can write the
+lengths into the SVG instead. Lengths are measured from the path data as
+written, so they match what the browser would measure for compact,
+cached and freshly traced output alike: line segments exactly, cubic
+bezier segments by adaptive Gauss-Legendre quadrature.
+"""
+import functools
+import re
+
+from svgtrace.encode import _PAIRS, _TOKEN
+from svgtrace.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Subdivision limit of the adaptive quadrature
+MAX_DEPTH = 16
+
+def line_lengths(start, end):
+    """
+    Lengths of straight line segments.
+
+    Args:
+        start: Segment start points, shape (N, 2)
+        end: Segment end points, shape (N, 2)
+
+    Returns:
+        Array of N lengths
+    """
+    delta = np.asarray(end, dtype=np.float64) - np.asarray(start, dtype=np.float64)
+    return np.hypot(delta[:, 0], delta[:, 1])
+
+@functools.lru_cache(maxsize=None)
+def _gauss_legendre(order=8):
+    """
+    Gauss-Legendre nodes and weights on [0, 1].
+    """
+    nodes, weights = np.polynomial.legendre.leggauss(order)
+    return (nodes + 1) / 2, weights / 2
+
+def _speed_integral(d0, d1, d2, t0, t1):
+    """
+    Integrate the speed |B'(t)| of cubic segments over [t0, t1] with Gauss-Legendre.
+
+    d0, d1 and d2 are the control point differences (c1 - p0, c2 - c1,
+    p3 - c2), so B'(t) = 3((1-t)^2 d0 + 2(1-t)t d1 + t^2 d2).
+    """
+    nodes, weights = _gauss_legendre()
+    span = (t1 - t0)[:, None]
+    t = t0[:, None] + span * nodes
+    u = 1 - t
+    a, b, c = (u * u)[..., None], (2 * u * t)[..., None], (t * t)[..., None]
+    derivative = 3 * (a * d0[:, None] + b * d1[:, None] + c * d2[:, None])
+    speed = np.hypot(derivative[..., 0], derivative[..., 1])
+    return (speed * weights).sum(axis=1) * span[:, 0]
+
+def cubic_lengths(start, c1, c2, end, tolerance=1e-3):
+    """
+    Lengths of cubic bezier segments.
+
+    Each segment is integrated over [0, 1] and over both halves; intervals
+    whose two estimates differ by more than the tolerance are split and
+    integrated again, all segments at once per level.
+
+    Args:
+        start: Segment start points, shape (N, 2)
+        c1: First control points, shape (N, 2)
+        c2: Second control points, shape (N, 2)
+        end: Segment end points, shape (N, 2)
+        tolerance: Absolute error allowed per segment
+
+    Returns:
+        Array of N lengths
+    """
+    start, c1, c2, end = (np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in (start, c1, c2, end))
+    d0, d1, d2 = c1 - start, c2 - c1, end - c2
+    lengths = np.zeros(len(start))
+
+    # Work list of (segment, t0, t1, whole-interval estimate)
+    segment = np.arange(len(start))
+    t0 = np.zeros(len(start))
+    t1 = np.ones(len(start))
+    whole = _speed_integral(d0, d1, d2, t0, t1)
+
+    for depth in range(MAX_DEPTH):
+        if not len(segment):
+            break
+
+        middle = (t0 + t1) / 2
+        left = _speed_integral(d0[segment], d1[segment], d2[segment], t0, middle)
+        right = _speed_integral(d0[segment], d1[segment], d2[segment], middle, t1)
+        halves = left + right
+
+        # Accept intervals whose estimates agree; the allowed error halves with each split
+        done = np.abs(halves - whole) <= tolerance / 2 ** depth
+        if depth == MAX_DEPTH - 1:
+            done[:] = True
+        np.add.at(lengths, segment[done], halves[done])
+
+        split = ~done
+        segment = np.concatenate((segment[split], segment[split]))
+        t0, t1 = np.concatenate((t0[split], middle[split])), np.concatenate((middle[split], t1[split]))
+        whole = np.concatenate((left[split], right[split]))
+
+    return lengths
+
+class PathMeasure:
+    """
+    Stateful measurer, so a path can be fed in chunks like PathEncoder.
+
+    Accepts absolute and relative M, L, C, S and Z commands, the forms the
+    converters and PathEncoder write.
+
+    Attributes:
+        length: Total length of the path data measured so far
+        subpaths: Length of every subpath, in order
+    """
+
+    def __init__(self):
+        self.length = 0.0
+        self.subpaths = []
+
+        # Current point, start of the current subpath and the last second control point
+        self._point = (0.0, 0.0)
+        self._subpath_start = (0.0, 0.0)
+        self._control = None
+
+    def add(self, path_data):
+        """
+        Measure a chunk of path data.
+
+        Args:
+            path_data: SVG path data string, continuing from any earlier chunks
+
+        Returns:
+            Length of the chunk
+        """
+        lines = []
+        cubics = []
+        # Index into self.subpaths of every segment
+        line_subpaths = []
+        cubic_subpaths = []
+
+        tokens = _TOKEN.findall(path_data)
+        i = 0
+        command = None
+        while i < len(tokens):
+            if tokens[i].isalpha():
+                command = tokens[i]
+                if command.upper() not in _PAIRS:
+                    raise ValueError(f"Unsupported path command '{command}'")
+                i += 1
+            elif command is None:
+                raise ValueError(f"Path data must start with a command: {path_data[:20]!r}")
+
+            upper = command.upper()
+            x0, y0 = self._point
+            if upper == 'Z':
+                lines.append((self._point, self._subpath_start))
+                line_subpaths.append(len(self.subpaths) - 1)
+                self._point = self._subpath_start
+                self._control = None
+                continue
+
+            # Read the coordinate pairs of one segment and make them absolute
+            count = 2 * _PAIRS[upper]
+            values = [float(v) for v in tokens[i:i + count]]
+            if len(values) != count:
+                raise ValueError(f"Incomplete '{command}' segment in path data")
+            i += count
+            points = list(zip(values[::2], values[1::2]))
+            if command.islower():
+                points = [(x + x0, y + y0) for x, y in points]
+
+            if upper == 'M':
+                self.subpaths.append(0.0)
+                self._subpath_start = points[0]
+                self._control = None
+                # Extra pairs after a moveto are linetos
+                command = 'l' if command.islower() else 'L'
+            elif upper == 'L':
+                lines.append((self._point, points[0]))
+                line_subpaths.append(len(self.subpaths) - 1)
+                self._control = None
+            else:
+                if upper == 'S':
+                    # The first control point reflects the previous segment's second one
+                    cx, cy = self._control or self._point
+                    points.insert(0, (2 * x0 - cx, 2 * y0 - cy))
+                cubics.append((self._point, *points))
+                cubic_subpaths.append(len(self.subpaths) - 1)
+                self._control = points[1]
+            self._point = points[-1]
+
+        if (lines or cubics) and not self.subpaths:
+            raise ValueError("Path data must start with a moveto")
+
+        length = 0.0
+        if lines:
+            segments = np.array(lines)
+            measured = line_lengths(segments[:, 0], segments[:, 1])
+            length += self._accumulate(measured, line_subpaths)
+        if cubics:
+            segments = np.array(cubics)
+            measured = cubic_lengths(segments[:, 0], segments[:, 1], segments[:, 2], segments[:, 3])
+            length += self._accumulate(measured, cubic_subpaths)
+
+        self.length += length
+        return length
+
+    def _accumulate(self, measured, subpath_indices):
+        """
+        Add segment lengths to their subpaths and return their sum.
+        """
+        indices = np.asarray(subpath_indices)
+        first = indices.min()
+        sums = np.bincount(indices - first, weights=measured)
+        for k, value in enumerate(sums.tolist(), start=first):
+            self.subpaths[k] += value
+        return float(sums.sum())
+
+    def iter_measure(self, path_chunks):
+        """
+        Measure an iterable of path data chunks lazily, passing them through.
+        """
+        for chunk in path_chunks:
+            self.add(chunk)
+            yield chunk
+
+def path_length(path_data):
+    """
+    Total length of a complete path data string.
+    """
+    measure = PathMeasure()
+    return measure.add(path_data)
+
+def subpath_lengths(path_data):
+    """
+    Length of every subpath of a complete path data string.
+    """
+    measure = PathMeasure()
+    measure.add(path_data)
+    return measure.subpaths
+
+def iter_subpaths(path_chunks):
+    """
+    Regroup absolute path data chunks into one string per subpath.
+
+    Chunks may split the data anywhere; every yielded string starts with
+    an 'M' command and can be written as a <path> element of its own.
+
+    Args:
+        path_chunks: Iterable of absolute path data strings
+
+    Yields:
+        Path data string per subpath
+    """
+    pending = ""
+    for chunk in path_chunks:
+        parts = re.split(r'(?=M)', pending + chunk)
+        pending = parts.pop()
+        for part in parts:
+            if part.strip():
+                yield part
+    if pending.strip():
+        yield pending
+
+def format_length(length):
+    """
+    Format a length for the pathLength and data-length attributes.
+    """
+    return f"{length:.2f}".rstrip('0').rstrip('.')
+
+def length_attributes(length, offset=None):
+    """
+    Attribute text with a path's length, and its offset along the drawing when split.
+    """
+    text = f' pathLength="{format_length(length)}" data-length="{format_length(length)}"'
+    if offset is not None:
+        text += f' data-offset="{format_length(offset)}"'
+    return text
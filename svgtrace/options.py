@@ -0,0 +1,80 @@
+"""
+Options that can't be used together.
+
+The converters accept every option on every run; where two of them don't
+combine, the lesser one is turned off with a notice. Notices go to standard
+error, so an SVG written to standard output (`--output -`) stays intact.
+"""
+import sys
+
+# The value of each option when it is not used
+OPTION_DEFAULTS = {
+    'tile_height': None,
+    'centerline': False,
+    'estimate_width': False,
+    'min_area': 0,
+    'min_extent': 0,
+    'pyramid_levels': None,
+    'edge_detection': False,
+    'fit_viewbox': False,
+}
+
+def notice(message):
+    """
+    Tell the user about an option that was adjusted or ignored, on standard error.
+    """
+    print(message, file=sys.stderr)
+
+def reconcile_options(**options):
+    """
+    Turn off the options that can't be used with the others, with a notice for each.
+
+    Options that aren't passed count as not used.
+
+    Args:
+        options: Option values by name, among those in OPTION_DEFAULTS
+
+    Returns:
+        Tuple of the passed options' values as they can be used, in the order they were passed
+    """
+    unknown = options.keys() - OPTION_DEFAULTS.keys()
+    if unknown:
+        raise TypeError(f"Unknown options: {', '.join(sorted(unknown))}")
+    o = {**OPTION_DEFAULTS, **options}
+
+    # Thinning needs the whole mask at full resolution
+    if o['centerline'] and o['tile_height']:
+        notice("Centerline tracing is not used in tiled mode")
+        o['centerline'] = False
+    if o['centerline'] and o['pyramid_levels']:
+        notice("The pyramid mode is not used with centerline tracing")
+        o['pyramid_levels'] = None
+    if o['centerline'] and (o['min_area'] or o['min_extent']):
+        notice("The component prefilter is not used with centerline tracing")
+        o['min_area'] = o['min_extent'] = 0
+    if o['estimate_width'] and not o['centerline']:
+        notice("Stroke widths are only estimated with centerline tracing")
+        o['estimate_width'] = False
+
+    # Components cut by strip seams can't be measured in tiled mode
+    if o['tile_height'] and (o['min_area'] or o['min_extent']):
+        notice("The component prefilter is not used in tiled mode")
+        o['min_area'] = o['min_extent'] = 0
+
+    # The coarse pass thresholds the whole image itself
+    if o['pyramid_levels'] and o['tile_height']:
+        notice("The pyramid mode is not used in tiled mode")
+        o['pyramid_levels'] = None
+    if o['pyramid_levels'] and o['edge_detection']:
+        notice("The pyramid mode is not used with edge detection")
+        o['pyramid_levels'] = None
+    if o['pyramid_levels'] and (o['min_area'] or o['min_extent']):
+        notice("The component prefilter is not used in pyramid mode")
+        o['min_area'] = o['min_extent'] = 0
+
+    # Resizing needs the whole image
+    if o['fit_viewbox'] and o['tile_height']:
+        notice("The image is not fitted to the viewBox in tiled mode")
+        o['fit_viewbox'] = False
+
+    return tuple(o[name] for name in options)
@@ -0,0 +1,288 @@
+"""
+Ordering subpaths by pen travel and joining the ones that meet.
+
+Contours leave tracing sorted by area, and each one is written as a
+subpath of its own, starting with an M command. On scans, broken
+strokes turn into hundreds of small fragments scattered over the page:
+the pen jumps back and forth between them, every fragment adds a move
+to the d attribute, and a page that draws the path along its length
+(the scroll animation) jumps around the canvas.
+
+PathPlanner orders the contours greedily instead. After each contour it
+goes on with the contour whose start or end is nearest to where the pen
+stopped, reversing it when its end is nearer. The endpoints of the
+contours not yet drawn are kept in a uniform grid, so each lookup only
+visits the cells around the pen, and the grid is rebuilt with coarser
+cells as it empties; ordering takes close to linear time even with tens
+of thousands of contours. While the path data is written, a subpath that
+starts within the join tolerance of where the previous one ended
+continues it with a line instead of a move.
+"""
+import math
+import re
+import time
+
+from svgtrace.instrument import stage
+from svgtrace.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Join tolerance in pixels used when --join-paths is given without one
+DEFAULT_TOLERANCE = 3.0
+
+# The grid is rebuilt once fewer than this share of the endpoints it was built with are left
+REBUILD_SHARE = 0.25
+
+_NUMBER = r'-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+_START = re.compile(rf'\s*M\s*({_NUMBER})[\s,]*({_NUMBER})')
+_NUMBERS = re.compile(_NUMBER)
+
+# Characters at the end of a subpath that always hold its last coordinate pair
+END_CHARACTERS = 64
+
+class EndpointGrid:
+    """
+    Uniform grid over the endpoints of the contours not drawn yet.
+
+    Endpoint `2k` is the start of contour `k` and endpoint `2k + 1` its
+    end. Cells hold about two endpoints each when the grid is built, and
+    the endpoints of a contour are removed once it is drawn.
+    """
+
+    def __init__(self, xs, ys, endpoints):
+        self.xs = xs
+        self.ys = ys
+        self.count = len(endpoints)
+
+        points = np.array([(xs[e], ys[e]) for e in endpoints], dtype=np.float64).reshape(-1, 2)
+        self.x0, self.y0 = points.min(axis=0) if len(points) else (0.0, 0.0)
+        extent_x, extent_y = points.max(axis=0) - (self.x0, self.y0) if len(points) else (0.0, 0.0)
+
+        # Square cells holding two endpoints each on average, or fewer if the endpoints lie on a line
+        cells = max(self.count / 2, 1)
+        self.cell = max(math.sqrt(extent_x * extent_y / cells), max(extent_x, extent_y) / cells, 1.0)
+        self.nx = int(extent_x // self.cell) + 1
+        self.ny = int(extent_y // self.cell) + 1
+
+        self.buckets = [[] for _ in range(self.nx * self.ny)]
+        self.keys = {}
+        if len(points):
+            cx = ((points[:, 0] - self.x0) // self.cell).astype(np.intp)
+            cy = ((points[:, 1] - self.y0) // self.cell).astype(np.intp)
+            for endpoint, key in zip(endpoints, (cy * self.nx + cx).tolist()):
+                self.buckets[key].append(endpoint)
+                self.keys[endpoint] = key
+
+    def remove(self, endpoint):
+        """
+        Take an endpoint out of its cell.
+        """
+        self.buckets[self.keys.pop(endpoint)].remove(endpoint)
+
+    def nearest(self, x, y):
+        """
+        Nearest endpoint left in the grid.
+
+        Rings of cells around the one holding (x, y) are searched outwards
+        until no cell beyond them can hold anything nearer.
+
+        Args:
+            x: Pen position
+            y: Pen position
+
+        Returns:
+            Endpoint index, or None if the grid is empty
+        """
+        xs, ys, buckets, nx, ny, cell = self.xs, self.ys, self.buckets, self.nx, self.ny, self.cell
+        cx = min(max(int((x - self.x0) // cell), 0), nx - 1)
+        cy = min(max(int((y - self.y0) // cell), 0), ny - 1)
+
+        best, best_d2 = None, math.inf
+        r = 0
+        while True:
+            y_low, y_high = max(cy - r, 0), min(cy + r, ny - 1)
+            x_low, x_high = max(cx - r, 0), min(cx + r, nx - 1)
+            for row in range(y_low, y_high + 1):
+                # Whole rows on the top and bottom of the ring, its two ends elsewhere
+                if r == 0 or row == cy - r or row == cy + r:
+                    columns = range(x_low, x_high + 1)
+                else:
+                    columns = [c for c in (cx - r, cx + r) if 0 <= c < nx]
+                base = row * nx
+                for column in columns:
+                    for endpoint in buckets[base + column]:
+                        dx = xs[endpoint] - x
+                        dy = ys[endpoint] - y
+                        d2 = dx * dx + dy * dy
+                        if d2 < best_d2:
+                            best, best_d2 = endpoint, d2
+
+            # Distance from the pen to the nearest side of the searched square with cells beyond it
+            bound = math.inf
+            if cx - r > 0:
+                bound = min(bound, x - (self.x0 + (cx - r) * cell))
+            if cx + r < nx - 1:
+                bound = min(bound, self.x0 + (cx + r + 1) * cell - x)
+            if cy - r > 0:
+                bound = min(bound, y - (self.y0 + (cy - r) * cell))
+            if cy + r < ny - 1:
+                bound = min(bound, self.y0 + (cy + r + 1) * cell - y)
+            if bound == math.inf or best_d2 <= bound * bound:
+                return best
+            r += 1
+
+def plan_order(starts, ends, first=0):
+    """
+    Greedy drawing order of contours by pen travel.
+
+    Args:
+        starts: First point of every contour, shape (K, 2)
+        ends: Last point of every contour, shape (K, 2)
+        first: Contour drawn first, in its own direction
+
+    Returns:
+        Tuple of (contour indices in drawing order, boolean per drawn contour,
+        True where it is drawn from its end to its start)
+    """
+    count = len(starts)
+    if count == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=bool)
+
+    # Endpoint 2k is the start of contour k and 2k + 1 its end
+    endpoints = np.empty((2 * count, 2), dtype=np.float64)
+    endpoints[0::2] = starts
+    endpoints[1::2] = ends
+    xs, ys = endpoints[:, 0].tolist(), endpoints[:, 1].tolist()
+
+    order, reverse = [first], [False]
+    x, y = xs[2 * first + 1], ys[2 * first + 1]
+
+    grid = EndpointGrid(xs, ys, [e for e in range(2 * count) if e >> 1 != first])
+    left = count - 1
+    while left:
+        if 2 * left < grid.count * REBUILD_SHARE:
+            grid = EndpointGrid(xs, ys, list(grid.keys))
+        endpoint = grid.nearest(x, y)
+
+        # Entering a contour at its end draws it backwards and leaves the pen at its start
+        k = endpoint >> 1
+        grid.remove(2 * k)
+        grid.remove(2 * k + 1)
+        order.append(k)
+        reverse.append(bool(endpoint & 1))
+        x, y = xs[endpoint ^ 1], ys[endpoint ^ 1]
+        left -= 1
+
+    return np.array(order, dtype=np.intp), np.array(reverse, dtype=bool)
+
+def pen_travel(starts, ends):
+    """
+    Total distance the pen moves between consecutive contours drawn in the given order.
+    """
+    if len(starts) < 2:
+        return 0.0
+    gaps = np.asarray(starts[1:], dtype=np.float64) - np.asarray(ends[:-1], dtype=np.float64)
+    return float(np.sqrt((gaps * gaps).sum(axis=1)).sum())
+
+def path_start(path_data):
+    """
+    Point an absolute subpath moves to first, or None if it doesn't start with M.
+    """
+    match = _START.match(path_data)
+    return (float(match.group(1)), float(match.group(2))) if match else None
+
+def path_end(path_data):
+    """
+    Point an absolute subpath made of M, L, C and S commands ends at, or None.
+    """
+    tail = path_data[-END_CHARACTERS:].rstrip()
+    if not tail or tail[-1].isalpha():
+        return None
+    numbers = _NUMBERS.findall(tail)
+    return (float(numbers[-2]), float(numbers[-1])) if len(numbers) >= 2 else None
+
+class PathPlanner:
+    """
+    Orders contours by pen travel and joins subpaths whose ends meet.
+
+    Attributes:
+        tolerance: Subpaths starting at most this far from the end of the previous one are joined to it
+        subpaths: Number of contours ordered
+        reversed: Number of contours drawn backwards
+        travel_before: Pen travel between contours in their traced order
+        travel_after: Pen travel between contours in the planned order
+        joined: Number of subpaths joined to the one before
+        seconds: Time spent ordering
+    """
+
+    def __init__(self, tolerance=DEFAULT_TOLERANCE):
+        self.tolerance = tolerance
+        self.subpaths = 0
+        self.reversed = 0
+        self.travel_before = 0.0
+        self.travel_after = 0.0
+        self.joined = 0
+        self.seconds = 0.0
+
+    def plan(self, contours):
+        """
+        Reorder contours, and reverse some, to shorten the pen's travel between them.
+
+        The first (largest) contour stays first.
+
+        Args:
+            contours: ContourSet
+
+        Returns:
+            ContourSet in drawing order
+        """
+        if len(contours) < 2:
+            return contours
+
+        with stage('order', subpaths=len(contours)) as s:
+            start_time = time.perf_counter()
+            points = contours.points[:, 0]
+            starts = points[contours.offsets[:-1]]
+            ends = points[contours.offsets[1:] - 1]
+            order, reverse = plan_order(starts, ends)
+
+            self.subpaths += len(contours)
+            self.reversed += int(reverse.sum())
+            self.travel_before += pen_travel(starts, ends)
+            self.travel_after += pen_travel(np.where(reverse[:, None], ends[order], starts[order]),
+                                            np.where(reverse[:, None], starts[order], ends[order]))
+            planned = contours.select(order, reverse)
+            self.seconds += time.perf_counter() - start_time
+            s.set(reversed=int(reverse.sum()))
+            return planned
+
+    def iter_join(self, path_chunks):
+        """
+        Join subpaths that start within the tolerance of where the previous one ended.
+
+        A joined subpath's M command becomes an L command, so the pen draws
+        the short gap instead of lifting.
+
+        Args:
+            path_chunks: Iterable of absolute path data strings, one subpath each
+
+        Yields:
+            Path data string per subpath, joined ones starting with L
+        """
+        end = None
+        for path_data in path_chunks:
+            start = path_start(path_data)
+            if end is not None and start is not None and math.dist(start, end) <= self.tolerance:
+                path_data = path_data.replace('M', 'L', 1)
+                self.joined += 1
+            end = path_end(path_data) if start is not None else None
+            yield path_data
+
+    def summary(self):
+        """
+        Describe the reordering and joining.
+        """
+        moves = self.subpaths - self.joined
+        return (f"Path order: {self.subpaths} subpaths -> {moves} moves ({self.joined} joined within "
+                f"{self.tolerance:g}px, {self.reversed} reversed), pen travel {self.travel_before:.0f}px -> "
+                f"{self.travel_after:.0f}px in {self.seconds * 1000:.1f}ms")
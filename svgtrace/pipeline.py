@@ -0,0 +1,282 @@
+"""
+In-memory pipeline stages shared by the converters.
+
+Each stage takes and returns NumPy arrays, so a conversion decodes the
+image once and never round-trips intermediate results through disk.
+"""
+import contextlib
+import threading
+
+from svgtrace.bezier import bezier_path
+from svgtrace.contours import ContourSet
+from svgtrace.decode import decode, decode_flags, decode_mode
+from svgtrace.instrument import stage
+from svgtrace.lazy import lazy_import
+from svgtrace.serialize import polyline_to_path
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Images decoded ahead of time for the current thread, by path (see preloaded())
+_preloaded = threading.local()
+
+# Smallest epsilon open polylines are simplified with: they step from pixel
+# to pixel, and a staircase less than a pixel high is the grid, not the drawing
+OPEN_MIN_EPSILON = 1.0
+
+@contextlib.contextmanager
+def preloaded(image_path, img, mode='color'):
+    """
+    Make read_image return an already decoded image for image_path on this thread.
+
+    Lets a decode stage on another thread hand its result to converters
+    that take image paths. The path still identifies the image for the
+    result cache.
+
+    Args:
+        image_path: Path the image was decoded from
+        img: Image array (None to decode as usual)
+        mode: Decode mode img was decoded with; other modes decode the file again
+    """
+    images = _preloaded.__dict__.setdefault('images', {})
+    if img is not None:
+        images[str(image_path)] = (img, mode)
+    try:
+        yield
+    finally:
+        images.pop(str(image_path), None)
+
+def read_image(image_path, mode='color'):
+    """
+    Decode an image file.
+
+    Args:
+        image_path: Path to the image file, or '-' for standard input
+        mode: Decode mode from svgtrace.decode.DECODE_FLAGS, e.g. 'gray' or 'gray/4'
+
+    Returns:
+        Image array
+    """
+    img, preloaded_mode = _preloaded.__dict__.get('images', {}).get(str(image_path), (None, None))
+    if img is not None and preloaded_mode == mode:
+        return img
+
+    # Looking up the flags imports OpenCV, which shouldn't count as decoding
+    flags = decode_flags(mode)
+    with stage('decode', decode_mode=mode) as s:
+        img = decode(image_path, flags)
+        if img is None:
+            raise ValueError(f"Could not read image at {image_path}")
+        s.set(width=img.shape[1], height=img.shape[0], decoded_bytes=img.nbytes)
+    return img
+
+def decode_image(image_path, fast=False, gray=True, fit_size=None):
+    """
+    Decode an image the cheapest way a pipeline allows.
+
+    Args:
+        image_path: Path to the image file, or '-' for standard input
+        fast: Decode JPEGs straight to grayscale, and shrunk while decoding when fitting
+            a much smaller viewBox (gray levels differ slightly from cvtColor's)
+        gray: Whether the pipeline only needs the grayscale image
+        fit_size: (width, height) of a viewBox the image is resized to fit (None to keep its size)
+
+    Returns:
+        Image array
+    """
+    return read_image(image_path, decode_mode(image_path, gray, fit_size) if fast else 'color')
+
+def to_gray(img):
+    """
+    Convert a BGR image to grayscale, passing grayscale images through unchanged.
+    """
+    if img.ndim == 2:
+        return img
+    with stage('gray'):
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+def fit_to_viewbox(img, width=600, height=420):
+    """
+    Resize an image to fit a viewBox, keeping its aspect ratio.
+
+    Tracing the resized image gives path coordinates in viewBox units,
+    with the drawing in the top left corner of the viewBox.
+
+    Args:
+        img: Image array
+        width: Width of the SVG viewBox
+        height: Height of the SVG viewBox
+
+    Returns:
+        Resized image array
+    """
+    scale = min(width / img.shape[1], height / img.shape[0])
+    size = (max(round(img.shape[1] * scale), 1), max(round(img.shape[0] * scale), 1))
+    if size == (img.shape[1], img.shape[0]):
+        return img
+    with stage('resize', scale=round(scale, 4)):
+        # Area averaging keeps thin strokes when shrinking
+        return cv2.resize(img, size, interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+
+def threshold_image(gray, threshold_value=127, smoothing=True):
+    """
+    Blur and threshold a grayscale image so dark strokes become foreground.
+
+    Args:
+        gray: Grayscale image array
+        threshold_value: Value for binary thresholding (0-255)
+        smoothing: Whether to apply a Gaussian blur first
+
+    Returns:
+        Binary image array
+    """
+    # Apply Gaussian blur to reduce noise
+    if smoothing:
+        with stage('blur'):
+            gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+    # Apply binary threshold
+    with stage('threshold'):
+        _, binary = cv2.threshold(gray, threshold_value, 255, cv2.THRESH_BINARY_INV)
+    return binary
+
+def enhance(img, edge_detection=True, blur_amount=5):
+    """
+    Enhance an image array to better detect lines and edges.
+
+    Args:
+        img: BGR or grayscale image array
+        edge_detection: Whether to use edge detection
+        blur_amount: Amount of blur to apply (odd number)
+
+    Returns:
+        Binary edge mask when edge_detection is set, otherwise the blurred grayscale image
+    """
+    # Make blur amount odd if it's even
+    if blur_amount % 2 == 0:
+        blur_amount += 1
+
+    # Apply Gaussian blur
+    gray = to_gray(img)
+    with stage('blur'):
+        blurred = cv2.GaussianBlur(gray, (blur_amount, blur_amount), 0)
+
+    if not edge_detection:
+        return blurred
+
+    # Apply Canny edge detection
+    with stage('canny'):
+        edges = cv2.Canny(blurred, 50, 150)
+
+    # Dilate to connect edges
+    with stage('dilate'):
+        kernel = np.ones((3, 3), np.uint8)
+        return cv2.dilate(edges, kernel, iterations=1)
+
+def find_contours(binary, min_contour_length=50, prefilter=None):
+    """
+    Find external contours, drop short ones and sort the rest by area.
+
+    Args:
+        binary: Binary image array
+        min_contour_length: Minimum length of contours to include
+        prefilter: ComponentFilter that drops small connected components before
+            tracing (None to trace the whole mask)
+
+    Returns:
+        ContourSet of the contours, largest area first
+    """
+    if prefilter:
+        contours = prefilter.trace(binary)
+    else:
+        with stage('find_contours') as s:
+            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            s.set(contours=len(contours))
+
+    with stage('filter_sort') as s:
+        # Measure all contours at once, drop small ones and sort by area (largest first)
+        contours = ContourSet.from_contours(contours).filter_sort(min_contour_length)
+        s.set(kept=len(contours))
+        return contours
+
+def simplify_contour(contour, epsilon_factor=0.0025, perimeter=None, closed=True):
+    """
+    Simplify a contour using the Douglas-Peucker algorithm.
+
+    Args:
+        contour: The contour to simplify
+        epsilon_factor: Factor to determine epsilon based on contour length
+        perimeter: Precomputed length of the contour, closed or open like it (None to measure it)
+        closed: Whether the contour is a closed outline (False for an open polyline, whose ends
+            are kept and which is simplified with an epsilon of at least OPEN_MIN_EPSILON)
+
+    Returns:
+        Simplified contour
+    """
+    if perimeter is None:
+        perimeter = cv2.arcLength(contour, closed)
+    epsilon = epsilon_factor * perimeter
+    if not closed:
+        epsilon = max(epsilon, OPEN_MIN_EPSILON)
+    return cv2.approxPolyDP(contour, epsilon, closed)
+
+def iter_path_data(contours, simplify=True, use_bezier=True, bezier_smoothing=0.25, fitter=None, closed=True):
+    """
+    Yield SVG path data one contour at a time.
+
+    Args:
+        contours: ContourSet or iterable of contours
+        simplify: Whether to simplify contours
+        use_bezier: Whether to use bezier curves for smoother paths
+        bezier_smoothing: Smoothing factor for bezier curves (0-1)
+        fitter: CurveFitter that fits the raw contours with as few cubic segments as
+            its error allows (None for one curve per simplified vertex)
+        closed: Whether the contours are closed outlines (False for open polylines such as centerlines)
+
+    Yields:
+        SVG subpath string per contour
+    """
+    # A ContourSet already knows every contour's perimeter
+    perimeters = getattr(contours, 'perimeters' if closed else 'lengths', None)
+
+    for k, contour in enumerate(contours):
+        # Fit curves to the raw contour points
+        if fitter:
+            with stage('fit', points=len(contour)) as s:
+                segments = fitter.segments
+                path_data = fitter.path(contour, closed)
+                s.set(segments=fitter.segments - segments)
+            yield path_data
+            continue
+
+        # Simplify contour if requested
+        if simplify:
+            with stage('simplify', vertices_in=len(contour)) as s:
+                contour = simplify_contour(contour, perimeter=None if perimeters is None else perimeters[k], closed=closed)
+                s.set(vertices_out=len(contour))
+
+        # Convert to path data
+        if use_bezier and len(contour) > 2:
+            with stage('bezier'):
+                path_data = bezier_path(contour, bezier_smoothing)
+        else:
+            with stage('serialize'):
+                path_data = polyline_to_path(contour)
+        yield path_data
+
+def contours_to_path_data(contours, simplify=True, use_bezier=True, bezier_smoothing=0.25, fitter=None, closed=True):
+    """
+    Convert contours to SVG path data.
+
+    Args:
+        contours: List of contours
+        simplify: Whether to simplify contours
+        use_bezier: Whether to use bezier curves for smoother paths
+        bezier_smoothing: Smoothing factor for bezier curves (0-1)
+        fitter: CurveFitter to fit the raw contours with (None for one curve per simplified vertex)
+        closed: Whether the contours are closed outlines (False for open polylines)
+
+    Returns:
+        SVG path data string
+    """
+    return "".join(iter_path_data(contours, simplify, use_bezier, bezier_smoothing, fitter, closed))
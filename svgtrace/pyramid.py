@@ -0,0 +1,109 @@
+"""
+Coarse-to-fine contour tracing of thresholded images.
+
+On large photos and scans, blurring, thresholding and tracing at full
+resolution spend most of their time on pixels that end up in no kept
+contour: empty background, and specks the minimum length filter drops.
+find_contours_pyramid first finds where the contours can be on a copy
+of the grayscale image shrunk by a power of two, where a coarse pixel
+takes the darkest value within reach of the blur. Any pixel that is
+foreground at full resolution is then foreground at the coarse scale,
+so every full resolution component lies within the filled outline of
+one coarse contour. Only the coarse contours that are long enough are
+refined: the image is blurred, thresholded and traced at full
+resolution in the rows around them, within their filled outlines.
+
+The contours that come out are exactly those of the full resolution
+mask, except that components whose coarse contour falls below the
+length filter are never traced, which can drop contours close to the
+minimum length.
+"""
+from svgtrace.components import component_bands
+from svgtrace.contours import ContourSet
+from svgtrace.instrument import stage
+from svgtrace.lazy import lazy_import
+from svgtrace.pipeline import threshold_image
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Coarse contours are kept down to this fraction of the scaled minimum
+# length, since shrinking a staircase outline shortens it by more than the scale
+LENGTH_SLACK = 0.5
+
+# Pixels of context the 5x5 blur of threshold_image reads around each pixel
+BLUR_CONTEXT = 2
+
+def shrink_dark(gray, levels=2, reach=BLUR_CONTEXT):
+    """
+    Shrink a grayscale image by 2 ** levels on both sides, each coarse pixel
+    taking the darkest value within `reach` pixels of the pixels it covers.
+    """
+    scale = 2 ** levels
+    height, width = gray.shape
+    with stage('shrink', levels=levels):
+        # Blocks at the right and bottom edges may be partial; padding with white keeps them exact
+        padded = cv2.copyMakeBorder(gray, 0, -height % scale, 0, -width % scale, cv2.BORDER_CONSTANT, value=255)
+        kernel = np.ones((scale + 2 * reach, scale + 2 * reach), dtype=np.uint8)
+        darkest = cv2.erode(padded, kernel, anchor=(reach, reach), borderType=cv2.BORDER_CONSTANT, borderValue=255)
+        return np.ascontiguousarray(darkest[::scale, ::scale])
+
+def find_contours_pyramid(gray, threshold_value=127, smoothing=True, min_contour_length=50, levels=2):
+    """
+    Blur, threshold and trace a grayscale image coarse to fine, drop short
+    contours and sort the rest by area.
+
+    Args:
+        gray: Grayscale image array
+        threshold_value: Value for binary thresholding (0-255)
+        smoothing: Whether to apply a Gaussian blur before thresholding
+        min_contour_length: Minimum length of contours to include
+        levels: Number of times the image is halved for the coarse pass (1-5)
+
+    Returns:
+        ContourSet of the contours, largest area first
+    """
+    if not 1 <= levels <= 5:
+        raise ValueError("levels must be between 1 and 5")
+    height, width = gray.shape
+    scale = 2 ** levels
+    context = BLUR_CONTEXT if smoothing else 0
+
+    # Trace where the image could be foreground and keep the contours that may be long enough
+    coarse_mask = threshold_image(shrink_dark(gray, levels, context), threshold_value, smoothing=False)
+    with stage('find_contours', level=levels) as s:
+        coarse, _ = cv2.findContours(coarse_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        coarse = ContourSet.from_contours(coarse)
+        coarse = coarse.select(coarse.lengths > LENGTH_SLACK * min_contour_length / scale)
+        s.set(contours=len(coarse))
+
+    # The filled outlines of the kept contours, and the full resolution rows they span
+    region = np.zeros(coarse_mask.shape, dtype=np.uint8)
+    cv2.drawContours(region, list(coarse), -1, 255, cv2.FILLED)
+    bands = component_bands(coarse.boxes.astype(np.intp) * scale, width, height)
+
+    with stage('refine', bands=len(bands)) as s:
+        # findContours lists contours bottom to top, so the bands go in that order
+        contours = []
+        pixels = 0
+        for x0, y0, x1, y1 in reversed(bands):
+            # Full resolution mask of the band, with context for the blur
+            cx0, cy0 = max(x0 - context, 0), max(y0 - context, 0)
+            cx1, cy1 = min(x1 + context, width), min(y1 + context, height)
+            mask = threshold_image(gray[cy0:cy1, cx0:cx1], threshold_value, smoothing)[y0 - cy0:y1 - cy0, x0 - cx0:x1 - cx0]
+
+            # Keep only the components inside the kept outlines
+            bx0, by0 = x0 // scale, y0 // scale
+            outline = cv2.resize(region[by0:(y1 - 1) // scale + 1, bx0:(x1 - 1) // scale + 1], None,
+                                 fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+            mask = cv2.bitwise_and(mask, outline[y0 - by0 * scale:y1 - by0 * scale, x0 - bx0 * scale:x1 - bx0 * scale])
+
+            traced, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(x0, y0))
+            contours.extend(traced)
+            pixels += mask.size
+        s.set(traced=round(pixels / gray.size, 3), contours=len(contours))
+
+    with stage('filter_sort') as s:
+        contours = ContourSet.from_contours(contours).filter_sort(min_contour_length)
+        s.set(kept=len(contours))
+        return contours
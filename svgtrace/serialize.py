@@ -0,0 +1,45 @@
+from svgtrace.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+def _as_points(points):
+    """
+    Normalize contour points to an (N, 2) array.
+
+    Accepts OpenCV contours of shape (N, 1, 2), (N, 2) arrays and lists
+    of (x, y) pairs.
+    """
+    return np.asarray(points).reshape(-1, 2)
+
+def polyline_to_path(points):
+    """
+    Convert a series of points to an SVG subpath of straight line segments.
+
+    The whole subpath is formatted with a single `%` operation instead of
+    appending one f-string per point, which keeps serialization linear in
+    the number of points.
+
+    Args:
+        points: Contour points, (N, 1, 2) or (N, 2)
+
+    Returns:
+        SVG path string of the form "Mx,y Lx,y Lx,y ..."
+    """
+    points = _as_points(points)
+    if len(points) == 0:
+        return ""
+
+    template = "M%s,%s" + " L%s,%s" * (len(points) - 1)
+    return template % tuple(points.ravel().tolist())
+
+def polylines_to_path(contours):
+    """
+    Convert several contours to one SVG path string of line segments.
+
+    Args:
+        contours: Iterable of contours, each (N, 1, 2) or (N, 2)
+
+    Returns:
+        SVG path data string with one subpath per contour
+    """
+    return "".join(polyline_to_path(contour) for contour in contours)
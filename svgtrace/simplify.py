@@ -0,0 +1,195 @@
+"""
+Douglas-Peucker simplification precomputed for every tolerance at once.
+
+approxPolyDP starts from scratch for every epsilon, although the points
+Douglas-Peucker splits at do not depend on it: each segment is split at
+its farthest point, and epsilon only decides how deep the recursion
+goes. SimplificationIndex runs the recursion once over the traced
+points, for all contours together, and records for every point the
+largest epsilon that still keeps it: its distance from the segment it
+split, capped by the tolerance of the split above it. Segments whose
+farthest point is within the finest epsilon wanted are not split
+further, since nothing below them is ever kept. Any level is then a
+single comparison, so several levels of detail cost little more than
+one.
+
+Every level is the Douglas-Peucker simplification of the traced
+contour at its own epsilon, so no traced point is farther than epsilon
+from the line of its segment, and every level keeps a subset of the
+vertices of the finer ones. approxPolyDP starts closed contours from
+other anchors and drops some nearly collinear vertices afterwards, so a
+level's vertices are not always those of a separate conversion, and
+there are 1-2% more of them.
+"""
+from pathlib import Path
+
+from svgtrace.contours import ContourSet
+from svgtrace.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Detail levels written by --lod, coarsest first: name and simplification factor
+DEFAULT_LEVELS = {'small': 0.01, 'medium': 0.005, 'large': 0.0025}
+
+def parse_levels(text):
+    """
+    Parse detail levels given as "name=factor,name=factor".
+
+    Args:
+        text: Comma separated levels, e.g. "small=0.01,large=0.0025"
+
+    Returns:
+        Dict of level name to simplification factor, in the given order
+    """
+    levels = {}
+    for item in text.split(','):
+        name, _, factor = item.partition('=')
+        if not name.strip() or not factor.strip():
+            raise ValueError(f"Invalid detail level {item!r}, expected name=factor")
+        levels[name.strip()] = float(factor)
+    return levels
+
+def level_path(output_path, name):
+    """
+    Path of one level's SVG: drawing.svg becomes drawing.<name>.svg.
+    """
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.{name}{output_path.suffix or '.svg'}")
+
+def _farthest(x, y, starts, counts, origins):
+    """
+    Offset (1 to count - 1) of the point farthest from each contour's origin,
+    the first one when scanning every contour cyclically from the point after it.
+    """
+    dx = x - np.repeat(x[starts + origins], counts)
+    dy = y - np.repeat(y[starts + origins], counts)
+    distance = dx * dx + dy * dy
+    hits = np.flatnonzero(distance == np.repeat(np.maximum.reduceat(distance, starts), counts))
+
+    # Order the farthest points of each contour by their offset from its origin
+    owner = np.searchsorted(starts, hits, 'right') - 1
+    steps = (hits - starts[owner] - origins[owner] - 1) % counts[owner] + 1
+    order = np.lexsort((steps, owner))
+    first = np.r_[True, owner[order][1:] != owner[order][:-1]]
+    return steps[order][first]
+
+class SimplificationIndex:
+    """
+    Douglas-Peucker tolerances of the vertices of a ContourSet.
+
+    Attributes:
+        min_epsilon_factor: Finest simplification factor the index serves
+        perimeters: Closed arc length of each traced contour, which epsilons are relative to
+        vertices: ContourSet of the traced contours
+        tolerances: Largest epsilon (pixels) at which each vertex is kept, shape (N,);
+            the two anchors of every contour are always kept
+    """
+
+    def __init__(self, contours, min_epsilon_factor=0.0025):
+        self.min_epsilon_factor = min_epsilon_factor
+        self.perimeters = contours.perimeters
+        self.vertices = contours
+        self.tolerances = self._tolerances(contours, min_epsilon_factor * self.perimeters)
+
+    @staticmethod
+    def _tolerances(contours, floors):
+        if not len(contours):
+            return np.zeros(0)
+        points = contours.points[:, 0].astype(np.float64)
+        starts, counts = contours.offsets[:-1], np.diff(contours.offsets)
+
+        # Two far apart anchors, found by three rounds of jumping to the farthest point
+        origins = np.zeros(len(counts), dtype=np.intp)
+        for _ in range(2):
+            origins = (origins + _farthest(points[:, 0], points[:, 1], starts, counts, origins)) % counts
+        ends = _farthest(points[:, 0], points[:, 1], starts, counts, origins)
+
+        # Walk every contour from its first anchor around and back to it,
+        # so both halves are plain index ranges
+        sizes = counts + 1
+        first = np.cumsum(sizes) - sizes
+        walk = np.repeat(starts, sizes) + (np.arange(sizes.sum()) - np.repeat(first - origins, sizes)) % np.repeat(counts, sizes)
+        points = points[walk]
+        found = np.zeros(len(points))
+        found[first] = found[first + ends] = found[first + counts] = np.inf
+
+        # Split all segments of one depth of the recursion at once
+        x, y = points[:, 0], points[:, 1]
+        seg_start = np.concatenate((first, first + ends))
+        seg_end = np.concatenate((first + ends, first + counts))
+        seg_limit = np.full(len(seg_start), np.inf)
+        seg_floor = np.concatenate((floors, floors))
+        while len(seg_start):
+            inner = seg_end - seg_start - 1
+            busy = inner > 0
+            seg_start, seg_end, seg_limit, seg_floor, inner = seg_start[busy], seg_end[busy], seg_limit[busy], seg_floor[busy], inner[busy]
+            if not len(seg_start):
+                break
+
+            # Distance of every inner point from its segment's line, times the segment's
+            # length; these are exact, so ties go to the first point as in approxPolyDP
+            group = np.cumsum(inner) - inner
+            index = np.repeat(seg_start + 1 - group, inner) + np.arange(group[-1] + inner[-1])
+            dx, dy = x[seg_end] - x[seg_start], y[seg_end] - y[seg_start]
+            norm = np.hypot(dx, dy)
+            if (norm == 0).any():
+                # A segment between two copies of a point measures distances from the point
+                cross = np.hypot(x[index] - np.repeat(x[seg_start], inner), y[index] - np.repeat(y[seg_start], inner))
+                lined = np.repeat(norm > 0, inner)
+                cross[lined] = np.abs((y[index] - np.repeat(y[seg_start], inner)) * np.repeat(dx, inner)
+                                      - (x[index] - np.repeat(x[seg_start], inner)) * np.repeat(dy, inner))[lined]
+                norm[norm == 0] = 1
+            else:
+                offset = y[seg_start] * dx - x[seg_start] * dy
+                cross = np.abs(y[index] * np.repeat(dx, inner) - x[index] * np.repeat(dy, inner) - np.repeat(offset, inner))
+            largest = np.maximum.reduceat(cross, group)
+            hits = np.flatnonzero(cross == np.repeat(largest, inner))
+            owner = np.searchsorted(group, hits, 'right') - 1
+            split = index[hits[np.r_[True, owner[1:] != owner[:-1]]]]
+
+            # A vertex is only kept while the split above it is, and segments
+            # within the finest epsilon wanted are not split any further
+            limit = np.minimum(largest / norm, seg_limit)
+            found[split] = limit
+            grows = limit > seg_floor
+            split, limit, floor = split[grows], limit[grows], seg_floor[grows]
+            seg_start, seg_end = np.concatenate((seg_start[grows], split)), np.concatenate((split, seg_end[grows]))
+            seg_limit = np.concatenate((limit, limit))
+            seg_floor = np.concatenate((floor, floor))
+
+        # The closing copy of the first anchor lands on it, with the same value
+        tolerances = np.empty(len(contours.points))
+        tolerances[walk] = found
+        return tolerances
+
+    def kept(self, epsilon_factor=0.0025):
+        """
+        Boolean mask of the vertices simplify() keeps for epsilon_factor, shape (N,).
+        """
+        if epsilon_factor < self.min_epsilon_factor:
+            raise ValueError(f"epsilon_factor {epsilon_factor:g} is finer than the index ({self.min_epsilon_factor:g})")
+        return self.tolerances > np.repeat(epsilon_factor * self.perimeters, np.diff(self.vertices.offsets))
+
+    def simplify(self, epsilon_factor=0.0025):
+        """
+        Simplify every contour with epsilon_factor times its perimeter.
+
+        Args:
+            epsilon_factor: Factor to determine epsilon based on contour length,
+                no finer than min_epsilon_factor
+
+        Returns:
+            ContourSet of the simplified contours, in the same order
+        """
+        keep = self.kept(epsilon_factor)
+        vertices = self.vertices
+        offsets = np.zeros(len(vertices) + 1, dtype=np.intp)
+        if len(keep):
+            np.cumsum(np.add.reduceat(keep, vertices.offsets[:-1]), out=offsets[1:])
+        return ContourSet(vertices.points[keep], offsets)
+
+    def count(self, epsilon_factor=0.0025):
+        """
+        Number of vertices simplify() keeps for epsilon_factor.
+        """
+        return int(self.kept(epsilon_factor).sum())
@@ -0,0 +1,315 @@
+"""
+Centerline tracing of stroked line art.
+
+findContours traces the outline of every stroke, so a drawn line comes
+out as a thin loop running down one side and back up the other: twice
+the vertices it needs, and drawn twice over when a page animates the
+stroke. CenterlineTracer thins the mask down to a one pixel wide
+skeleton and walks it into open polylines instead, one per branch
+between line ends and junctions (and one per closed loop), which the
+simplify, bezier and curve fitting stages take like any other contour.
+Spurs shorter than the stroke is wide, left by bumps in its outline,
+are dropped first.
+
+Thinning uses OpenCV's Zhang-Suen implementation when the contrib
+module ximgproc is installed. Otherwise the same algorithm runs here:
+each pass looks up every pixel's 3x3 neighbourhood code (filter2D) in a
+table of deletable neighbourhoods (LUT), and later passes only revisit
+the rectangle around the pixels the previous passes deleted, so thick
+blobs don't make every pass cover the whole mask.
+"""
+import statistics
+import time
+
+from svgtrace.contours import ContourSet
+from svgtrace.instrument import stage
+from svgtrace.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Neighbours P2..P9 of the Zhang-Suen paper (N, NE, E, SE, S, SW, W, NW) as
+# (dx, dy); neighbour k contributes bit k to a pixel's neighbourhood code
+NEIGHBOURS = ((0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1))
+
+def _code_kernel():
+    """
+    3x3 correlation kernel giving every pixel of a 0/1 image its neighbourhood code.
+    """
+    kernel = np.zeros((3, 3), dtype=np.float32)
+    for bit, (dx, dy) in enumerate(NEIGHBOURS):
+        kernel[dy + 1, dx + 1] = 1 << bit
+    return kernel
+
+def _deletable_tables():
+    """
+    Zhang-Suen deletion tables of the two sub-iterations, indexed by neighbourhood code.
+    """
+    tables = np.zeros((2, 256), dtype=np.uint8)
+    for code in range(256):
+        p2, p3, p4, p5, p6, p7, p8, p9 = p = [(code >> bit) & 1 for bit in range(8)]
+        neighbours = sum(p)
+        transitions = sum(1 for k in range(8) if not p[k] and p[(k + 1) % 8])
+        if 2 <= neighbours <= 6 and transitions == 1:
+            tables[0, code] = not (p2 and p4 and p6) and not (p4 and p6 and p8)
+            tables[1, code] = not (p2 and p4 and p8) and not (p2 and p6 and p8)
+    return tables
+
+def _edge_steps():
+    """
+    Neighbours each skeleton pixel is linked to, by neighbourhood code.
+
+    A diagonal neighbour is only linked when neither pixel between the two
+    is set; otherwise they are already linked through that pixel, and the
+    extra link would make every step of a staircase look like a junction.
+    """
+    steps = []
+    for code in range(256):
+        linked = []
+        for bit, (dx, dy) in enumerate(NEIGHBOURS):
+            if not (code >> bit) & 1:
+                continue
+            # The orthogonal neighbours on both sides of a diagonal one
+            if dx and dy and (code >> ((bit - 1) % 8)) & 1 | (code >> ((bit + 1) % 8)) & 1:
+                continue
+            linked.append((dx, dy))
+        steps.append(tuple(linked))
+    return steps
+
+def _union(a, b):
+    """
+    Smallest rectangle (x0, y0, x1, y1) covering two rectangles, either of which may be None.
+    """
+    if a is None or b is None:
+        return a or b
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+def zhang_suen(binary):
+    """
+    Thin a mask to a one pixel wide, 8-connected skeleton (Zhang-Suen).
+
+    Args:
+        binary: Binary image array (nonzero is foreground)
+
+    Returns:
+        Skeleton as a 0/1 uint8 array with a one pixel empty border around the mask
+    """
+    kernel = _code_kernel()
+    tables = _deletable_tables()
+    img = cv2.copyMakeBorder((binary > 0).astype(np.uint8), 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
+    height, width = img.shape
+
+    # Rectangle (inner pixels only) each sub-iteration still has to look at
+    full = (1, 1, width - 1, height - 1)
+    dirty = [full, full]
+    while dirty[0] or dirty[1]:
+        for t in (0, 1):
+            if dirty[t] is None:
+                continue
+            x0, y0, x1, y1 = dirty[t]
+            dirty[t] = None
+
+            # Codes of the rectangle, computed with its one pixel frame
+            window = img[y0 - 1:y1 + 1, x0 - 1:x1 + 1]
+            code = cv2.filter2D(window, -1, kernel, borderType=cv2.BORDER_CONSTANT)[1:-1, 1:-1]
+            region = img[y0:y1, x0:x1]
+            deleted = cv2.bitwise_and(cv2.LUT(code, tables[t]), region)
+            if not cv2.countNonZero(deleted):
+                continue
+            region -= deleted
+
+            # Pixels next to a deleted one may have become deletable in either sub-iteration
+            x, y, w, h = cv2.boundingRect(deleted)
+            changed = (max(x0 + x - 1, 1), max(y0 + y - 1, 1), min(x0 + x + w + 1, width - 1), min(y0 + y + h + 1, height - 1))
+            dirty = [_union(dirty[0], changed), _union(dirty[1], changed)]
+    return img
+
+def thin(binary):
+    """
+    Skeleton of a mask, with OpenCV's ximgproc when it is installed.
+
+    Returns:
+        Skeleton as a 0/1 uint8 array with a one pixel empty border around the mask
+    """
+    if hasattr(cv2, 'ximgproc'):
+        mask = cv2.copyMakeBorder(binary, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
+        return (cv2.ximgproc.thinning(mask, thinningType=cv2.ximgproc.THINNING_ZHANGSUEN) > 0).astype(np.uint8)
+    return zhang_suen(binary)
+
+def trace_skeleton(skeleton, distance=None):
+    """
+    Walk a skeleton into polylines, one per branch and one per closed loop.
+
+    Branches run between line ends and junctions (pixels linked to one,
+    or more than two, others). Loops without any end or junction start
+    and end at the same pixel.
+
+    Thinning leaves short spurs where a stroke's outline has bumps or
+    corners, and each one cuts the stroke's centerline in two at a false
+    junction. Given the distance of every pixel to the background, spurs
+    (branches from a line end to a junction) no longer than the stroke is
+    wide at their junction are dropped before walking, so the stroke's
+    centerline runs on through where they joined it.
+
+    Args:
+        skeleton: 0/1 uint8 array from thin(), with an empty border
+        distance: Distance of every pixel of the skeleton array to the background
+            (None to keep the spurs)
+
+    Returns:
+        Tuple of (ContourSet of the polylines in skeleton coordinates, number of closed loops)
+    """
+    height, width = skeleton.shape
+    code = cv2.filter2D(skeleton, -1, _code_kernel(), borderType=cv2.BORDER_CONSTANT)
+    pixels = np.flatnonzero(skeleton)
+    flat_steps = [tuple(dy * width + dx for dx, dy in steps) for steps in _edge_steps()]
+    links = dict(zip(pixels.tolist(), [flat_steps[c] for c in code.ravel()[pixels].tolist()]))
+
+    if distance is not None and links:
+        flat_distance = distance.ravel()
+        longest = 2 * float(flat_distance[pixels].max())
+        around = [dy * width + dx for dx, dy in NEIGHBOURS]
+        cleared = []
+        for end in [pixel for pixel, steps in links.items() if len(steps) == 1]:
+            # Walk from the end until a junction, another end or past any stroke's width
+            path, previous, pixel = [end], end, end + links[end][0]
+            while len(links[pixel]) == 2 and len(path) <= longest:
+                a, b = links[pixel]
+                path.append(pixel)
+                previous, pixel = pixel, pixel + a if pixel + a != previous else pixel + b
+            if len(links[pixel]) > 2 and len(path) <= 2 * flat_distance[pixel]:
+                cleared.extend(path)
+
+        if cleared:
+            skeleton = skeleton.copy()
+            flat = skeleton.ravel()
+            flat[cleared] = 0
+            for pixel in cleared:
+                del links[pixel]
+
+            # Links of the pixels next to a cleared one, their neighbourhoods changed
+            for pixel in {pixel + offset for pixel in cleared for offset in around} & links.keys():
+                links[pixel] = flat_steps[sum(1 << bit for bit, offset in enumerate(around) if flat[pixel + offset])]
+
+    polylines = []
+    walked = set()
+
+    def walk(path, previous, pixel):
+        # Follow pixels linked to exactly two others until an end, a junction or the start
+        while len(links[pixel]) == 2 and pixel not in walked:
+            walked.add(pixel)
+            a, b = links[pixel]
+            previous, pixel = pixel, pixel + a if pixel + a != previous else pixel + b
+            path.append(pixel)
+        return path
+
+    # Branches leaving every end and junction
+    for pixel, steps in links.items():
+        if len(steps) == 2:
+            continue
+        for step in steps:
+            neighbour = pixel + step
+            if neighbour in walked or (len(links[neighbour]) != 2 and neighbour < pixel):
+                continue
+            polylines.append(walk([pixel, neighbour], pixel, neighbour))
+
+    # What is left are loops
+    loops = 0
+    for pixel, steps in links.items():
+        if pixel in walked:
+            continue
+        path = walk([pixel], pixel, pixel)
+        if len(path) > 1:
+            polylines.append(path)
+            loops += 1
+
+    if not polylines:
+        return ContourSet.from_contours([]), 0
+    offsets = np.zeros(len(polylines) + 1, dtype=np.intp)
+    np.cumsum([len(p) for p in polylines], out=offsets[1:])
+    flat = np.fromiter((i for p in polylines for i in p), dtype=np.intp, count=offsets[-1])
+    points = np.stack((flat % width, flat // width), axis=1).astype(np.int32)
+    return ContourSet(points, offsets), loops
+
+class CenterlineTracer:
+    """
+    Traces the centerlines of the strokes in masks as open polylines.
+
+    Attributes:
+        estimate_width: Whether to measure the stroke width along the centerlines
+        pixels: Number of skeleton pixels
+        branches: Number of polylines traced, loops included
+        loops: Number of closed loops traced
+        widths: Stroke width in pixels at every skeleton pixel measured (only with estimate_width)
+        seconds: Time spent thinning and tracing
+    """
+
+    def __init__(self, estimate_width=False):
+        self.estimate_width = estimate_width
+        self.pixels = 0
+        self.branches = 0
+        self.loops = 0
+        self.widths = []
+        self.seconds = 0.0
+
+    @property
+    def stroke_width(self):
+        """
+        Median stroke width measured along the centerlines, or None if nothing was measured.
+        """
+        return statistics.median(self.widths) if self.widths else None
+
+    def trace(self, binary, min_length=50):
+        """
+        Trace the centerlines of a mask, drop short ones and sort the rest by length.
+
+        Args:
+            binary: Binary image array
+            min_length: Minimum length of the polylines to include
+
+        Returns:
+            ContourSet of open polylines, longest first
+        """
+        start_time = time.perf_counter()
+        with stage('thin') as s:
+            skeleton = thin(binary)
+            s.set(pixels=int(cv2.countNonZero(skeleton)))
+
+        with stage('distance'):
+            # Same shape as the skeleton, one pixel border included
+            mask = cv2.copyMakeBorder((binary > 0).astype(np.uint8), 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
+            distance = cv2.distanceTransform(mask, cv2.DIST_L2, 5)
+
+        with stage('trace_skeleton') as s:
+            polylines, loops = trace_skeleton(skeleton, distance)
+            s.set(contours=len(polylines))
+
+        if self.estimate_width:
+            with stage('stroke_width'):
+                # A stroke w pixels wide has its centre (w + 1) / 2 pixels from the background
+                centers = polylines.points[:, 0]
+                self.widths.extend((2 * distance[centers[:, 1], centers[:, 0]].astype(np.float64) - 1).round(1).tolist())
+
+        # The skeleton has a one pixel border around the mask
+        polylines.points -= 1
+
+        self.pixels += int(cv2.countNonZero(skeleton))
+        self.branches += len(polylines)
+        self.loops += loops
+        self.seconds += time.perf_counter() - start_time
+
+        with stage('filter_sort') as s:
+            kept = polylines.select(polylines.lengths > min_length)
+            kept = kept.select(np.argsort(-kept.lengths, kind='stable'))
+            s.set(kept=len(kept))
+            return kept
+
+    def summary(self):
+        """
+        Describe the traced centerlines.
+        """
+        line = (f"Centerlines: {self.pixels} skeleton pixels traced into {self.branches} open polylines "
+                f"({self.loops} closed loops) in {self.seconds * 1000:.1f}ms")
+        if self.stroke_width is not None:
+            line += f", median stroke width {self.stroke_width:g}px"
+        return line
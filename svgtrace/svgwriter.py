@@ -0,0 +1,216 @@
+"""
+Incremental SVG writing.
+
+Path data is written chunk by chunk as the converters produce it, so the
+document never has to exist as one string in memory and readers of the
+output (a file or stdout) can start before vectorization finishes.
+"""
+import contextlib
+import sys
+
+from svgtrace.instrument import stage
+from svgtrace.measure import PathMeasure, length_attributes
+
+# Number of leading path data characters kept for the CLIs' preview line
+PREVIEW_LENGTH = 100
+
+def is_stdout(output_path):
+    """
+    Whether an output path refers to standard output ('-').
+    """
+    return str(output_path) == '-'
+
+@contextlib.contextmanager
+def open_output(output_path):
+    """
+    Open an output path for writing text, treating '-' as standard output.
+
+    A text file object (such as io.StringIO) is written to as is.
+    """
+    if hasattr(output_path, 'write'):
+        yield output_path
+    elif is_stdout(output_path):
+        yield sys.stdout
+        sys.stdout.flush()
+    else:
+        with open(output_path, 'w') as f:
+            yield f
+
+def write_path_element(f, path_chunks, attributes, leading_attributes="", indent="    ", lengths=False):
+    """
+    Stream one <path> element whose d attribute is built from chunks.
+
+    Args:
+        f: Text file object
+        path_chunks: String or iterable of path data strings
+        attributes: Attribute text written after the d attribute, up to the closing "/>"
+        leading_attributes: Attribute text written before the d attribute
+        indent: Indentation before the element
+        lengths: Whether to measure the path and write its pathLength and data-length attributes
+
+    Returns:
+        Tuple of (path data length, first PREVIEW_LENGTH characters of the path data)
+    """
+    if isinstance(path_chunks, str):
+        path_chunks = (path_chunks,)
+
+    measure = PathMeasure() if lengths else None
+    if measure:
+        path_chunks = measure.iter_measure(path_chunks)
+
+    f.write(f'{indent}<path{leading_attributes} d="')
+    length = 0
+    preview = ""
+    for chunk in path_chunks:
+        f.write(chunk)
+        if length < PREVIEW_LENGTH:
+            preview += chunk[:PREVIEW_LENGTH - length]
+        length += len(chunk)
+    if measure:
+        attributes = length_attributes(measure.length) + attributes
+    f.write(f'"{attributes}/>')
+
+    return length, preview
+
+def write_split_paths(f, subpaths, attributes, indent="    "):
+    """
+    Write one <path> element per subpath, each with its length and its offset along the drawing.
+
+    The offset is the total length of the paths before it, so a page can
+    draw the elements one after another as if they were a single path.
+
+    Args:
+        f: Text file object
+        subpaths: Iterable of standalone path data strings, one per element
+        attributes: Attribute text written after each d attribute
+        indent: Indentation before each element
+
+    Returns:
+        Tuple of (path data length, first PREVIEW_LENGTH characters of the path data)
+    """
+    length = 0
+    preview = ""
+    offset = 0.0
+    for i, path_data in enumerate(subpaths):
+        measure = PathMeasure()
+        measure.add(path_data)
+        if i:
+            f.write('\n')
+        f.write(f'{indent}<path d="{path_data}"{length_attributes(measure.length, offset)}{attributes}/>')
+        offset += measure.length
+
+        if length < PREVIEW_LENGTH:
+            preview += path_data[:PREVIEW_LENGTH - length]
+        length += len(path_data)
+
+    return length, preview
+
+def write_svg(output_path, path_chunks, width=600, height=420, attributes=' fill="none" stroke="navy" stroke-width="3"', lengths=False, split=False):
+    """
+    Stream an SVG document with a single path to a file or stdout.
+
+    Args:
+        output_path: Path to save the SVG file, or '-' for stdout
+        path_chunks: String or iterable of path data strings
+        width: Width of the SVG viewBox
+        height: Height of the SVG viewBox
+        attributes: Attribute text written after the d attribute
+        lengths: Whether to write the path's length as pathLength and data-length attributes
+        split: Write every chunk as a <path> of its own, with its length and offset (implies lengths)
+
+    Returns:
+        Tuple of (path data length, first PREVIEW_LENGTH characters of the path data)
+    """
+    if isinstance(path_chunks, str):
+        path_chunks = (path_chunks,)
+
+    with stage('write') as s, open_output(output_path) as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}">\n')
+        if split:
+            summary = write_split_paths(f, path_chunks, attributes)
+        else:
+            summary = write_path_element(f, path_chunks, attributes, lengths=lengths)
+        f.write('\n</svg>')
+        s.set(path_bytes=summary[0])
+
+    return summary
+
+def write_animated_svg(output_path, frames, width=600, height=420, attributes=' fill="none" stroke="navy" stroke-width="3"', loop=True):
+    """
+    Stream an SVG document with one path whose d attribute steps through frames.
+
+    The path shows the first frame, and a SMIL <animate> element switches
+    its d attribute from frame to frame (calcMode="discrete"), so browsers
+    play the animation without any script.
+
+    Args:
+        output_path: Path to save the SVG file, or '-' for stdout
+        frames: Iterable of (path data string, duration in seconds) per frame; durations must be positive
+        width: Width of the SVG viewBox
+        height: Height of the SVG viewBox
+        attributes: Attribute text written after the d attribute
+        loop: Whether the animation repeats forever (otherwise it plays once and stays on the last frame)
+
+    Returns:
+        Tuple of (number of frames, total duration in seconds)
+    """
+    with stage('write') as s, open_output(output_path) as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}">\n')
+        starts = []
+        total = 0.0
+        size = 0
+        for path_data, duration in frames:
+            if not starts:
+                f.write(f'    <path d="{path_data}"{attributes}>\n')
+                f.write('        <animate attributeName="d" calcMode="discrete" values="')
+            else:
+                f.write(';')
+            f.write(path_data)
+            starts.append(total)
+            total += duration
+            size += len(path_data)
+
+        # keyTimes and the duration are only known once every frame is written
+        if starts:
+            key_times = ';'.join(f'{start / total:.6g}' for start in starts)
+            repeat = 'repeatCount="indefinite"' if loop else 'fill="freeze"'
+            f.write(f'" keyTimes="{key_times}" dur="{total:.6g}s" {repeat}/>\n    </path>')
+        f.write('\n</svg>')
+        s.set(frames=len(starts), path_bytes=size)
+
+    return len(starts), total
+
+def stroke_attributes(color="navy", stroke_width=3):
+    """
+    Attribute text of an unfilled, stroked path.
+    """
+    return f' fill="none" stroke="{color}" stroke-width="{stroke_width}"'
+
+def save_svg(path_data, output_path, width=600, height=420, attributes=' fill="none" stroke="navy" stroke-width="3"', lengths=False, split=False):
+    """
+    Save path data as an SVG file and report where it was saved.
+
+    Args:
+        path_data: SVG path data string, or an iterable of path data chunks to stream
+        output_path: Path to save the SVG file, or '-' for stdout
+        width: Width of the SVG viewBox
+        height: Height of the SVG viewBox
+        attributes: Attribute text written after the d attribute
+        lengths: Whether to write the path's length as pathLength and data-length attributes
+        split: Write one <path> per chunk, each with its length and offset along the drawing
+
+    Returns:
+        Tuple of (path data length, beginning of the path data)
+    """
+    summary = write_svg(output_path, path_data, width, height, attributes, lengths, split)
+
+    if not is_stdout(output_path):
+        print(f"SVG saved to {output_path}")
+
+    return summary
+
+def format_preview(length, preview):
+    """
+    Format the "Path data: ..." line printed by the CLIs.
+    """
+    return f"Path data: {preview}..." if length > PREVIEW_LENGTH else preview
@@ -0,0 +1,127 @@
+"""
+Parameter sweeps that compute each pipeline stage once per distinct upstream setting.
+
+A sweep over thresholds, minimum lengths and bezier smoothing factors
+decodes the image once, converts it to grayscale once, blurs it once per
+smoothing setting, thresholds and traces it once per threshold, simplifies
+each contour once and builds each contour's path data once per smoothing
+factor. Every variant is then a selection and concatenation of those
+per-contour results, identical to what the converter produces for the
+same settings.
+"""
+import itertools
+
+from svgtrace.bezier import bezier_path
+from svgtrace.contours import ContourSet
+from svgtrace.lazy import lazy_import
+from svgtrace.pipeline import read_image, simplify_contour, to_gray
+from svgtrace.serialize import polyline_to_path
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+def iter_sweep(image, thresholds=(127,), min_lengths=(50,), bezier_smoothings=(0.25,), smoothings=(True,), simplify=True, use_bezier=True):
+    """
+    Yield the path data of every combination of the swept parameters.
+
+    Variants are produced with the threshold varying slowest, so the
+    intermediate results of one threshold are released before the next.
+
+    Args:
+        image: Path to the image file, or a BGR or grayscale image array
+        thresholds: Values for binary thresholding (0-255)
+        min_lengths: Minimum lengths of contours to include
+        bezier_smoothings: Smoothing factors for bezier curves (0-1)
+        smoothings: Whether to blur before thresholding (True, False or both)
+        simplify: Whether to simplify contours
+        use_bezier: Whether to use bezier curves for smoother paths
+
+    Yields:
+        Tuples of (parameters dict, SVG path data string)
+    """
+    # Decode and gray once for the whole sweep
+    gray = to_gray(image if hasattr(image, 'shape') else read_image(image))
+
+    # Straight lines don't depend on the bezier smoothing
+    if not use_bezier:
+        bezier_smoothings = bezier_smoothings[:1]
+
+    for smoothing in smoothings:
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0) if smoothing else gray
+
+        for threshold in thresholds:
+            _, binary = cv2.threshold(blurred, threshold, 255, cv2.THRESH_BINARY_INV)
+            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+            # Sorting everything once and filtering afterwards gives the same
+            # order as filtering first, since the sort is stable
+            contours = ContourSet.from_contours(contours)
+            lengths = contours.lengths.tolist()
+            order = np.argsort(-contours.areas, kind='stable').tolist()
+
+            # Simplified contours and per-contour path data, built on first use
+            simplified = {}
+            chunks = {}
+
+            for min_length, bezier_smoothing in itertools.product(min_lengths, bezier_smoothings):
+                parts = []
+                for i in order:
+                    if lengths[i] <= min_length:
+                        continue
+                    if (i, bezier_smoothing) not in chunks:
+                        if i not in simplified:
+                            simplified[i] = simplify_contour(contours[i], perimeter=contours.perimeters[i]) if simplify else contours[i]
+                        contour = simplified[i]
+                        if use_bezier and len(contour) > 2:
+                            chunks[i, bezier_smoothing] = bezier_path(contour, bezier_smoothing)
+                        else:
+                            chunks[i, bezier_smoothing] = polyline_to_path(contour)
+                    parts.append(chunks[i, bezier_smoothing])
+
+                params = {
+                    'smoothing': smoothing,
+                    'threshold': threshold,
+                    'min_length': min_length,
+                    'bezier_smoothing': bezier_smoothing if use_bezier else None,
+                }
+                yield params, "".join(parts)
+
+def sweep(image, thresholds=(127,), min_lengths=(50,), bezier_smoothings=(0.25,), smoothings=(True,), simplify=True, use_bezier=True):
+    """
+    Path data of every combination of the swept parameters.
+
+    Args:
+        image: Path to the image file, or a BGR or grayscale image array
+        thresholds: Values for binary thresholding (0-255)
+        min_lengths: Minimum lengths of contours to include
+        bezier_smoothings: Smoothing factors for bezier curves (0-1)
+        smoothings: Whether to blur before thresholding (True, False or both)
+        simplify: Whether to simplify contours
+        use_bezier: Whether to use bezier curves for smoother paths
+
+    Returns:
+        List of (parameters dict, SVG path data string) tuples
+    """
+    return list(iter_sweep(image, thresholds, min_lengths, bezier_smoothings, smoothings, simplify, use_bezier))
+
+def variant_label(params):
+    """
+    Short human-readable description of a variant's parameters.
+    """
+    label = f"threshold {params['threshold']}, min length {params['min_length']}"
+    if params['bezier_smoothing'] is not None:
+        label += f", bezier {params['bezier_smoothing']:g}"
+    if not params['smoothing']:
+        label += ", no blur"
+    return label
+
+def variant_name(params):
+    """
+    File name stem of a variant, e.g. "t127_m50_b0.25".
+    """
+    name = f"t{params['threshold']}_m{params['min_length']}"
+    if params['bezier_smoothing'] is not None:
+        name += f"_b{params['bezier_smoothing']:g}"
+    if not params['smoothing']:
+        name += "_noblur"
+    return name
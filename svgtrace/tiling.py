@@ -0,0 +1,148 @@
+"""
+Bounded-memory contour tracing over horizontal strips.
+
+The mask is produced one strip at a time from a slice of the source image
+(plus enough context rows for the neighbourhood filters), and contours are
+traced on a rolling buffer. Contours that are complete are emitted and
+erased from the buffer; contours that touch the bottom seam stay in the
+buffer until the strip that completes them arrives. The result matches
+`find_contours` on the full mask as long as the mask function is local.
+"""
+from pathlib import Path
+
+from svgtrace.contours import ContourSet
+from svgtrace.instrument import stage
+from svgtrace.lazy import lazy_import
+from svgtrace.pipeline import decode_image
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+def open_image(image_path, fast_decode=False):
+    """
+    Open an image for strip processing.
+
+    `.npy` arrays are memory-mapped, so only the rows of the current strip
+    are paged in. Other formats are decoded in full by OpenCV, which cannot
+    decode a partial image; that decoded buffer is the only full-size
+    array kept alive in tiled mode.
+
+    Args:
+        image_path: Path to the image file
+        fast_decode: Decode JPEGs straight to grayscale, a third of the size of the BGR image
+
+    Returns:
+        Image array (possibly a read-only memory map)
+    """
+    if Path(image_path).suffix.lower() == '.npy':
+        return np.load(str(image_path), mmap_mode='r')
+    return decode_image(image_path, fast_decode)
+
+def iter_mask_strips(img, mask_fn, strip_height=1024, context=2):
+    """
+    Compute a mask strip by strip.
+
+    Args:
+        img: Source image array (H, W) or (H, W, C)
+        mask_fn: Function mapping an image slice to a mask of the same height
+        strip_height: Number of mask rows produced per strip
+        context: Rows of context needed above and below each strip for
+            mask_fn's neighbourhood operations to match the full-image result
+
+    Yields:
+        Tuples of (first row, mask strip)
+    """
+    height = img.shape[0]
+    for y0 in range(0, height, strip_height):
+        y1 = min(y0 + strip_height, height)
+        c0, c1 = max(y0 - context, 0), min(y1 + context, height)
+        with stage('mask_strip', rows=y1 - y0):
+            mask = mask_fn(np.ascontiguousarray(img[c0:c1]))
+            mask = np.ascontiguousarray(mask[y0 - c0:y1 - c0])
+        yield y0, mask
+
+def _may_be_enclosed(box, open_boxes):
+    """
+    Whether an open contour could still grow into a ring around `box`.
+
+    Anything enclosing a contour must cross the columns of that contour
+    somewhere above its top row.
+    """
+    x, y, w, _ = box
+    return any(ox < x + w and ox + ow > x and oy < y for ox, oy, ow, _ in open_boxes)
+
+def trace_strips(strips, height, min_contour_length=50):
+    """
+    Trace external contours over a sequence of mask strips.
+
+    Args:
+        strips: Iterable of (first row, mask strip) tuples covering the image top to bottom
+        height: Total image height
+        min_contour_length: Minimum length of contours to include
+
+    Returns:
+        ContourSet in image coordinates, largest area first, in the same
+        order `find_contours` returns for the full mask
+    """
+    buffer = None
+    buffer_top = 0
+    finished = []
+
+    for y0, strip in strips:
+        buffer = strip if buffer is None else np.vstack((buffer, strip))
+        at_end = y0 + len(strip) >= height
+        last_row = len(buffer) - 1
+
+        with stage('find_contours', buffer_rows=len(buffer)):
+            contours, _ = cv2.findContours(buffer, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        traced = ContourSet.from_contours(contours)
+        boxes = traced.boxes.tolist()
+
+        # Contours touching the bottom seam may continue in the next strip
+        open_boxes = [box for box in boxes if not at_end and box[1] + box[3] - 1 == last_row]
+
+        keep_from = min([box[1] for box in open_boxes], default=len(buffer))
+        for contour, box, length in zip(contours, boxes, traced.lengths.tolist()):
+            if not at_end and box[1] + box[3] - 1 == last_row:
+                continue
+
+            # Wait until no open contour can close around this one
+            if not at_end and _may_be_enclosed(box, open_boxes):
+                keep_from = min(keep_from, box[1])
+                continue
+
+            if length > min_contour_length:
+                finished.append(contour + np.array([0, buffer_top], dtype=contour.dtype))
+
+            # Erase the finished contour (and anything inside it) from the buffer
+            cv2.drawContours(buffer, [contour], -1, 0, thickness=cv2.FILLED)
+
+        # Rows above every unfinished contour are no longer needed
+        buffer = buffer[keep_from:]
+        buffer_top += keep_from
+
+    # Reproduce findContours' order (reverse raster order of the start points),
+    # then sort by area like find_contours
+    with stage('filter_sort', kept=len(finished)):
+        finished.sort(key=lambda c: (int(c[0, 0, 1]), int(c[0, 0, 0])), reverse=True)
+        return ContourSet.from_contours(finished).filter_sort(min_contour_length)
+
+def find_contours_tiled(img, mask_fn, strip_height=1024, context=2, min_contour_length=50):
+    """
+    Strip-by-strip equivalent of `find_contours(mask_fn(img), min_contour_length)`.
+
+    Peak memory is bounded by the strip size (plus the rows spanned by
+    contours that are still open) instead of the full image size.
+
+    Args:
+        img: Source image array
+        mask_fn: Function mapping an image slice to a binary mask
+        strip_height: Number of rows processed per strip
+        context: Rows of context mask_fn needs on each side
+        min_contour_length: Minimum length of contours to include
+
+    Returns:
+        ContourSet of the contours, largest area first
+    """
+    strips = iter_mask_strips(img, mask_fn, strip_height, context)
+    return trace_strips(strips, img.shape[0], min_contour_length)
@@ -0,0 +1,8 @@
+"""
+Make the svgtrace package and the benchmark helpers importable from the tests.
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / 'benchmarks')]
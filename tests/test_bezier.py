@@ -0,0 +1,35 @@
+"""
+Batched bezier control points and path data against the original per-vertex loop.
+
+Usage:
+    python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+from bench_bezier import reference_control_points, reference_path
+from bench_serialize import make_contours
+from svgtrace.bezier import bezier_control_points_batch, bezier_path, bezier_paths
+
+# Repeated points exercise the zero-length branch
+EDGE_CASES = [np.array([[[5, 5]], [[5, 5]], [[9, 2]], [[9, 2]], [[0, 0]]], dtype=np.int32)]
+
+@pytest.mark.parametrize('smoothing', [0.25, 0.5])
+def test_control_points_match_reference(smoothing):
+    contours = EDGE_CASES + make_contours(5000, points_per_contour=37)
+    points = np.concatenate([c.reshape(-1, 2) for c in contours])
+    offsets = np.concatenate(([0], np.cumsum([len(c) for c in contours])))
+    c1, c2, end, segment_offsets = bezier_control_points_batch(points, offsets, smoothing)
+
+    for k, contour in enumerate(contours):
+        lo, hi = segment_offsets[k], segment_offsets[k + 1]
+        ref_c1, ref_c2, ref_end = reference_control_points([p[0] for p in contour], smoothing)
+        for ours, ref in ((c1[lo:hi], ref_c1), (c2[lo:hi], ref_c2), (end[lo:hi], ref_end)):
+            np.testing.assert_array_equal(ours, np.array(ref, dtype=np.float64).reshape(-1, 2), err_msg=f"contour {k}")
+
+@pytest.mark.parametrize('smoothing', [0.25, 0.5])
+def test_path_data_matches_reference(smoothing):
+    contours = EDGE_CASES + make_contours(10000)
+    expected = reference_path(contours, smoothing)
+    assert "".join(bezier_path(c, smoothing) for c in contours) == expected
+    assert bezier_paths(contours, smoothing) == expected
@@ -0,0 +1,38 @@
+"""
+Levels of detail cut from a SimplificationIndex against approxPolyDP.
+"""
+import cv2
+import pytest
+
+from bench_lod import max_deviation
+from svgtrace.pipeline import find_contours, threshold_image, to_gray
+from svgtrace.simplify import SimplificationIndex
+from synthetic import make_image
+
+LEVELS = [0.02, 0.01, 0.005, 0.0025]
+
+@pytest.fixture(scope='module', params=['wavy', 'noise', 'color'])
+def contours(request):
+    return find_contours(threshold_image(to_gray(make_image(request.param, '1k'))), 50)
+
+def test_levels_stay_within_epsilon(contours):
+    index = SimplificationIndex(contours, min(LEVELS))
+    for factor in LEVELS:
+        assert max_deviation(index, factor) <= 1
+
+def test_levels_are_nested(contours):
+    index = SimplificationIndex(contours, min(LEVELS))
+    for coarse, fine in zip(LEVELS, LEVELS[1:]):
+        assert not (index.kept(coarse) & ~index.kept(fine)).any()
+
+def test_vertex_counts_match_approxpolydp(contours):
+    index = SimplificationIndex(contours, min(LEVELS))
+    perimeters = contours.perimeters.tolist()
+    for factor in LEVELS:
+        expected = sum(len(cv2.approxPolyDP(c, factor * p, True)) for c, p in zip(contours, perimeters))
+        assert expected <= index.count(factor) <= 1.03 * expected
+
+def test_finer_levels_than_the_index_are_rejected(contours):
+    index = SimplificationIndex(contours, 0.005)
+    with pytest.raises(ValueError):
+        index.simplify(0.0025)